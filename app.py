@@ -5,17 +5,28 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-import httpx
 
 # Import cấu hình chung
-from configs import APP_NAME, PORT, OPEN_METEO_FORECAST
+from configs import (
+    APP_NAME,
+    PORT,
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_BYTES,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+)
 
 # Import routers
 from services.routes import router as api_router
-
-# Import danh sách địa danh
-from vietnam_provinces import PROVINCES
-from vietnam_wards import WARDS
+from services import http_client
+from services import gazetteer
+from services import spatial_index
+from services import cache
+from services import weather_sources
+from services import prewarm
+from services import snapshot
+from services import jsonio
+from services.compression import CompressionMiddleware, brotli
 
 # --------------------------------------
 # Logging setup
@@ -35,21 +46,48 @@ async def lifespan(app: FastAPI):
     log.info("✅ CORS enabled, endpoints: /v1/chat, /v1/typhoon, /weather")
     log.info(f"✅ Uvicorn running port {PORT} (if launched with uvicorn)")
 
+    # Gazetteer dạng cột (memory-map, dùng chung page giữa các worker)
+    gazetteer.build_index()
+    gz = gazetteer.stats()
+
     # Thống kê tỉnh/thành
-    provinces = list(PROVINCES.keys())
-    log.info(f"📍 Tổng số tỉnh/thành: {len(provinces)}")  # 34
+    log.info(f"📍 Tổng số tỉnh/thành: {gz['provinces']}")  # 34
 
     # Thống kê phường/xã toàn quốc
-    wards_all = list(WARDS.keys())
-    log.info(f"📍 Tổng số phường/xã toàn quốc: {len(wards_all)}")  # 3321
+    log.info(f"📍 Tổng số phường/xã toàn quốc: {gz['wards']}")  # 3321
+
+    log.info(f"📍 Gazetteer: {gz['names']} tên/alias, {gz['ambiguous_names']} tên trùng nhiều nơi ({gz['source']})")
+    spatial_index.build_indexes()
+
+    log.info(f"✅ JSON backend: {jsonio.BACKEND}")
+    log.info(f"✅ Nén response: {'br + gzip' if brotli is not None else 'gzip'}" if COMPRESSION_ENABLED else "✅ Nén response: tắt")
 
-    yield
-    log.info(f"🛑 {APP_NAME} API shutting down...")
+    # HTTP client dùng chung cho mọi request upstream
+    await http_client.startup()
+
+    # Dọn cache hết hạn định kỳ
+    cache.start_sweeper()
+
+    # Làm nóng cache dự báo cho tỉnh/thành và phường/xã được hỏi nhiều
+    prewarm.start()
+
+    # Bảng toàn quốc cho /v1/snapshot
+    snapshot.start()
+
+    try:
+        yield
+    finally:
+        await snapshot.stop()
+        await prewarm.stop()
+        await cache.stop_sweeper()
+        await weather_sources.drain()
+        await http_client.shutdown()
+        log.info(f"🛑 {APP_NAME} API shutting down...")
 
 # --------------------------------------
 # FastAPI app + CORS
 # --------------------------------------
-app = FastAPI(title=APP_NAME, lifespan=lifespan)
+app = FastAPI(title=APP_NAME, lifespan=lifespan, default_response_class=jsonio.FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -57,8 +95,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Nén response lớn (bản tin /v1/chat vài chục KB JSON)
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_BYTES,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+    )
+
 # --------------------------------------
 # Đăng ký routers
 # --------------------------------------
@@ -83,23 +131,18 @@ async def get_weather(
     Gọi dữ liệu thời tiết từ Open-Meteo.
     - lat, lon: tọa độ địa điểm
     - source: hiện tại chỉ hỗ trợ 'openmeteo'
+    Dữ liệu lấy tại tâm ô lưới chứa (lat, lon) (xem services/grid.py); ô, độ phân giải snap
+    và tọa độ được hỏi nằm trong "meta".
     """
 
     results = {}
 
-    async with httpx.AsyncClient(timeout=10) as client:
-        try:
-            resp = await client.get(
-                OPEN_METEO_FORECAST,
-                params={
-                    "latitude": lat,
-                    "longitude": lon,
-                    "hourly": "temperature_2m,precipitation,wind_speed_10m"
-                }
-            )
-            resp.raise_for_status()
-            results["openmeteo"] = resp.json()
-        except Exception as e:
-            results["openmeteo_error"] = str(e)
+    try:
+        # Consumer "weather": 3 biến hourly (xem services/weather_sources.py), qua cache dùng chung
+        fc, cache_status = await weather_sources.fetch_forecast_entry(lat, lon, consumer="weather")
+        results["openmeteo"] = fc.raw
+        results["meta"] = dict(weather_sources.forecast_meta(lat, lon), cache=cache_status, requested={"latitude": lat, "longitude": lon})
+    except Exception as e:
+        results["openmeteo_error"] = str(e)
 
     return results
\ No newline at end of file
@@ -0,0 +1,73 @@
+# benchmarks/bench_aggregate.py
+"""
+So sánh chi phí CPU tổng hợp hourly cho một forecast:
+  - legacy: _safe_avg trên từng biến (13 lần) + quét max gió/giật riêng
+  - fused : Forecast (parse một lần) + kernel aggregate cho nhiều cửa sổ
+
+Chạy:  python -m benchmarks.bench_aggregate [số_giờ] [số_lần]
+"""
+import sys
+import random
+import datetime
+import timeit
+
+from services.forecast import Forecast, aggregate
+from services.weather_sources import STATS_FIELDS
+
+def make_forecast(hours: int = 168, seed: int = 0) -> dict:
+    r = random.Random(seed)
+    t0 = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    times = [(t0 + datetime.timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(hours)]
+    hourly = {"time": times}
+    for f in STATS_FIELDS + ("winddirection_10m",):
+        hourly[f] = [None if r.random() < 0.05 else round(r.uniform(0, 40), 1) for _ in times]
+    days = sorted({t[:10] for t in times})
+    daily = {
+        "time": days,
+        "sunrise": [d + "T22:50" for d in days],
+        "sunset": [d + "T10:40" for d in days],
+    }
+    return {"hourly": hourly, "daily": daily}
+
+def legacy(om: dict) -> dict:
+    hourly = om["hourly"]
+
+    def _safe_avg(values: list):
+        try:
+            vals = [float(x) for x in values if x is not None]
+            if not vals:
+                return None
+            return round(sum(vals) / len(vals), 1)
+        except Exception:
+            return None
+
+    out = {f: _safe_avg(hourly.get(f, [])) for f in STATS_FIELDS}
+    out["max_wind"] = max([v for v in hourly.get("wind_speed_10m") or [] if v is not None], default=None)
+    out["max_gust"] = max([v for v in hourly.get("wind_gusts_10m") or [] if v is not None], default=None)
+    return out
+
+def fused(om: dict) -> dict:
+    fc = Forecast(om)
+    return {w: fc.stats(w, fields=STATS_FIELDS) for w in ("all", "next24h", "today", "daylight")}
+
+def main() -> None:
+    hours = int(sys.argv[1]) if len(sys.argv) > 1 else 168
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    om = make_forecast(hours)
+    fc = Forecast(om)
+
+    def us(fn) -> float:
+        return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+    rows = [
+        ("legacy: 13×_safe_avg + 2×max (mỗi request)", us(lambda: legacy(om))),
+        ("fused : parse Forecast + 4 cửa sổ (mỗi lần tải)", us(lambda: fused(om))),
+        ("fused : kernel aggregate toàn chuỗi", us(lambda: aggregate(fc.hourly_matrix))),
+        ("fused : 3 cửa sổ đã nhớ (mỗi request)", us(lambda: [fc.stats(w, fields=STATS_FIELDS) for w in ("next24h", "today", "daylight")])),
+    ]
+    print(f"{hours} giờ × {len(STATS_FIELDS)} biến, {number} lần/đợt")
+    for label, t in rows:
+        print(f"  {label:<52} {t:9.1f} µs")
+
+if __name__ == "__main__":
+    main()
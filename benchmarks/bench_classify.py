@@ -0,0 +1,77 @@
+# benchmarks/bench_classify.py
+"""
+Phân loại mức cho toàn quốc (mặc định 3.321 phường/xã):
+  - scalar: vòng lặp từng phường qua classify_* (trả câu)
+  - array : classify_*_codes trên mảng NumPy (trả mã mức)
+
+Chạy:  python -m benchmarks.bench_classify [số_phường] [số_lần]
+"""
+import sys
+import datetime
+import timeit
+
+import numpy as np
+
+from services.temperature import classify_temp_level, classify_temp_level_codes
+from services.rain import classify_rain_level, classify_rain_level_codes
+from services.wind import classify_wind_level, classify_wind_level_codes, classify_wind_beaufort, classify_wind_beaufort_codes
+from services.humidity import classify_humidity, classify_humidity_codes
+from services.pressure import classify_pressure, classify_pressure_codes
+from services.solar_uv import classify_uv, classify_uv_codes
+from services.visibility import classify_visibility, classify_visibility_codes
+from services.cloud_dew import classify_cloudcover, classify_cloudcover_codes, classify_dewpoint, classify_dewpoint_codes
+
+def make_columns(n: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    cols = {
+        "temp": rng.uniform(5, 40, n), "rain": rng.exponential(4, n),
+        "wspd": rng.uniform(0, 25, n), "gust": rng.uniform(0, 35, n),
+        "rh": rng.uniform(20, 100, n), "pmsl": rng.uniform(990, 1030, n),
+        "uv": rng.uniform(0, 12, n), "cloud": rng.uniform(0, 100, n),
+        "dew": rng.uniform(0, 28, n), "vis": rng.uniform(0, 25, n),
+    }
+    for arr in cols.values():
+        arr[rng.random(n) < 0.03] = np.nan   # thiếu dữ liệu rải rác
+    return cols
+
+def scalar(cols: dict, now: datetime.datetime) -> list:
+    rows = [{k: (None if np.isnan(v) else v) for k, v in zip(cols, vals)} for vals in zip(*(c.tolist() for c in cols.values()))]
+    return [
+        (
+            classify_temp_level(r["temp"]), classify_rain_level(r["rain"]),
+            classify_wind_level(r["wspd"], r["gust"]), classify_wind_beaufort(r["wspd"]),
+            classify_humidity(r["rh"]), classify_pressure(r["pmsl"]),
+            classify_uv(r["uv"], r["rain"], r["cloud"], now=now), classify_visibility(r["vis"]),
+            classify_cloudcover(r["cloud"]), classify_dewpoint(r["dew"]),
+        )
+        for r in rows
+    ]
+
+def vectorized(cols: dict, now: datetime.datetime) -> dict:
+    return {
+        "temp": classify_temp_level_codes(cols["temp"]), "rain": classify_rain_level_codes(cols["rain"]),
+        "wind": classify_wind_level_codes(cols["wspd"], cols["gust"]), "beaufort": classify_wind_beaufort_codes(cols["wspd"]),
+        "humidity": classify_humidity_codes(cols["rh"]), "pressure": classify_pressure_codes(cols["pmsl"]),
+        "uv": classify_uv_codes(cols["uv"], cols["rain"], cols["cloud"], now=now), "visibility": classify_visibility_codes(cols["vis"]),
+        "cloud": classify_cloudcover_codes(cols["cloud"]), "dewpoint": classify_dewpoint_codes(cols["dew"]),
+    }
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 3321
+    number = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    cols = make_columns(n)
+    now = datetime.datetime.now().replace(hour=12)
+
+    def ms(fn) -> float:
+        return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e3
+
+    rows = [
+        ("scalar: vòng lặp từng phường (10 phân loại)", ms(lambda: scalar(cols, now))),
+        ("array : classify_*_codes trên mảng (10 phân loại)", ms(lambda: vectorized(cols, now))),
+    ]
+    print(f"{n} phường/xã, {number} lần/đợt")
+    for label, t in rows:
+        print(f"  {label:<52} {t:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
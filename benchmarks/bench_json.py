@@ -0,0 +1,66 @@
+# benchmarks/bench_json.py
+"""
+So sánh p50/p99 decode (payload Open-Meteo) và encode (response /v1/chat) giữa các backend JSON.
+
+Chạy:  python -m benchmarks.bench_json [forecast.json] [số_lần]
+  - forecast.json: response Open-Meteo đã lưu (vd. curl ".../v1/forecast?...&hourly=..." > forecast.json);
+    bỏ trống thì dùng payload tổng hợp 7 ngày từ benchmarks/bench_aggregate.py
+"""
+import sys
+import time
+import json
+import asyncio
+import statistics
+
+from services import jsonio
+from services import weather_sources
+from services.forecast import Forecast
+from benchmarks.bench_aggregate import make_forecast
+
+def load_payload(path: str = None) -> bytes:
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    om = make_forecast(168)
+    om["current_weather"] = {"temperature": 28.4, "windspeed": 7.2, "winddirection": 120, "weathercode": 3}
+    return json.dumps(om).encode("utf-8")
+
+def build_response(raw: bytes) -> dict:
+    """Response /v1/chat tương đương (data.hourly/daily đủ series) dựng từ payload."""
+    om = json.loads(raw)
+    fc = Forecast(om)
+
+    async def _entry(lat, lon, consumer="bulletin"):
+        return fc, {"version": 1, "stale": False}
+
+    weather_sources.fetch_forecast_entry = _entry
+    data = asyncio.run(weather_sources.get_weather(21.0, 105.8))
+    return {"status": "ok", "data": {"bulletin": {"text": "—" * 400, "data": data}}}
+
+def percentiles(fn, number: int) -> tuple:
+    samples = []
+    for _ in range(number):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+def main() -> None:
+    path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].isdigit() else None
+    number = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 300
+    raw = load_payload(path)
+    resp = build_response(raw)
+    print(f"payload {len(raw) / 1024:.1f} KB, response {len(json.dumps(resp)) / 1024:.1f} KB, {number} lần")
+    print(f"  {'backend':<10} {'decode p50':>11} {'p99':>9} {'encode p50':>11} {'p99':>9}   (µs)")
+    for name, ok in jsonio.available().items():
+        if not ok:
+            print(f"  {name:<10} (chưa cài)")
+            continue
+        jsonio.use(name)
+        d50, d99 = percentiles(lambda: jsonio.loads(raw), number)
+        e50, e99 = percentiles(lambda: jsonio.dumps(resp), number)
+        print(f"  {name:<10} {d50:11.1f} {d99:9.1f} {e50:11.1f} {e99:9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_matcher.py
+"""
+So sánh chi phí phân loại câu theo từ khóa:
+  - legacy : lower() + any(k in low ...) cho 7 nhóm, rồi quét severity_map (2 lần / câu như bản cũ)
+  - matcher: classify_alert, một automaton Aho-Corasick cho cả nhóm và mức độ, một lượt / câu
+Đầu vào: mọi câu cảnh báo trong bảng luật.
+(choose_weather_icon giữ chuỗi if/elif: với 5 nhóm từ khóa, `in` nhanh hơn automaton ~3×)
+
+Chạy:  python -m benchmarks.bench_matcher [số_lần]
+"""
+import sys
+import timeit
+
+from services.alerts import ALL_ALERTS, ALERT_GROUP_KEYWORDS, SEVERITY_KEYWORDS, SEVERITY_NONE, classify_alert
+
+def alert_texts() -> list:
+    return [label.render(12.3) for rs, _ in ALL_ALERTS.steps for rule in rs.rules for label in rule.scale.labels]
+
+def legacy_classify(text: str) -> tuple:
+    low = text.lower()
+    groups = tuple(g for g, keys in ALERT_GROUP_KEYWORDS.items() if any(k in low for k in keys))
+
+    def get_severity(alert: str) -> tuple:
+        low = alert.lower()
+        for kw, sev in SEVERITY_KEYWORDS:
+            if kw in low:
+                return sev
+        return SEVERITY_NONE
+
+    return groups, get_severity(text)[0], get_severity(text)[1]
+
+def main() -> None:
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    texts = alert_texts()
+
+    for t in texts:
+        groups, score, label = legacy_classify(t)
+        assert (groups, (score, label)) == classify_alert(t), t
+
+    def us(fn, items) -> float:
+        return min(timeit.repeat(lambda: [fn(x) for x in items], number=number, repeat=5)) / number / len(items) * 1e6
+
+    rows = [
+        ("legacy : nhóm + 2× severity (mỗi câu)", us(legacy_classify, texts)),
+        ("matcher: nhóm + severity, một lượt (mỗi câu)", us(classify_alert, texts)),
+    ]
+    avg_len = sum(map(len, texts)) / len(texts)
+    print(f"{len(texts)} câu cảnh báo (dài TB {avg_len:.0f} ký tự), {number} lần/đợt")
+    for label, t in rows:
+        print(f"  {label:<44} {t:7.2f} µs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# build_gazetteer.py
+# Build gazetteer nhị phân dạng cột từ vietnam_provinces.py + vietnam_wards.py.
+# Chạy một lần khi deploy (hoặc khi dữ liệu địa danh thay đổi):
+#     python build_gazetteer.py [đường_dẫn_output]
+import sys
+import time
+
+from configs import GAZETTEER_PATH
+from services import gazetteer
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else GAZETTEER_PATH
+    started = time.perf_counter()
+    gazetteer.write_gazetteer(path)
+    data = gazetteer.open_gazetteer(path)
+    elapsed = (time.perf_counter() - started) * 1000.0
+    print(f"✅ {path}: {data.size} địa danh, {data.name_count()} tên/alias, "
+          f"{len(data.buf)} bytes ({elapsed:.0f} ms)")
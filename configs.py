@@ -37,6 +37,15 @@ OPEN_METEO_FIELDS_CURRENT: str = os.getenv("OPEN_METEO_FIELDS_CURRENT")
 OPEN_METEO_FIELDS_HOURLY: str = os.getenv("OPEN_METEO_FIELDS_HOURLY")
 OPEN_METEO_FIELDS_DAILY: str = os.getenv("OPEN_METEO_FIELDS_DAILY")
 
+# Các trường trên được lấy thêm cho bản tin (xem services/projection.py)
+# Tầm dự báo cho bản tin (ngày, tính theo GMT): 2 ngày phủ trọn hôm nay theo giờ VN
+BULLETIN_FORECAST_DAYS: int = int(os.getenv("BULLETIN_FORECAST_DAYS") or 2)
+
+# --------------------------------------
+# Thư viện JSON (auto | orjson | msgspec | json)
+# --------------------------------------
+JSON_BACKEND: str = (os.getenv("JSON_BACKEND") or "auto").lower()
+
 # --------------------------------------
 # Ngôn ngữ và số lượng kết quả geocode
 # --------------------------------------
@@ -58,4 +67,118 @@ MERGE_STRATEGY: str = os.getenv("MERGE_STRATEGY", "openmeteo")
 # --------------------------------------
 # Cache TTL (giây)
 # --------------------------------------
-CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS") or 300)
\ No newline at end of file
+CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS") or 300)
+
+# --------------------------------------
+# Cache dự báo (LRU + hết hạn theo mốc cập nhật model)
+#   - MODEL_UPDATE_INTERVAL_HOURS / OFFSET_MINUTES: mốc Open-Meteo có dữ liệu mới (UTC)
+#   - FORECAST_CACHE_MIN_TTL_SECONDS: tránh TTL quá ngắn khi fetch sát mốc
+# --------------------------------------
+FORECAST_CACHE_MAX_ENTRIES: int = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES") or 5000)
+CACHE_SWEEP_INTERVAL_SECONDS: int = int(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS") or 60)
+MODEL_UPDATE_INTERVAL_HOURS: int = int(os.getenv("MODEL_UPDATE_INTERVAL_HOURS") or 1)
+MODEL_UPDATE_OFFSET_MINUTES: int = int(os.getenv("MODEL_UPDATE_OFFSET_MINUTES") or 0)
+FORECAST_CACHE_MIN_TTL_SECONDS: int = int(os.getenv("FORECAST_CACHE_MIN_TTL_SECONDS") or 60)
+
+# --------------------------------------
+# Cache bản tin đã dựng: key = địa danh + version dự báo + giờ địa phương + các phần chọn
+# --------------------------------------
+BULLETIN_CACHE_MAX_ENTRIES: int = int(os.getenv("BULLETIN_CACHE_MAX_ENTRIES") or 5000)
+
+# --------------------------------------
+# Phục vụ dữ liệu cũ (stale)
+#   - STALE_WHILE_REVALIDATE_SECONDS: quá hạn trong khoảng này -> trả ngay, làm mới nền
+#   - STALE_IF_ERROR_SECONDS: upstream lỗi -> trả bản tốt gần nhất trong khoảng này
+# --------------------------------------
+STALE_WHILE_REVALIDATE_SECONDS: int = int(os.getenv("STALE_WHILE_REVALIDATE_SECONDS") or 1800)
+STALE_IF_ERROR_SECONDS: int = int(os.getenv("STALE_IF_ERROR_SECONDS") or 21600)
+
+# --------------------------------------
+# Gom nhiều điểm vào một request Open-Meteo
+# --------------------------------------
+FORECAST_BATCH_ENABLED: bool = (os.getenv("FORECAST_BATCH_ENABLED") or "true").lower() in ("1", "true", "yes")
+FORECAST_BATCH_WINDOW_MS: int = int(os.getenv("FORECAST_BATCH_WINDOW_MS") or 15)
+FORECAST_BATCH_MAX_POINTS: int = int(os.getenv("FORECAST_BATCH_MAX_POINTS") or 50)
+
+# --------------------------------------
+# Cửa sổ thống kê hourly trả kèm get_weather (all | today | daylight | next24h | nextNh)
+# --------------------------------------
+FORECAST_STATS_WINDOWS: list = [w.strip() for w in (os.getenv("FORECAST_STATS_WINDOWS") or "next24h,today,daylight").split(",") if w.strip()]
+
+# --------------------------------------
+# Prewarm nền: mọi tỉnh/thành + top-N phường/xã được hỏi nhiều
+#   PREWARM_RATE_PER_SECOND tính theo số request (batch) upstream
+#   chạy lúc khởi động và sau mỗi mốc cập nhật model (+ PREWARM_DELAY_SECONDS)
+# --------------------------------------
+PREWARM_ENABLED: bool = (os.getenv("PREWARM_ENABLED") or "true").lower() in ("1", "true", "yes")
+PREWARM_TOP_WARDS: int = int(os.getenv("PREWARM_TOP_WARDS") or 300)
+PREWARM_CONCURRENCY: int = int(os.getenv("PREWARM_CONCURRENCY") or 8)
+PREWARM_RATE_PER_SECOND: float = float(os.getenv("PREWARM_RATE_PER_SECOND") or 20)
+PREWARM_DELAY_SECONDS: int = int(os.getenv("PREWARM_DELAY_SECONDS") or 120)
+# Dựng sẵn bản tin vào cache cho các preset này (rỗng = chỉ nạp dự báo)
+PREWARM_RENDER_PROFILES: list = [p.strip() for p in (os.getenv("PREWARM_RENDER_PROFILES") or "full,lean").split(",") if p.strip()]
+
+# --------------------------------------
+# Bảng toàn quốc GET /v1/snapshot (mọi tỉnh/thành + phường/xã)
+#   dựng lúc khởi động và sau mỗi mốc cập nhật model (+ SNAPSHOT_DELAY_SECONDS, sau prewarm)
+#   SNAPSHOT_CONCURRENCY tính theo số địa danh chờ dự báo cùng lúc (gộp thành batch upstream)
+# --------------------------------------
+SNAPSHOT_ENABLED: bool = (os.getenv("SNAPSHOT_ENABLED") or "true").lower() in ("1", "true", "yes")
+SNAPSHOT_CONCURRENCY: int = int(os.getenv("SNAPSHOT_CONCURRENCY") or 200)
+SNAPSHOT_DELAY_SECONDS: int = int(os.getenv("SNAPSHOT_DELAY_SECONDS") or 300)
+
+# --------------------------------------
+# POST /v1/chat/batch: số địa danh tối đa mỗi request, số bản tin dựng song song
+# --------------------------------------
+CHAT_BATCH_MAX_REGIONS: int = int(os.getenv("CHAT_BATCH_MAX_REGIONS") or 100)
+CHAT_BATCH_CONCURRENCY: int = int(os.getenv("CHAT_BATCH_CONCURRENCY") or 16)
+
+# --------------------------------------
+# Nén response (br nếu cài brotli, không thì gzip)
+#   - COMPRESSION_MIN_BYTES: body nhỏ hơn ngưỡng này gửi nguyên
+# --------------------------------------
+COMPRESSION_ENABLED: bool = (os.getenv("COMPRESSION_ENABLED") or "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES") or 1024)
+COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL") or 6)
+COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY") or 4)
+
+# --------------------------------------
+# HTTP client dùng chung (connection pool)
+# --------------------------------------
+HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS") or 100)
+HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS") or 20)
+HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY") or 30)
+HTTP2_ENABLED: bool = (os.getenv("HTTP2_ENABLED") or "true").lower() in ("1", "true", "yes")
+
+
+# --------------------------------------
+# Chỉ mục không gian cho reverse geocode
+#   - SPATIAL_CELL_DEG: kích thước ô lưới (độ)
+#   - REVERSE_MAX_RADIUS_KM: bán kính tối đa để coi là cùng phường/xã
+#   - NEARBY_MAX_RADIUS_KM: trần tham số radius_km của /v1/nearby
+# --------------------------------------
+SPATIAL_CELL_DEG: float = float(os.getenv("SPATIAL_CELL_DEG") or 0.1)
+REVERSE_MAX_RADIUS_KM: float = float(os.getenv("REVERSE_MAX_RADIUS_KM") or 25)
+NEARBY_MAX_RADIUS_KM: float = float(os.getenv("NEARBY_MAX_RADIUS_KM") or 200)
+
+
+# --------------------------------------
+# Gazetteer nhị phân (build bởi build_gazetteer.py, memory-map khi chạy)
+#   - GAZETTEER_AUTOBUILD: tự build nếu file thiếu hoặc cũ hơn dữ liệu nguồn
+# --------------------------------------
+GAZETTEER_PATH: str = os.getenv(
+    "GAZETTEER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.bin")
+)
+GAZETTEER_AUTOBUILD: bool = (os.getenv("GAZETTEER_AUTOBUILD") or "true").lower() in ("1", "true", "yes")
+
+
+# --------------------------------------
+# Snap tọa độ cho key cache dự báo
+#   - FORECAST_SNAP_MODE: grid | geohash | none
+#   - FORECAST_GRID_RESOLUTION_DEG: cạnh ô lưới (độ), khi mode=grid (0.25° ~ lưới model toàn cầu)
+#   - FORECAST_GEOHASH_PRECISION: số ký tự geohash, khi mode=geohash
+# --------------------------------------
+FORECAST_SNAP_MODE: str = (os.getenv("FORECAST_SNAP_MODE") or "grid").lower()
+FORECAST_GRID_RESOLUTION_DEG: float = float(os.getenv("FORECAST_GRID_RESOLUTION_DEG") or 0.25)
+FORECAST_GEOHASH_PRECISION: int = int(os.getenv("FORECAST_GEOHASH_PRECISION") or 5)
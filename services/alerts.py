@@ -1,334 +1,390 @@
 # services/alerts.py
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
-def generate_temperature_alerts(
-    temp: float = None, feels: float = None,
-    tmin: float = None, tmax: float = None,
-    avg_temp: float = None, avg_temp_hour: float = None
-) -> List[str]:
-    alerts = []
-    if temp is not None:
-        # Nắng nóng
-        if temp >= 45:
-            alerts.append("⚠️ Nhiệt độ cực cao (≥45°C): nguy cơ sốc nhiệt nghiêm trọng, cần hạn chế ra ngoài.")
-        elif temp >= 40:
-            alerts.append("⚠️ Nắng nóng gay gắt (≥40°C), oi bức, dễ kiệt sức.")
-        elif temp >= 35:
-            alerts.append("⚠️ Thời tiết nóng (≥35°C), gây khó chịu, cần hạn chế ra ngoài.")
-
-        # Lạnh
-        if temp <= 7:
-            alerts.append("⚠️ Rét buốt cực đoan (≤7°C): nguy cơ hạ thân nhiệt, cực kỳ nguy hiểm.")
-        elif temp <= 10:
-            alerts.append("⚠️ Rét hại (≤10°C): rất nguy hiểm, cần giữ ấm nghiêm ngặt.")
-        elif temp <= 12:
-            alerts.append("⚠️ Rét đậm (≤12°C): nguy cơ hạ thân nhiệt, cần giữ ấm cơ thể.")
-        elif temp <= 15:
-            alerts.append("⚠️ Rét nhẹ (≤15°C): dễ ảnh hưởng sức khỏe người già và trẻ nhỏ.")
-        elif temp <= 18:
-            alerts.append("⚠️ Trời lạnh (≤18°C): nhiều người cảm thấy run, cần mặc ấm.")
+try:
+    import numpy as np
+except ImportError:  # không có numpy: chỉ dùng đường vô hướng
+    np = None
 
-    # Dao động nhiệt độ lớn trong ngày
-    if tmin is not None and tmax is not None and (tmax - tmin) >= 15:
-        alerts.append("⚠️ Dao động nhiệt độ lớn trong ngày, dễ gây mệt mỏi.")
+from services.matcher import KeywordMatcher
+from services.rules import Scale, Rule, RuleSet, Pass, abs_delta, first, member, ratio, spread, when
 
-    # Lệch nhiều so với trung bình ngày
-    if temp is not None and avg_temp is not None and abs(temp - avg_temp) >= 7:
-        alerts.append("⚠️ Nhiệt độ hiện tại lệch nhiều so với trung bình ngày, thời tiết biến động bất thường.")
+# -------------------------------
+# Bảng luật (xem services/rules.py): mỗi nhóm là một RuleSet,
+# câu cảnh báo xuất theo đúng thứ tự các Rule
+# -------------------------------
 
+# -------------------------------
+# 1. 🌡️ Cảnh báo Nhiệt độ
+# -------------------------------
+TEMPERATURE_ALERTS = RuleSet("temperature", [
+    # Nắng nóng
+    Rule("heat", ["temp"], Scale([
+        (">=", 45, "⚠️ Nhiệt độ cực cao (≥45°C): nguy cơ sốc nhiệt nghiêm trọng, cần hạn chế ra ngoài."),
+        (">=", 40, "⚠️ Nắng nóng gay gắt (≥40°C), oi bức, dễ kiệt sức."),
+        (">=", 35, "⚠️ Thời tiết nóng (≥35°C), gây khó chịu, cần hạn chế ra ngoài."),
+    ])),
+    # Lạnh
+    Rule("cold", ["temp"], Scale([
+        ("<=", 7, "⚠️ Rét buốt cực đoan (≤7°C): nguy cơ hạ thân nhiệt, cực kỳ nguy hiểm."),
+        ("<=", 10, "⚠️ Rét hại (≤10°C): rất nguy hiểm, cần giữ ấm nghiêm ngặt."),
+        ("<=", 12, "⚠️ Rét đậm (≤12°C): nguy cơ hạ thân nhiệt, cần giữ ấm cơ thể."),
+        ("<=", 15, "⚠️ Rét nhẹ (≤15°C): dễ ảnh hưởng sức khỏe người già và trẻ nhỏ."),
+        ("<=", 18, "⚠️ Trời lạnh (≤18°C): nhiều người cảm thấy run, cần mặc ấm."),
+    ])),
+    # Dao động nhiệt độ lớn trong ngày
+    Rule("range", ["tmin", "tmax"], Scale([
+        (">=", 15, "⚠️ Dao động nhiệt độ lớn trong ngày, dễ gây mệt mỏi."),
+    ]), derive=spread),
+    # Lệch nhiều so với trung bình ngày
+    Rule("vs_day", ["temp", "avg_temp"], Scale([
+        (">=", 7, "⚠️ Nhiệt độ hiện tại lệch nhiều so với trung bình ngày, thời tiết biến động bất thường."),
+    ]), derive=abs_delta),
     # Cảm giác thực tế khác biệt
-    if temp is not None and feels is not None and abs(feels - temp) >= 5:
-        alerts.append("⚠️ Cảm giác thực tế khác biệt lớn so với nhiệt độ, dễ gây khó chịu.")
-
+    Rule("feels", ["temp", "feels"], Scale([
+        (">=", 5, "⚠️ Cảm giác thực tế khác biệt lớn so với nhiệt độ, dễ gây khó chịu."),
+    ]), derive=abs_delta),
     # Lệch nhiều so với trung bình giờ
-    if temp is not None and avg_temp_hour is not None and avg_temp_hour > 0:
-        ratio_temp_hour = temp / avg_temp_hour
-        if ratio_temp_hour >= 1.3:
-            alerts.append("⚠️ Nhiệt độ hiện tại cao hơn nhiều so với trung bình giờ, thời tiết biến động bất thường.")
-        elif ratio_temp_hour <= 0.7:
-            alerts.append("⚠️ Nhiệt độ hiện tại thấp hơn nhiều so với trung bình giờ, nguy cơ lạnh đột ngột.")
+    Rule("vs_hour", ["temp", "avg_temp_hour"], Scale([
+        (">=", 1.3, "⚠️ Nhiệt độ hiện tại cao hơn nhiều so với trung bình giờ, thời tiết biến động bất thường."),
+        ("<=", 0.7, "⚠️ Nhiệt độ hiện tại thấp hơn nhiều so với trung bình giờ, nguy cơ lạnh đột ngột."),
+    ]), derive=ratio),
+])
 
-    return alerts
+def generate_temperature_alerts(
+    temp: float = None, feels: float = None,
+    tmin: float = None, tmax: float = None,
+    avg_temp: float = None, avg_temp_hour: float = None
+) -> List[str]:
+    return TEMPERATURE_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 2. 🌧️ Cảnh báo Mưa
 # -------------------------------
+_SLOPE_TERRAIN = ("mountain", "slope")
+
+RAIN_ALERTS = RuleSet("rain", [
+    Rule("rain", ["rain"], Scale([(">=", 20, "⚠️ Mưa lớn, nguy cơ ngập úng và lũ quét.")])),
+    Rule("rain_prob", ["rain_prob"], Scale([(">=", 70, "⚠️ Xác suất mưa cao, nên chuẩn bị áo mưa/ô.")])),
+    Rule("vs_hour", ["rain", "avg_rain_hour"], Scale([
+        (">=", 3, "⚠️ Lượng mưa hiện tại gấp nhiều lần trung bình giờ, mưa dồn dập bất thường."),
+        ("<=", 0.3, "⚠️ Lượng mưa hiện tại thấp hơn nhiều so với trung bình giờ, mưa phân bố không đều."),
+    ]), derive=ratio),
+    Rule("avg_rain", ["avg_rain"], Scale([(">=", 30, "⚠️ Lượng mưa trung bình trong ngày cao, nguy cơ ngập úng kéo dài.")])),
+    Rule("total_day", ["rain_total_day"], Scale([(">=", 50, "⚠️ Tổng lượng mưa trong ngày rất cao, nguy cơ ngập úng và lũ diện rộng.")])),
+    # Mưa lớn (≥50) khi gió giật ≥20
+    Rule("storm", ["rain", "gust"], Scale([
+        (">=", 50, "⚠️ Mưa lớn kèm gió mạnh: nguy cơ bão, cần cảnh giác cao."),
+    ]), derive=when(lambda rain, gust: gust >= 20, first)),
+    # Mưa dồn dập theo giờ trên địa hình dốc/núi
+    Rule("flash_flood", ["terrain", "rain", "avg_rain_hour"], Scale([
+        (">=", 3, "⚠️ Mưa dồn dập theo giờ tại khu vực địa hình dốc/núi: nguy cơ lũ quét và sạt lở đất rất cao."),
+    ]), derive=when(lambda terrain, rain, base: member(terrain, _SLOPE_TERRAIN), lambda terrain, rain, base: ratio(rain, base))),
+])
+
 def generate_rain_alerts(
     rain: float = None, rain_prob: float = None,
     avg_rain: float = None, avg_rain_hour: float = None,
     rain_total_day: float = None, gust: float = None,
     terrain: str = None
 ) -> List[str]:
-    alerts = []
-    if rain is not None and rain >= 20:
-        alerts.append("⚠️ Mưa lớn, nguy cơ ngập úng và lũ quét.")
-    if rain_prob is not None and rain_prob >= 70:
-        alerts.append("⚠️ Xác suất mưa cao, nên chuẩn bị áo mưa/ô.")
-    if rain is not None and avg_rain_hour and avg_rain_hour > 0:
-        ratio_hour = rain / avg_rain_hour
-        if ratio_hour >= 3:
-            alerts.append("⚠️ Lượng mưa hiện tại gấp nhiều lần trung bình giờ, mưa dồn dập bất thường.")
-        elif ratio_hour <= 0.3:
-            alerts.append("⚠️ Lượng mưa hiện tại thấp hơn nhiều so với trung bình giờ, mưa phân bố không đều.")
-    if avg_rain is not None and avg_rain >= 30:
-        alerts.append("⚠️ Lượng mưa trung bình trong ngày cao, nguy cơ ngập úng kéo dài.")
-    if rain_total_day is not None and rain_total_day >= 50:
-        alerts.append("⚠️ Tổng lượng mưa trong ngày rất cao, nguy cơ ngập úng và lũ diện rộng.")
-    if rain is not None and rain >= 50 and gust is not None and gust >= 20:
-        alerts.append("⚠️ Mưa lớn kèm gió mạnh: nguy cơ bão, cần cảnh giác cao.")
-    if terrain in ["mountain", "slope"] and rain is not None and avg_rain_hour and avg_rain_hour > 0:
-        if rain / avg_rain_hour >= 3:
-            alerts.append("⚠️ Mưa dồn dập theo giờ tại khu vực địa hình dốc/núi: nguy cơ lũ quét và sạt lở đất rất cao.")
-    return alerts
+    return RAIN_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 3. 💨 Cảnh báo Gió (tốc độ + hướng)
 # -------------------------------
+WIND_ALERTS = RuleSet("wind", [
+    # Tốc độ gió hiện tại
+    Rule("wspd", ["wspd"], Scale([
+        (">=", 41.5, "⚠️ Gió cấp 14 (≥41.5 m/s): bão rất mạnh, cực kỳ nguy hiểm."),
+        (">=", 32.7, "⚠️ Gió cấp 12 (≥32.7 m/s): bão mạnh, cần trú ẩn an toàn."),
+        (">=", 24.5, "⚠️ Gió cấp 10 (≥24.5 m/s): có dấu hiệu bão, cần phòng tránh."),
+        (">=", 17.2, "⚠️ Gió cấp 8 (≥17.2 m/s): gió rất mạnh, nguy hiểm cho tàu thuyền và công trình ven biển."),
+        (">=", 10.8, "⚠️ Gió cấp 6 (≥10.8 m/s): gió mạnh, nguy hiểm cho tàu thuyền nhỏ."),
+    ])),
+    # Gió giật
+    Rule("gust", ["gust"], Scale([
+        (">=", 20, lambda v: f"⚠️ Gió giật mạnh {v:.1f} m/s ≈ {v*3.6:.1f} km/h, cần hạn chế ra ngoài."),
+    ])),
+    # Gió trung bình ngày
+    Rule("avg_wspd", ["avg_wspd"], Scale([
+        (">=", 30, "⚠️ Gió trung bình mạnh trong ngày (≥30 m/s): nguy hiểm cho tàu thuyền và hoạt động ngoài trời."),
+        (">=", 24.5, "⚠️ Gió trung bình cao trong ngày (≥24.5 m/s): có dấu hiệu bão, cần cảnh giác."),
+    ])),
+    # Hướng gió (8 hướng chính)
+    Rule("dir", ["dir"], Scale([
+        ("<", 0, None),
+        (">=", 315, "ℹ️ Gió Bắc: thường mang không khí lạnh, dễ gây rét."),
+        (">=", 270, "ℹ️ Gió Tây: khô nóng, dễ gây oi bức."),
+        (">=", 225, "ℹ️ Gió Tây Nam: thường kèm mưa lớn, nguy cơ bão nhiệt đới."),
+        (">=", 180, "ℹ️ Gió Nam: thường mang không khí nóng ẩm."),
+        (">=", 135, "ℹ️ Gió Đông Nam: mang theo hơi ẩm, dễ gây oi bức."),
+        (">=", 90, "ℹ️ Gió Đông: mang hơi ẩm từ biển, dễ gây oi bức."),
+        (">=", 45, "ℹ️ Gió Đông Bắc: thường kèm thời tiết lạnh và khô."),
+        (">=", 0, "ℹ️ Gió Bắc: thường mang không khí lạnh, dễ gây rét."),
+    ])),
+])
+
 def generate_wind_alerts(
     wspd: float = None, gust: float = None, avg_wspd: float = None, dir: float = None
 ) -> List[str]:
-    alerts = []
-
-    # --- Tốc độ gió hiện tại ---
-    if wspd is not None:
-        if wspd >= 41.5:
-            alerts.append("⚠️ Gió cấp 14 (≥41.5 m/s): bão rất mạnh, cực kỳ nguy hiểm.")
-        elif wspd >= 32.7:
-            alerts.append("⚠️ Gió cấp 12 (≥32.7 m/s): bão mạnh, cần trú ẩn an toàn.")
-        elif wspd >= 24.5:
-            alerts.append("⚠️ Gió cấp 10 (≥24.5 m/s): có dấu hiệu bão, cần phòng tránh.")
-        elif wspd >= 17.2:
-            alerts.append("⚠️ Gió cấp 8 (≥17.2 m/s): gió rất mạnh, nguy hiểm cho tàu thuyền và công trình ven biển.")
-        elif wspd >= 10.8:
-            alerts.append("⚠️ Gió cấp 6 (≥10.8 m/s): gió mạnh, nguy hiểm cho tàu thuyền nhỏ.")
-
-    # --- Gió giật ---
-    if gust is not None and gust >= 20:
-        alerts.append(f"⚠️ Gió giật mạnh {gust:.1f} m/s ≈ {gust*3.6:.1f} km/h, cần hạn chế ra ngoài.")
-
-    # --- Gió trung bình ngày ---
-    if avg_wspd is not None:
-        if avg_wspd >= 30:
-            alerts.append("⚠️ Gió trung bình mạnh trong ngày (≥30 m/s): nguy hiểm cho tàu thuyền và hoạt động ngoài trời.")
-        elif avg_wspd >= 24.5:
-            alerts.append("⚠️ Gió trung bình cao trong ngày (≥24.5 m/s): có dấu hiệu bão, cần cảnh giác.")
-
-    # --- Hướng gió (8 hướng chính) ---
-    if dir is not None:
-        if 0 <= dir < 45 or dir >= 315:
-            alerts.append("ℹ️ Gió Bắc: thường mang không khí lạnh, dễ gây rét.")
-        elif 45 <= dir < 90:
-            alerts.append("ℹ️ Gió Đông Bắc: thường kèm thời tiết lạnh và khô.")
-        elif 90 <= dir < 135:
-            alerts.append("ℹ️ Gió Đông: mang hơi ẩm từ biển, dễ gây oi bức.")
-        elif 135 <= dir < 180:
-            alerts.append("ℹ️ Gió Đông Nam: mang theo hơi ẩm, dễ gây oi bức.")
-        elif 180 <= dir < 225:
-            alerts.append("ℹ️ Gió Nam: thường mang không khí nóng ẩm.")
-        elif 225 <= dir < 270:
-            alerts.append("ℹ️ Gió Tây Nam: thường kèm mưa lớn, nguy cơ bão nhiệt đới.")
-        elif 270 <= dir < 315:
-            alerts.append("ℹ️ Gió Tây: khô nóng, dễ gây oi bức.")
-
-    return alerts
+    return WIND_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 4. ☁️ Cảnh báo Mây
 # -------------------------------
+CLOUD_ALERTS = RuleSet("cloud", [
+    Rule("cloud", ["cloud"], Scale([
+        (">=", 90, "⚠️ Trời u ám, mây dày đặc (≥90%), ánh sáng hạn chế, ảnh hưởng hoạt động ngoài trời."),
+        ("<=", 10, "ℹ️ Trời quang đãng, hầu như không có mây, cần lưu ý nắng gắt."),
+    ])),
+    Rule("avg_cloud", ["avg_cloud"], Scale([(">=", 85, "⚠️ Độ che phủ mây trung bình ngày rất cao, trời u ám kéo dài.")])),
+])
+
 def generate_cloud_alerts(cloud: float = None, avg_cloud: float = None) -> List[str]:
-    alerts = []
-    if cloud is not None:
-        if cloud >= 90:
-            alerts.append("⚠️ Trời u ám, mây dày đặc (≥90%), ánh sáng hạn chế, ảnh hưởng hoạt động ngoài trời.")
-        elif cloud <= 10:
-            alerts.append("ℹ️ Trời quang đãng, hầu như không có mây, cần lưu ý nắng gắt.")
-    if avg_cloud is not None and avg_cloud >= 85:
-        alerts.append("⚠️ Độ che phủ mây trung bình ngày rất cao, trời u ám kéo dài.")
-    return alerts
+    return CLOUD_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 5. 🌫️ Cảnh báo Điểm sương
 # -------------------------------
+DEWPOINT_ALERTS = RuleSet("dewpoint", [
+    Rule("dew", ["dew"], Scale([
+        (">=", 24, "⚠️ Điểm sương rất cao (≥24°C): không khí ngột ngạt, nguy cơ oi bức và sốc nhiệt."),
+        ("<=", 5, "⚠️ Điểm sương rất thấp (≤5°C): không khí khô hanh, dễ gây bệnh hô hấp."),
+    ])),
+    Rule("avg_dew", ["avg_dew"], Scale([(">=", 22, "⚠️ Điểm sương trung bình ngày cao (≥22°C): không khí ẩm ướt, dễ oi bức.")])),
+])
+
 def generate_dewpoint_alerts(dew: float = None, avg_dew: float = None) -> List[str]:
-    alerts = []
-    if dew is not None:
-        if dew >= 24:
-            alerts.append("⚠️ Điểm sương rất cao (≥24°C): không khí ngột ngạt, nguy cơ oi bức và sốc nhiệt.")
-        elif dew <= 5:
-            alerts.append("⚠️ Điểm sương rất thấp (≤5°C): không khí khô hanh, dễ gây bệnh hô hấp.")
-    if avg_dew is not None and avg_dew >= 22:
-        alerts.append("⚠️ Điểm sương trung bình ngày cao (≥22°C): không khí ẩm ướt, dễ oi bức.")
-    return alerts
+    return DEWPOINT_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 6. 👀 Cảnh báo Tầm nhìn
 # -------------------------------
+VISIBILITY_ALERTS = RuleSet("visibility", [
+    Rule("vis", ["vis"], Scale([
+        ("<", 1, "⚠️ Tầm nhìn rất hạn chế (<1 km), nguy hiểm khi di chuyển."),
+        ("<", 5, "⚠️ Tầm nhìn kém (<5 km), cần thận trọng khi lái xe."),
+    ])),
+])
+
 def generate_visibility_alerts(vis: float = None) -> List[str]:
-    alerts = []
-    if vis is not None:
-        if vis < 1:
-            alerts.append("⚠️ Tầm nhìn rất hạn chế (<1 km), nguy hiểm khi di chuyển.")
-        elif vis < 5:
-            alerts.append("⚠️ Tầm nhìn kém (<5 km), cần thận trọng khi lái xe.")
-    return alerts
+    return VISIBILITY_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 7. 💧 Cảnh báo Độ ẩm
 # -------------------------------
+HUMIDITY_ALERTS = RuleSet("humidity", [
+    Rule("rh", ["rh"], Scale([
+        (">=", 90, "⚠️ Độ ẩm hiện tại rất cao (≥90%), không khí ngột ngạt, dễ gây oi bức."),
+        ("<=", 30, "⚠️ Độ ẩm hiện tại rất thấp (≤30%), không khí khô hanh, dễ gây bệnh hô hấp."),
+    ])),
+    Rule("avg_rh", ["avg_rh"], Scale([
+        (">=", 85, "⚠️ Độ ẩm trung bình ngày cao (≥85%), không khí ẩm ướt kéo dài."),
+        ("<=", 35, "⚠️ Độ ẩm trung bình ngày thấp (≤35%), không khí khô hanh kéo dài."),
+    ])),
+])
+
 def generate_humidity_alerts(rh: float = None, avg_rh: float = None) -> List[str]:
-    alerts = []
-    if rh is not None:
-        if rh >= 90:
-            alerts.append("⚠️ Độ ẩm hiện tại rất cao (≥90%), không khí ngột ngạt, dễ gây oi bức.")
-        elif rh <= 30:
-            alerts.append("⚠️ Độ ẩm hiện tại rất thấp (≤30%), không khí khô hanh, dễ gây bệnh hô hấp.")
-    if avg_rh is not None:
-        if avg_rh >= 85:
-            alerts.append("⚠️ Độ ẩm trung bình ngày cao (≥85%), không khí ẩm ướt kéo dài.")
-        elif avg_rh <= 35:
-            alerts.append("⚠️ Độ ẩm trung bình ngày thấp (≤35%), không khí khô hanh kéo dài.")
-    return alerts
+    return HUMIDITY_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 8. ⚖️ Cảnh báo Áp suất
 # -------------------------------
+PRESSURE_ALERTS = RuleSet("pressure", [
+    Rule("pmsl", ["pmsl"], Scale([
+        ("<", 1000, "⚠️ Áp suất thấp (<1000 hPa), có thể ảnh hưởng sức khỏe người già và trẻ nhỏ."),
+        (">", 1025, "⚠️ Áp suất cao bất thường (>1025 hPa), có thể gây khó chịu, đau đầu hoặc ảnh hưởng tuần hoàn."),
+    ])),
+    Rule("avg_pmsl", ["avg_pmsl"], Scale([
+        ("<", 1000, "⚠️ Áp suất trung bình ngày thấp (<1000 hPa), có thể ảnh hưởng sức khỏe."),
+        (">", 1025, "⚠️ Áp suất trung bình ngày cao (>1025 hPa), có thể ảnh hưởng sức khỏe tim mạch."),
+    ])),
+])
+
 def generate_pressure_alerts(pmsl: float = None, avg_pmsl: float = None) -> List[str]:
-    alerts = []
-    if pmsl is not None:
-        if pmsl < 1000:
-            alerts.append("⚠️ Áp suất thấp (<1000 hPa), có thể ảnh hưởng sức khỏe người già và trẻ nhỏ.")
-        elif pmsl > 1025:
-            alerts.append("⚠️ Áp suất cao bất thường (>1025 hPa), có thể gây khó chịu, đau đầu hoặc ảnh hưởng tuần hoàn.")
-    if avg_pmsl is not None:
-        if avg_pmsl < 1000:
-            alerts.append("⚠️ Áp suất trung bình ngày thấp (<1000 hPa), có thể ảnh hưởng sức khỏe.")
-        elif avg_pmsl > 1025:
-            alerts.append("⚠️ Áp suất trung bình ngày cao (>1025 hPa), có thể ảnh hưởng sức khỏe tim mạch.")
-    return alerts
+    return PRESSURE_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 9. 🔆 Cảnh báo Bức xạ mặt trời (luôn có thông tin)
 # -------------------------------
+SOLAR_ALERTS = RuleSet("solar", [
+    Rule("solar", ["solar"], Scale([
+        (">=", 800, "⚠️ Bức xạ mặt trời cao (≥800 W/m²), nguy cơ cháy nắng và ảnh hưởng sức khỏe."),
+    ], default="🙂 Bức xạ mặt trời hiện tại thấp, an toàn khi ra ngoài.")),
+    Rule("avg_solar", ["avg_solar"], Scale([
+        (">=", 600, "⚠️ Bức xạ mặt trời trung bình ngày cao (≥600 W/m²), cần hạn chế phơi nắng lâu."),
+    ], default="🙂 Bức xạ mặt trời trung bình ngày thấp, không gây nguy hại.")),
+])
+
 def generate_solar_alerts(solar: float = None, avg_solar: float = None) -> List[str]:
-    alerts = []
-    if solar is not None:
-        if solar >= 800:
-            alerts.append("⚠️ Bức xạ mặt trời cao (≥800 W/m²), nguy cơ cháy nắng và ảnh hưởng sức khỏe.")
-        else:
-            alerts.append("🙂 Bức xạ mặt trời hiện tại thấp, an toàn khi ra ngoài.")
-    if avg_solar is not None:
-        if avg_solar >= 600:
-            alerts.append("⚠️ Bức xạ mặt trời trung bình ngày cao (≥600 W/m²), cần hạn chế phơi nắng lâu.")
-        else:
-            alerts.append("🙂 Bức xạ mặt trời trung bình ngày thấp, không gây nguy hại.")
-    return alerts
+    return SOLAR_ALERTS.evaluate(locals())
 
 # -------------------------------
 # 10. ☀️ Cảnh báo UV (luôn có thông tin)
 # -------------------------------
-def generate_uv_alerts(uv: float = None, avg_uv: float = None, uv_max_day: float = None) -> List[str]:
-    alerts = []
+UV_ALERTS = RuleSet("uv", [
     # UV hiện tại
-    if uv is not None:
-        if uv >= 7:
-            alerts.append("⚠️ Chỉ số UV rất cao (≥7), cần bảo vệ da khi ra nắng.")
-        else:
-            alerts.append("🙂 Chỉ số UV hiện tại thấp, an toàn khi ra ngoài.")
+    Rule("uv", ["uv"], Scale([
+        (">=", 7, "⚠️ Chỉ số UV rất cao (≥7), cần bảo vệ da khi ra nắng."),
+    ], default="🙂 Chỉ số UV hiện tại thấp, an toàn khi ra ngoài.")),
     # UV trung bình ngày
-    if avg_uv is not None:
-        if avg_uv >= 5:
-            alerts.append("⚠️ UV trung bình cao trong ngày (≥5), cần bảo vệ da khi hoạt động ngoài trời.")
-        else:
-            alerts.append("🙂 UV trung bình ngày thấp, không gây nguy hại.")
+    Rule("avg_uv", ["avg_uv"], Scale([
+        (">=", 5, "⚠️ UV trung bình cao trong ngày (≥5), cần bảo vệ da khi hoạt động ngoài trời."),
+    ], default="🙂 UV trung bình ngày thấp, không gây nguy hại.")),
     # UV tối đa ngày
-    if uv_max_day is not None:
-        if uv_max_day >= 11:
-            alerts.append("⚠️ UV tối đa trong ngày ở mức cực đoan (≥11), tránh nắng hoàn toàn.")
-        elif uv_max_day >= 8:
-            alerts.append("⚠️ UV tối đa trong ngày rất cao (≥8), hạn chế ra ngoài, che chắn da.")
-        elif uv_max_day >= 6:
-            alerts.append("ℹ️ UV tối đa trong ngày cao (≥6), nên dùng kem chống nắng.")
-        else:
-            alerts.append("🙂 UV tối đa trong ngày thấp, khá an toàn.")
-    return alerts
+    Rule("uv_max_day", ["uv_max_day"], Scale([
+        (">=", 11, "⚠️ UV tối đa trong ngày ở mức cực đoan (≥11), tránh nắng hoàn toàn."),
+        (">=", 8, "⚠️ UV tối đa trong ngày rất cao (≥8), hạn chế ra ngoài, che chắn da."),
+        (">=", 6, "ℹ️ UV tối đa trong ngày cao (≥6), nên dùng kem chống nắng."),
+    ], default="🙂 UV tối đa trong ngày thấp, khá an toàn.")),
+])
+
+def generate_uv_alerts(uv: float = None, avg_uv: float = None, uv_max_day: float = None) -> List[str]:
+    return UV_ALERTS.evaluate(locals())
 
 # -------------------------------
-# Hàm tổng hợp: gọi cả 10 nhóm
+# Hàm tổng hợp: cả 10 nhóm trong một lượt theo bảng (tham số <- key unified)
 # -------------------------------
-def generate_all_alerts(unified: Dict[str, Any]) -> List[str]:
-    alerts = []
-
+ALL_ALERTS = Pass([
     # --- 🌡️ Cảnh báo nhiệt độ ---
-    alerts.extend(generate_temperature_alerts(
-        temp=unified.get("temperature"),
-        feels=unified.get("apparent_temperature"),
-        tmin=unified.get("temperature_2m_min_day"),
-        tmax=unified.get("temperature_2m_max_day"),
-        avg_temp=unified.get("avg_temperature_day"),
-        avg_temp_hour=unified.get("avg_temperature_hourly")
-    ))
-
+    (TEMPERATURE_ALERTS, {
+        "temp": "temperature",
+        "feels": "apparent_temperature",
+        "tmin": "temperature_2m_min_day",
+        "tmax": "temperature_2m_max_day",
+        "avg_temp": "avg_temperature_day",
+        "avg_temp_hour": "avg_temperature_hourly",
+    }),
     # --- 🌧️ Cảnh báo mưa ---
-    alerts.extend(generate_rain_alerts(
-        rain=unified.get("precipitation_now"),
-        rain_prob=unified.get("precipitation_probability_now"),
-        avg_rain=unified.get("avg_precipitation_day"),
-        avg_rain_hour=unified.get("avg_precipitation_hourly"),
-        rain_total_day=unified.get("precipitation_sum_day"),
-        gust=unified.get("gust"),
-        terrain=unified.get("terrain")
-    ))
-
+    (RAIN_ALERTS, {
+        "rain": "precipitation_now",
+        "rain_prob": "precipitation_probability_now",
+        "avg_rain": "avg_precipitation_day",
+        "avg_rain_hour": "avg_precipitation_hourly",
+        "rain_total_day": "precipitation_sum_day",
+        "gust": "gust",
+        "terrain": "terrain",
+    }),
     # --- 💨 Cảnh báo gió ---
-    alerts.extend(generate_wind_alerts(
-        wspd=unified.get("wind_speed_now"),
-        gust=unified.get("gust"),
-        avg_wspd=unified.get("avg_wind_speed_day")
-    ))
-
+    (WIND_ALERTS, {"wspd": "wind_speed_now", "gust": "gust", "avg_wspd": "avg_wind_speed_day"}),
     # --- ☁️ Cảnh báo mây ---
-    alerts.extend(generate_cloud_alerts(
-        cloud=unified.get("cloudcover_now"),
-        avg_cloud=unified.get("cloudcover_mean")
-    ))
-
+    (CLOUD_ALERTS, {"cloud": "cloudcover_now", "avg_cloud": "cloudcover_mean"}),
     # --- 🌫️ Cảnh báo điểm sương ---
-    alerts.extend(generate_dewpoint_alerts(
-        dew=unified.get("dewpoint_now"),
-        avg_dew=unified.get("dewpoint_mean")
-    ))
-
+    (DEWPOINT_ALERTS, {"dew": "dewpoint_now", "avg_dew": "dewpoint_mean"}),
     # --- 👀 Cảnh báo tầm nhìn ---
-    alerts.extend(generate_visibility_alerts(
-        vis=unified.get("visibility_now")
-    ))
-
+    (VISIBILITY_ALERTS, {"vis": "visibility_now"}),
     # --- 💧 Cảnh báo độ ẩm ---
-    alerts.extend(generate_humidity_alerts(
-        rh=unified.get("humidity_now"),
-        avg_rh=unified.get("avg_humidity")
-    ))
-
+    (HUMIDITY_ALERTS, {"rh": "humidity_now", "avg_rh": "avg_humidity"}),
     # --- ⚖️ Cảnh báo áp suất ---
-    alerts.extend(generate_pressure_alerts(
-        pmsl=unified.get("pressure_now"),
-        avg_pmsl=unified.get("avg_pressure")
-    ))
-
+    (PRESSURE_ALERTS, {"pmsl": "pressure_now", "avg_pmsl": "avg_pressure"}),
     # --- 🔆 Cảnh báo bức xạ mặt trời ---
-    alerts.extend(generate_solar_alerts(
-        solar=unified.get("solar_now"),
-        avg_solar=unified.get("avg_solar")
-    ))
-
+    (SOLAR_ALERTS, {"solar": "solar_now", "avg_solar": "avg_solar"}),
     # --- ☀️ Cảnh báo UV ---
-    alerts.extend(generate_uv_alerts(
-        uv=unified.get("uv_now"),
-        avg_uv=unified.get("avg_uv"),
-        uv_max_day=unified.get("uv_max_day")
-    ))
+    (UV_ALERTS, {"uv": "uv_now", "avg_uv": "avg_uv", "uv_max_day": "uv_max_day"}),
+])
 
-    return alerts
+def generate_all_alerts(unified: Dict[str, Any]) -> List[str]:
+    return ALL_ALERTS.evaluate(unified)
+
+def generate_all_alerts_many(columns: Dict[str, Any]) -> List[List[str]]:
+    """generate_all_alerts cho nhiều địa điểm: columns = key unified -> mảng (None/NaN = thiếu)."""
+    return ALL_ALERTS.evaluate_many(columns)
+
+# -------------------------------
+# Cảnh báo dạng bản ghi: mã, nhóm, mức độ, tham số, câu
+#   nhóm (categorized_alerts) và mức độ tính một lần cho mỗi nhãn lúc import,
+#   theo từ khóa trong câu -> khi chạy không phải quét chuỗi
+# -------------------------------
+ALERT_GROUP_KEYWORDS: Dict[str, List[str]] = {
+    "temp": ["nhiệt độ", "sốc nhiệt", "hạ thân nhiệt", "nắng nóng", "nóng", "lạnh", "rét"],
+    "rain": ["mưa", "lũ", "ngập", "mưa rào", "mưa to", "mưa đá", "dông", "giông"],
+    "wind": ["gió", "bão", "giật", "gió mạnh", "gió giật", "cấp gió"],
+    "humidity": ["độ ẩm", "nồm", "ẩm mốc", "khô hạn", "ẩm ướt"],
+    "pressure": ["áp suất", "áp thấp", "cao áp", "baro", "barometric"],
+    "uv": ["uv", "cháy nắng", "tia uv", "tia cực tím"],
+    "solar": ["bức xạ", "solar", "w/m²", "radiation"],
+}
+
+# Từ khóa -> (điểm, nhãn); từ khóa đầu tiên khớp quyết định
+SEVERITY_KEYWORDS: List[Tuple[str, Tuple[int, str]]] = [
+    ("lũ quét", (3, "🔴 Rất nguy hiểm")),
+    ("sạt lở", (3, "🔴 Rất nguy hiểm")),
+    ("bão", (3, "🔴 Rất nguy hiểm")),
+    ("sốc nhiệt", (2, "🟠 Nguy hiểm vừa")),
+    ("cháy nắng", (2, "🟠 Nguy hiểm vừa")),
+    ("hạ thân nhiệt", (2, "🟠 Nguy hiểm vừa")),
+    ("sương mù", (1, "🟢 Nhẹ")),
+]
+SEVERITY_NONE: Tuple[int, str] = (0, "⚪ An toàn")
+
+# Một automaton cho cả hai bảng: bit 0..6 = nhóm, các bit sau = từ khóa mức độ (theo thứ tự ưu tiên)
+_GROUPS = list(ALERT_GROUP_KEYWORDS)
+_ALERT_MATCHER = KeywordMatcher(
+    [(keys, group) for group, keys in ALERT_GROUP_KEYWORDS.items()]
+    + [([kw], sev) for kw, sev in SEVERITY_KEYWORDS]
+)
+
+def classify_alert(text: str) -> Tuple[Tuple[str, ...], Tuple[int, str]]:
+    """(các nhóm, (điểm, nhãn mức độ)) của một câu cảnh báo, một lượt quét."""
+    m = _ALERT_MATCHER.mask(text)
+    groups = tuple(g for i, g in enumerate(_GROUPS) if m >> i & 1)
+    sev = m >> len(_GROUPS)
+    return groups, (SEVERITY_KEYWORDS[(sev & -sev).bit_length() - 1][1] if sev else SEVERITY_NONE)
+
+def _label_meta(pass_: Pass) -> Dict[Tuple[str, str, int], Tuple[Tuple[str, ...], Tuple[int, str]]]:
+    # Nhãn động (mẫu/hàm) chỉ khác nhau phần số -> phân loại trên một bản dựng mẫu
+    meta = {}
+    for rs, _ in pass_.steps:
+        for rule in rs.rules:
+            for code, label in enumerate(rule.scale.labels):
+                meta[rs.name, rule.name, code] = classify_alert(label.render(0.0))
+    return meta
+
+_ALERT_META = _label_meta(ALL_ALERTS)
+
+def _severity_scores(pass_: Pass) -> Dict[Tuple[str, str], List[int]]:
+    # Điểm mức độ theo mã nhãn của từng luật; ô cuối = 0 để mã -1 (không khớp) tra ra 0
+    return {
+        (rs.name, rule.name): [_ALERT_META[rs.name, rule.name, code][1][0] for code in range(len(rule.scale.labels))] + [0]
+        for rs, _ in pass_.steps for rule in rs.rules
+    }
+
+_SEVERITY_SCORES = _severity_scores(ALL_ALERTS)
+
+def alert_severity_many(columns: Dict[str, Any]) -> "np.ndarray":
+    """
+    Điểm mức độ cao nhất (0..3) của các cảnh báo ở mỗi địa điểm, không dựng câu;
+    columns như generate_all_alerts_many. Bằng max(severity) của generate_alert_records.
+    """
+    best = None
+    for rs, codes, _ in ALL_ALERTS.code_matrices(columns):
+        for rule, row in zip(rs.rules, codes):
+            scores = np.asarray(_SEVERITY_SCORES[rs.name, rule.name], dtype=np.int8)[row]
+            best = scores if best is None else np.maximum(best, scores)
+    return best
+
+def generate_alert_records(unified: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Như generate_all_alerts (cùng câu, cùng thứ tự) nhưng mỗi cảnh báo là một bản ghi:
+      code      "<nhóm luật>.<luật>" (vd. "rain.storm"), level = mã nhãn trong thang (0 = nhánh đầu)
+      category  nhóm luật; groups = các nhóm của categorized_alerts
+      severity  điểm 0..3, severity_label; params = tham số đầu vào của luật; text = câu cảnh báo
+    """
+    records: List[Dict[str, Any]] = []
+    for rs, rule, code, value, values in ALL_ALERTS.matches(unified):
+        groups, (score, label) = _ALERT_META[rs.name, rule.name, code]
+        records.append({
+            "code": f"{rs.name}.{rule.name}",
+            "level": code,
+            "category": rs.name,
+            "groups": list(groups),
+            "severity": score,
+            "severity_label": label,
+            "params": {k: values.get(k) for k in rule.inputs},
+            "text": rule.scale.labels[code].render(value),
+        })
+    return records
 
 # -------------------------------
 # Cảnh báo riêng cho khối hiện tại
@@ -0,0 +1,102 @@
+# services/batcher.py
+import asyncio
+import logging
+from typing import Dict, Any, Awaitable, Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from configs import APP_NAME
+
+log = logging.getLogger(APP_NAME)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# --------------------------------------
+# Micro-batching: gom các yêu cầu đến trong một khoảng ngắn
+#   - yêu cầu đầu tiên mở cửa sổ `window` giây
+#   - đủ `max_items` phần tử thì gửi ngay, không chờ hết cửa sổ
+#   - handler nhận danh sách key (đã bỏ trùng), trả về kết quả đúng thứ tự
+# --------------------------------------
+class MicroBatcher(Generic[K, V]):
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[K]], Awaitable[List[V]]],
+        window: float,
+        max_items: int,
+    ):
+        self.name = name
+        self.handler = handler
+        self.window = window
+        self.max_items = max(1, max_items)
+        self._pending: Dict[K, List["asyncio.Future[V]"]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: "set[asyncio.Task[None]]" = set()
+        self._stats: Dict[str, int] = {
+            "submitted": 0,
+            "batches": 0,
+            "items": 0,
+            "errors": 0,
+            "max_batch": 0,
+        }
+
+    async def submit(self, key: K) -> V:
+        loop = asyncio.get_running_loop()
+        fut: "asyncio.Future[V]" = loop.create_future()
+        self._stats["submitted"] += 1
+        self._pending.setdefault(key, []).append(fut)
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[K, List["asyncio.Future[V]"]]) -> None:
+        keys = list(batch)
+        self._stats["batches"] += 1
+        self._stats["items"] += len(keys)
+        self._stats["max_batch"] = max(self._stats["max_batch"], len(keys))
+        try:
+            results = await self.handler(keys)
+            if len(results) != len(keys):
+                raise ValueError(f"{self.name}: nhận {len(results)} kết quả cho {len(keys)} yêu cầu")
+        except Exception as e:
+            self._stats["errors"] += 1
+            log.warning(f"Batch {self.name} ({len(keys)} phần tử) lỗi: {e}")
+            for futs in batch.values():
+                for f in futs:
+                    if not f.done():
+                        f.set_exception(e)
+            return
+        for key, res in zip(keys, results):
+            for f in batch[key]:
+                if not f.done():
+                    f.set_result(res)
+
+    async def drain(self) -> None:
+        """Gửi ngay phần đang chờ và đợi mọi batch đang chạy xong (dùng khi tắt app)."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["pending"] = len(self._pending)
+        out["window_ms"] = round(self.window * 1000)
+        out["max_items"] = self.max_items
+        out["avg_batch"] = round(self._stats["items"] / self._stats["batches"], 2) if self._stats["batches"] else 0.0
+        return out
+
+def split_pairs(pairs: List[Tuple[float, float]]) -> Tuple[str, str]:
+    """[(lat, lon), ...] -> ("lat1,lat2,...", "lon1,lon2,...") theo định dạng Open-Meteo."""
+    return ",".join(str(p[0]) for p in pairs), ",".join(str(p[1]) for p in pairs)
@@ -1,12 +1,19 @@
 # services/bulletin.py
 import random
-from typing import Dict, Any, List, Tuple
+import datetime
+from typing import Dict, Any, Callable, Hashable, Iterable, List, Optional, Tuple
+from configs import BULLETIN_CACHE_MAX_ENTRIES
+from services import cache
+from services import jsonio
+from services import weather_sources
+from services.cache import TTLCache
+from services.forecast import LOCAL_TZ
 from services.weather_sources import get_weather
 from services.current import build_current_block
 from services.overview import build_overview_block
 from services.summary import build_summary
 from services.insights import generate_all_insights
-from services.alerts import generate_all_alerts
+from services.alerts import generate_alert_records, SEVERITY_NONE
 
 def _code_to_text(code):
     mapping = {
@@ -19,7 +26,7 @@ def _code_to_text(code):
     }
     return mapping.get(code, "—")
 
-def choose_weather_icon(status: str) -> str:
+def choose_weather_icon(status: str, fallback: Optional[str] = None) -> str:
     if not status:
         return "default.ico"
     s = (status or "").lower()
@@ -33,35 +40,31 @@ def choose_weather_icon(status: str) -> str:
         return "snow.ico"
     elif "dông" in s or "storm" in s:
         return "storm.ico"
+    elif fallback is not None:
+        return fallback
     else:
         return random.choice(["sun.ico", "cloud.ico", "rain.ico"])
 
-def categorize_alerts(all_alerts: List[str]) -> Dict[str, List[str]]:
-    def has_any(s: str, keys: List[str]) -> bool:
-        low = s.lower()
-        return any(k in low for k in keys)
+def severity_icon(score: int, status: str, fallback: Optional[str] = None) -> Tuple[str, str]:
+    """(icon, emoji) của bản tin theo điểm mức độ cao nhất; không có cảnh báo thì theo trạng thái thời tiết.
+    fallback: icon cố định khi trạng thái không khớp từ khóa nào (mặc định chọn ngẫu nhiên như bản tin)."""
+    if score == 3:
+        return "danger_red.ico", "🔴"
+    elif score == 2:
+        return "warning_orange.ico", "🟠"
+    elif score == 1:
+        return "info_green.ico", "🟢"
+    return choose_weather_icon(status, fallback), "⚪"
 
+def categorize_alerts(records: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Câu cảnh báo theo nhóm (một cảnh báo có thể thuộc nhiều nhóm, xem alerts.ALERT_GROUP_KEYWORDS)."""
     categories: Dict[str, List[str]] = {
         "temp": [], "rain": [], "wind": [], "humidity": [],
         "pressure": [], "uv": [], "solar": [],
     }
-
-    for a in all_alerts or []:
-        if has_any(a, ["nhiệt độ", "sốc nhiệt", "hạ thân nhiệt", "nắng nóng", "nóng", "lạnh", "rét"]):
-            categories["temp"].append(a)
-        if has_any(a, ["mưa", "lũ", "ngập", "mưa rào", "mưa to", "mưa đá", "dông", "giông"]):
-            categories["rain"].append(a)
-        if has_any(a, ["gió", "bão", "giật", "gió mạnh", "gió giật", "cấp gió"]):
-            categories["wind"].append(a)
-        if has_any(a, ["độ ẩm", "nồm", "ẩm mốc", "khô hạn", "ẩm ướt"]):
-            categories["humidity"].append(a)
-        if has_any(a, ["áp suất", "áp thấp", "cao áp", "baro", "barometric"]):
-            categories["pressure"].append(a)
-        if has_any(a, ["uv", "cháy nắng", "tia uv", "tia cực tím"]):
-            categories["uv"].append(a)
-        if has_any(a, ["bức xạ", "solar", "w/m²", "radiation"]):
-            categories["solar"].append(a)
-
+    for a in records or []:
+        for group in a["groups"]:
+            categories[group].append(a["text"])
     return categories
 
 # ---------------- Mapping về unified ----------------
@@ -121,14 +124,58 @@ def map_to_unified(current: Dict[str, Any], hourly: Dict[str, Any], daily: Dict[
 
     return unified
 
+# ---------------- SECTIONS ----------------
+# Các phần của bản tin (theo thứ tự trả về) và preset cho tham số include=/fields=
+BULLETIN_SECTIONS: Tuple[str, ...] = (
+    "text", "icon", "stale",
+    "current_block", "overview_block", "summary_block",
+    "insights", "alerts", "categorized_alerts", "alert_records",
+    "data",
+)
+SECTION_PRESETS: Dict[str, Tuple[str, ...]] = {
+    "full": BULLETIN_SECTIONS,
+    "lean": ("text", "icon", "stale"),   # client di động: bỏ block rời và chuỗi dữ liệu thô
+}
+
+def parse_sections(spec: Optional[str]) -> Tuple[str, ...]:
+    """'lean' | 'full' | danh sách phần cách nhau dấu phẩy (trộn được preset); rỗng = full."""
+    if not spec or not spec.strip():
+        return BULLETIN_SECTIONS
+    wanted = set()
+    for name in (s.strip().lower() for s in spec.split(",")):
+        if not name:
+            continue
+        if name in SECTION_PRESETS:
+            wanted.update(SECTION_PRESETS[name])
+        elif name in BULLETIN_SECTIONS:
+            wanted.add(name)
+        else:
+            raise ValueError(f"Phần bản tin không hợp lệ: {name} (hợp lệ: {', '.join(BULLETIN_SECTIONS + tuple(SECTION_PRESETS))})")
+    return tuple(s for s in BULLETIN_SECTIONS if s in wanted)
+
+def _once(fn: Callable[[], Any]) -> Callable[[], Any]:
+    """Tính lười: chỉ chạy fn khi có phần cần tới, và chỉ một lần."""
+    memo: List[Any] = []
+    def wrapper() -> Any:
+        if not memo:
+            memo.append(fn())
+        return memo[0]
+    return wrapper
+
 # ---------------- ASYNC VERSION ----------------
 async def build_bulletin_unified(
     lat: float,
     lon: float,
-    loc: Dict[str, Any] = None
+    loc: Dict[str, Any] = None,
+    sections: Optional[Iterable[str]] = None
 ) -> Dict[str, Any]:
+    """
+    Bản tin hợp nhất. sections (xem parse_sections) chọn các phần trả về;
+    phần không được chọn và các bước chỉ phục vụ nó không được tính.
+    """
     if loc is None:
         loc = {}
+    wanted = set(BULLETIN_SECTIONS if sections is None else sections)
 
     # Lấy dữ liệu nguồn chuẩn
     om_data = await get_weather(lat, lon)
@@ -145,124 +192,166 @@ async def build_bulletin_unified(
 
     wind_unit = "m/s"
 
-    # Tính cực đại ngày từ hourly series
-    series = hourly.get("series", {}) or {}
-    wspd_series = series.get("wind_speed_10m") or []
-    gust_series = series.get("wind_gusts_10m") or []
-
-    wind_speed_max = max([v for v in wspd_series if v is not None], default=None)
-    wind_gusts_max = max([v for v in gust_series if v is not None], default=None)
+    # Cực đại ngày (đã tính sẵn trên mảng trong get_weather)
+    wind_speed_max = hourly.get("max_wind_speed")
+    wind_gusts_max = hourly.get("max_gust")
 
     # ---------------- BLOCKS ----------------
-    current_block, current_values = build_current_block(
-        unified, status_text, wind_unit
-    )
-
-    overview_block, overview_values = build_overview_block(
-        daily={
-            "precipitation_sum": unified.get("precipitation_sum_day"),
-            "avg_wind_speed_day": unified.get("wind_speed_hourly"),  # dùng hourly avg làm daily avg
-            "avg_humidity": unified.get("humidity_day"),
-            "avg_pressure": unified.get("pressure_day"),
-            "solar_radiation_sum": unified.get("solar_radiation_sum_day"),
-        },
-        status_text=status_text,
-        tmin=unified.get("temperature_min"),
-        tmax=unified.get("temperature_max"),
-        uv_max_day=unified.get("uv_index_max_day"),
-        hourly={
-            "temperature_hourly": unified.get("temperature_hourly"),
-            "uv_index_hourly": unified.get("uv_index_hourly"),
-        },
-        sunrise=unified.get("sunrise"),
-        sunset=unified.get("sunset"),
-        wind_speed_max=wind_speed_max,
-        wind_gusts_max=wind_gusts_max,
-        cloudcover_mean=unified.get("cloudcover_mean"),
-        dewpoint_mean=unified.get("dewpoint_2m_mean"),
-    )
+    @_once
+    def current_part() -> Tuple[str, Dict[str, Any]]:
+        return build_current_block(unified, status_text, wind_unit)
+
+    @_once
+    def overview_part() -> Tuple[str, Dict[str, Any]]:
+        return build_overview_block(
+            daily={
+                "precipitation_sum": unified.get("precipitation_sum_day"),
+                "avg_wind_speed_day": unified.get("wind_speed_hourly"),  # dùng hourly avg làm daily avg
+                "avg_humidity": unified.get("humidity_day"),
+                "avg_pressure": unified.get("pressure_day"),
+                "solar_radiation_sum": unified.get("solar_radiation_sum_day"),
+            },
+            status_text=status_text,
+            tmin=unified.get("temperature_min"),
+            tmax=unified.get("temperature_max"),
+            uv_max_day=unified.get("uv_index_max_day"),
+            hourly={
+                "temperature_hourly": unified.get("temperature_hourly"),
+                "uv_index_hourly": unified.get("uv_index_hourly"),
+            },
+            sunrise=unified.get("sunrise"),
+            sunset=unified.get("sunset"),
+            wind_speed_max=wind_speed_max,
+            wind_gusts_max=wind_gusts_max,
+            cloudcover_mean=unified.get("cloudcover_mean"),
+            dewpoint_mean=unified.get("dewpoint_2m_mean"),
+        )
 
     # Gom nhận định và cảnh báo chung
-    all_insights = generate_all_insights(unified) or []
-    all_alerts = generate_all_alerts(unified) or []
-
-    summary_obj = build_summary(
-        current_block=current_block,
-        overview_block=overview_block,
-        current_values=current_values,
-        overview_values=overview_values,
-        insights=all_insights,
-        alerts=all_alerts
-    )
-    summary_block = summary_obj.get("summary_block", "")
+    @_once
+    def all_insights() -> List[str]:
+        return generate_all_insights(unified) or []
+
+    @_once
+    def alert_records() -> List[Dict[str, Any]]:
+        return generate_alert_records(unified)
+
+    @_once
+    def all_alerts() -> List[str]:
+        return [a["text"] for a in alert_records()]
+
+    @_once
+    def summary_block() -> str:
+        current_block, current_values = current_part()
+        overview_block, overview_values = overview_part()
+        summary_obj = build_summary(
+            current_block=current_block,
+            overview_block=overview_block,
+            current_values=current_values,
+            overview_values=overview_values,
+            insights=all_insights(),
+            alerts=all_alerts()
+        )
+        return summary_obj.get("summary_block", "")
 
     # ---------------- ALERTS ----------------
-    cats = categorize_alerts(all_alerts)
-
-    severity_map = {
-        "lũ quét": (3, "🔴 Rất nguy hiểm"),
-        "sạt lở": (3, "🔴 Rất nguy hiểm"),
-        "bão": (3, "🔴 Rất nguy hiểm"),
-        "sốc nhiệt": (2, "🟠 Nguy hiểm vừa"),
-        "cháy nắng": (2, "🟠 Nguy hiểm vừa"),
-        "hạ thân nhiệt": (2, "🟠 Nguy hiểm vừa"),
-        "sương mù": (1, "🟢 Nhẹ"),
-    }
-    def get_severity(alert: str) -> Tuple[int, str]:
-        low = alert.lower()
-        for kw, (score, label) in severity_map.items():
-            if kw in low:
-                return score, label
-        return 0, "⚪ An toàn"
-
-    alerts_with_labels = [(get_severity(a)[0], f"{get_severity(a)[1]} - {a}") for a in all_alerts]
-    sorted_alerts = sorted(alerts_with_labels, key=lambda x: x[0], reverse=True)
-
-    if sorted_alerts:
-        top_alerts = [a for _, a in sorted_alerts[:2]]
-        highlight_text = "🚨 Cảnh báo nổi bật:\n" + "\n".join(top_alerts)
-        highest_score = sorted_alerts[0][0]
-        highest_label = sorted_alerts[0][1].split(" - ")[0]
-    else:
-        highlight_text = "✅ Không có cảnh báo nổi bật."
-        highest_score, highest_label = 0, "⚪ An toàn"
-
-    if highest_score == 3:
-        bulletin_icon, severity_emoji = "danger_red.ico", "🔴"
-    elif highest_score == 2:
-        bulletin_icon, severity_emoji = "warning_orange.ico", "🟠"
-    elif highest_score == 1:
-        bulletin_icon, severity_emoji = "info_green.ico", "🟢"
-    else:
-        bulletin_icon = choose_weather_icon(status_text)
-        severity_emoji = "⚪"
+    # Mức độ đã có sẵn trong từng bản ghi cảnh báo (tính lúc import)
+    @_once
+    def severity() -> Dict[str, Any]:
+        ranked = sorted(alert_records(), key=lambda a: a["severity"], reverse=True)
 
-    summary_line = f"📊 Đánh giá tổng quan: {highest_label}"
+        if ranked:
+            top_alerts = [f"{a['severity_label']} - {a['text']}" for a in ranked[:2]]
+            highlight_text = "🚨 Cảnh báo nổi bật:\n" + "\n".join(top_alerts)
+            highest_score, highest_label = ranked[0]["severity"], ranked[0]["severity_label"]
+        else:
+            highlight_text = "✅ Không có cảnh báo nổi bật."
+            highest_score, highest_label = SEVERITY_NONE
+
+        bulletin_icon, severity_emoji = severity_icon(highest_score, status_text)
+        return {
+            "icon": bulletin_icon,
+            "emoji": severity_emoji,
+            "highlight": highlight_text,
+            "summary_line": f"📊 Đánh giá tổng quan: {highest_label}",
+        }
 
     # ---------------- RETURN ----------------
-    text = (
-        "# 📰 BẢN TIN THỜI TIẾT\n\n"
-        "## ⏱️ TÌNH HÌNH HIỆN TẠI\n" + (current_block or "—") + "\n\n"
-        "## 📅 TỔNG QUAN TRONG NGÀY\n" + (overview_block or "—") + "\n\n"
-        "## 🎯 KẾT LUẬN BẢN TIN\n" + (summary_block or "—") + "\n\n"
-        + severity_emoji + " " + highlight_text + "\n"
-        + summary_line
-    )
-
-    return {
+    def text() -> str:
+        sev = severity()
+        return (
+            "# 📰 BẢN TIN THỜI TIẾT\n\n"
+            "## ⏱️ TÌNH HÌNH HIỆN TẠI\n" + (current_part()[0] or "—") + "\n\n"
+            "## 📅 TỔNG QUAN TRONG NGÀY\n" + (overview_part()[0] or "—") + "\n\n"
+            "## 🎯 KẾT LUẬN BẢN TIN\n" + (summary_block() or "—") + "\n\n"
+            + sev["emoji"] + " " + sev["highlight"] + "\n"
+            + sev["summary_line"]
+        )
+
+    meta = om_data.get("meta", {}) or {}
+
+    builders: Dict[str, Callable[[], Any]] = {
         "text": text,
-        "icon": bulletin_icon,
-        "current_block": current_block or "",
-        "overview_block": overview_block or "",
-        "summary_block": summary_block or "",
+        "icon": lambda: severity()["icon"],
+        "stale": lambda: bool((meta.get("cache") or {}).get("stale")),
+        "current_block": lambda: current_part()[0] or "",
+        "overview_block": lambda: overview_part()[0] or "",
+        "summary_block": lambda: summary_block() or "",
         "insights": all_insights,
         "alerts": all_alerts,
-        "categorized_alerts": cats,
-        "data": {
+        "categorized_alerts": lambda: categorize_alerts(alert_records()),
+        "alert_records": alert_records,
+        "data": lambda: {
             "current": current,
             "hourly": hourly,
             "daily": daily,
             "unified": unified,
-            "loc": loc
-        }
-    }
\ No newline at end of file
+            "loc": loc,
+            "meta": meta
+        },
+    }
+    return {name: builders[name]() for name in BULLETIN_SECTIONS if name in wanted}
+
+# ---------------- CACHE BẢN TIN ĐÃ DỰNG ----------------
+# Bản tin chỉ đổi khi có dự báo mới (version theo nội dung trong FORECAST_CACHE) hoặc sang giờ mới:
+#   key = (địa danh, version dự báo, cờ stale, giờ địa phương, các phần chọn)
+#   dự báo được làm mới -> version mới -> key mới, entry cũ hết hạn cuối giờ / bị LRU đẩy ra
+BULLETIN_CACHE = cache.register(TTLCache("bulletin", BULLETIN_CACHE_MAX_ENTRIES))
+
+def _loc_key(loc: Dict[str, Any]) -> Hashable:
+    # Địa danh gazetteer (không kèm ứng viên trùng tên): id là đủ; còn lại lấy cả dict (nằm trong data.loc)
+    if isinstance(loc.get("id"), int) and "candidates" not in loc:
+        return loc["id"]
+    return jsonio.dumps(loc)
+
+def _hour_bounds(now: datetime.datetime) -> Tuple[str, float]:
+    start = now.replace(minute=0, second=0, microsecond=0)
+    return start.strftime("%Y%m%d%H"), (start + datetime.timedelta(hours=1)).timestamp()
+
+async def render_bulletin(
+    lat: float,
+    lon: float,
+    loc: Dict[str, Any] = None,
+    sections: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """
+    build_bulletin_unified qua cache bản tin đã dựng.
+    Bản dựng từ dự báo cũ do upstream lỗi (stale-if-error) không được cache.
+    """
+    if loc is None:
+        loc = {}
+    sections = BULLETIN_SECTIONS if sections is None else tuple(sections)
+    hour, hour_end = _hour_bounds(datetime.datetime.now(LOCAL_TZ))
+
+    cached = weather_sources.cached_version(lat, lon)
+    if cached is not None:
+        hit = BULLETIN_CACHE.get((_loc_key(loc), *cached, hour, sections))
+        if hit is not None:
+            return hit
+
+    bulletin = await build_bulletin_unified(lat, lon, loc, sections=sections)
+
+    cached = weather_sources.cached_version(lat, lon)
+    if cached is not None:
+        BULLETIN_CACHE.set((_loc_key(loc), *cached, hour, sections), bulletin, expires_at=hour_end)
+    return bulletin
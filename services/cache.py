@@ -0,0 +1,218 @@
+# services/cache.py
+import time
+import asyncio
+import hashlib
+import logging
+import datetime
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Hashable, List, Union
+
+from configs import (
+    APP_NAME,
+    FORECAST_CACHE_MAX_ENTRIES,
+    CACHE_SWEEP_INTERVAL_SECONDS,
+    MODEL_UPDATE_INTERVAL_HOURS,
+    MODEL_UPDATE_OFFSET_MINUTES,
+    FORECAST_CACHE_MIN_TTL_SECONDS,
+)
+
+log = logging.getLogger(APP_NAME)
+
+# Kiểm tra ngay lúc khởi động: 0 -> chia cho 0 ở mỗi lần set cache, số âm -> vòng lặp mốc không dừng
+if MODEL_UPDATE_INTERVAL_HOURS < 1:
+    raise ValueError(f"MODEL_UPDATE_INTERVAL_HOURS phải là số nguyên ≥ 1 (đang là {MODEL_UPDATE_INTERVAL_HOURS})")
+
+def hash_key(*parts: Any) -> str:
+    return hashlib.md5(",".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+# --------------------------------------
+# Mốc cập nhật model Open-Meteo
+#   - dữ liệu mới có theo chu kỳ MODEL_UPDATE_INTERVAL_HOURS (UTC)
+#   - cache hết hạn đúng mốc kế tiếp thay vì TTL cố định
+# --------------------------------------
+def next_model_update(now: Optional[float] = None) -> float:
+    now = time.time() if now is None else now
+    dt = datetime.datetime.fromtimestamp(now, tz=datetime.timezone.utc)
+    base = dt.replace(minute=0, second=0, microsecond=0)
+    base -= datetime.timedelta(hours=base.hour % MODEL_UPDATE_INTERVAL_HOURS)
+    nxt = base + datetime.timedelta(minutes=MODEL_UPDATE_OFFSET_MINUTES)
+    while nxt.timestamp() <= now:
+        nxt += datetime.timedelta(hours=MODEL_UPDATE_INTERVAL_HOURS)
+    return max(nxt.timestamp(), now + FORECAST_CACHE_MIN_TTL_SECONDS)
+
+def last_model_update(now: Optional[float] = None) -> float:
+    """Mốc cập nhật model gần nhất đã qua (≤ now)."""
+    now = time.time() if now is None else now
+    dt = datetime.datetime.fromtimestamp(now, tz=datetime.timezone.utc)
+    base = dt.replace(minute=0, second=0, microsecond=0)
+    base -= datetime.timedelta(hours=base.hour % MODEL_UPDATE_INTERVAL_HOURS)
+    last = base + datetime.timedelta(minutes=MODEL_UPDATE_OFFSET_MINUTES)
+    while last.timestamp() > now:
+        last -= datetime.timedelta(hours=MODEL_UPDATE_INTERVAL_HOURS)
+    return last.timestamp()
+
+# --------------------------------------
+# Cache LRU có hạn dùng
+# --------------------------------------
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "expires_at", "keep_until", "version")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float, keep_until: float, version: Union[int, str]):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.keep_until = keep_until   # còn giữ (stale) tới mốc này
+        self.version = version
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) < self.expires_at
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (time.time() if now is None else now) - self.stored_at
+
+    def stale_for(self, now: Optional[float] = None) -> float:
+        """Số giây đã quá hạn (0 nếu còn tươi)."""
+        return max(0.0, (time.time() if now is None else now) - self.expires_at)
+
+class TTLCache:
+    """
+    Cache trong bộ nhớ: giới hạn số phần tử (LRU), mỗi phần tử có expires_at riêng.
+    Phần tử quá hạn vẫn được giữ (stale) tới keep_until để phục vụ
+    stale-while-revalidate / stale-if-error; sau đó bị xóa khi đọc tới hoặc khi sweep.
+    """
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._version = 0
+        self._stats: Dict[str, int] = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _live(self, key: Hashable, now: float) -> Optional[CacheEntry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if now >= entry.keep_until:
+            del self._data[key]
+            self._stats["expirations"] += 1
+            return None
+        return entry
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Chỉ trả về giá trị còn tươi."""
+        entry = self._live(key, time.time())
+        if entry is None or not entry.is_fresh():
+            self._stats["misses"] += 1
+            return None
+        self._data.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry.value
+
+    def lookup(self, key: Hashable) -> Optional[CacheEntry]:
+        """Trả về entry kể cả khi đã stale (chưa quá keep_until); người gọi tự xét độ tươi."""
+        now = time.time()
+        entry = self._live(key, now)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        self._data.move_to_end(key)
+        self._stats["hits" if entry.is_fresh(now) else "stale_hits"] += 1
+        return entry
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """Xem entry mà không cập nhật LRU/thống kê."""
+        entry = self._data.get(key)
+        if entry is None or time.time() >= entry.keep_until:
+            return None
+        return entry
+
+    def set(self, key: Hashable, value: Any, expires_at: float, keep_until: Optional[float] = None, version: Optional[str] = None) -> CacheEntry:
+        """version: định danh nội dung do người gọi tính (ổn định giữa các worker); mặc định = bộ đếm trong tiến trình."""
+        self._version += 1
+        keep_until = expires_at if keep_until is None else max(keep_until, expires_at)
+        entry = CacheEntry(value, time.time(), expires_at, keep_until, self._version if version is None else version)
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        self._stats["sets"] += 1
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self._stats["evictions"] += 1
+        return entry
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Xóa mọi phần tử đã quá keep_until; trả về số phần tử bị xóa."""
+        now = time.time() if now is None else now
+        expired: List[Hashable] = [k for k, e in self._data.items() if e.keep_until <= now]
+        for k in expired:
+            del self._data[k]
+        self._stats["expirations"] += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+        out["size"] = len(self._data)
+        out["max_entries"] = self.max_entries
+        out["hit_ratio"] = round(self._stats["hits"] / lookups, 3) if lookups else 0.0
+        return out
+
+# --------------------------------------
+# Cache dự báo dùng chung (upstream Open-Meteo)
+# --------------------------------------
+FORECAST_CACHE = TTLCache("forecast", FORECAST_CACHE_MAX_ENTRIES)
+
+_CACHES: List[TTLCache] = [FORECAST_CACHE]
+
+def register(cache: TTLCache) -> TTLCache:
+    """Đăng ký cache để được sweep định kỳ."""
+    if cache not in _CACHES:
+        _CACHES.append(cache)
+    return cache
+
+def sweep_all() -> int:
+    return sum(c.sweep() for c in _CACHES)
+
+# --------------------------------------
+# Sweep định kỳ (chạy nền, khởi động trong lifespan)
+# --------------------------------------
+_sweeper: Optional["asyncio.Task[None]"] = None
+
+async def _sweep_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = sweep_all()
+            if removed:
+                log.debug(f"🧹 Cache sweep: xóa {removed} phần tử hết hạn")
+        except Exception as e:
+            log.error(f"Lỗi khi sweep cache: {e}")
+
+def start_sweeper(interval: float = CACHE_SWEEP_INTERVAL_SECONDS) -> None:
+    global _sweeper
+    if _sweeper is None or _sweeper.done():
+        _sweeper = asyncio.ensure_future(_sweep_loop(interval))
+
+async def stop_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        try:
+            await _sweeper
+        except asyncio.CancelledError:
+            pass
+    _sweeper = None
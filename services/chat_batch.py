@@ -0,0 +1,77 @@
+# services/chat_batch.py
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple, Union
+
+from configs import APP_NAME, CHAT_BATCH_CONCURRENCY
+from services.helpers import geocode_region_async
+from services.bulletin import render_bulletin
+from services import weather_sources
+from services import prewarm
+
+log = logging.getLogger(APP_NAME)
+
+Region = Union[str, Sequence[float]]
+
+def _region_text(region: Region) -> str:
+    """Chuẩn hóa một phần tử đầu vào: tên địa danh hoặc cặp [lat, lon] -> chuỗi cho geocode."""
+    if isinstance(region, str):
+        return region.strip()
+    lat, lon = region
+    return f"{float(lat)},{float(lon)}"
+
+# --------------------------------------
+# Bản tin cho nhiều địa danh trong một request
+#   1. geocode từng địa danh khác nhau một lần (gazetteer cục bộ, ngoài ra mới gọi API)
+#   2. nạp dự báo cho mọi điểm cùng lúc: single-flight + cache + micro-batch gộp
+#      thành ít request Open-Meteo (xem services/batcher.py)
+#   3. dựng bản tin song song (qua cache bản tin đã dựng), tối đa CHAT_BATCH_CONCURRENCY cùng lúc
+#   Kết quả từng phần tử trả ra ngay khi xong (thứ tự hoàn thành, kèm index)
+# --------------------------------------
+async def iter_bulletins(regions: List[Region], sections: Tuple[str, ...]) -> AsyncIterator[Dict[str, Any]]:
+    texts = [_region_text(r) for r in regions]
+    sem = asyncio.Semaphore(max(1, CHAT_BATCH_CONCURRENCY))
+
+    async def _geocode(text: str) -> Dict[str, Any]:
+        async with sem:
+            return await geocode_region_async(text)
+
+    unique = list(dict.fromkeys(texts))
+    geocoded = await asyncio.gather(*(_geocode(t) for t in unique), return_exceptions=True)
+    locs: Dict[str, Union[Dict[str, Any], BaseException]] = dict(zip(unique, geocoded))
+
+    # Nạp trước dự báo: mọi điểm vào cùng cửa sổ batch thay vì rải theo semaphore
+    points = list(dict.fromkeys(
+        (float(loc["latitude"]), float(loc["longitude"]))
+        for loc in locs.values() if not isinstance(loc, BaseException)
+    ))
+    await asyncio.gather(*(weather_sources.fetch_forecast_entry(lat, lon) for lat, lon in points), return_exceptions=True)
+
+    async def _one(index: int, text: str) -> Dict[str, Any]:
+        item: Dict[str, Any] = {"index": index, "region": text}
+        loc = locs[text]
+        try:
+            if isinstance(loc, BaseException):
+                raise loc
+            prewarm.note_request(loc)
+            async with sem:
+                bulletin = await render_bulletin(float(loc["latitude"]), float(loc["longitude"]), loc, sections=sections)
+            item.update(status="ok", bulletin=bulletin, loc=loc)
+        except Exception as e:
+            log.warning(f"Bản tin batch cho '{text}' lỗi: {e}")
+            item.update(status="error", message=str(e))
+        return item
+
+    tasks = [asyncio.ensure_future(_one(i, t)) for i, t in enumerate(texts)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        # Client ngắt giữa chừng (stream NDJSON): hủy các phần tử chưa xong
+        for task in tasks:
+            task.cancel()
+
+async def run_batch(regions: List[Region], sections: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Như iter_bulletins nhưng gom đủ rồi trả theo thứ tự đầu vào."""
+    items = [item async for item in iter_bulletins(regions, sections)]
+    return sorted(items, key=lambda it: it["index"])
@@ -1,6 +1,10 @@
 # services/cloud_dew.py
 from typing import Any, Optional
 
+import numpy as np
+
+from services.rules import Scale
+
 # -------------------------------
 # Chuẩn hóa dữ liệu
 # -------------------------------
@@ -18,36 +22,37 @@ def _round1(val: Optional[float]) -> Optional[float]:
 # -------------------------------
 # Phân loại độ che phủ mây
 # -------------------------------
+CLOUDCOVER_LEVELS = Scale([
+    (">=", 90, "☁️ Trời u ám, mây dày đặc."),
+    (">=", 60, "☁️ Nhiều mây, ánh sáng mặt trời hạn chế."),
+    (">=", 30, "⛅ Ít mây, trời khá thoáng."),
+], default="☀️ Trời quang đãng, hầu như không có mây.")
+
 def classify_cloudcover(cloudcover: Any) -> Optional[str]:
     """Phân loại độ che phủ mây theo %."""
-    c = _to_float(cloudcover)
-    if c is None:
-        return None
-    if c >= 90:
-        return "☁️ Trời u ám, mây dày đặc."
-    if c >= 60:
-        return "☁️ Nhiều mây, ánh sáng mặt trời hạn chế."
-    if c >= 30:
-        return "⛅ Ít mây, trời khá thoáng."
-    return "☀️ Trời quang đãng, hầu như không có mây."
+    return CLOUDCOVER_LEVELS.text(_to_float(cloudcover))
+
+def classify_cloudcover_codes(cloudcover: Any) -> np.ndarray:
+    """Mã mức mây cho cả mảng % (xem CLOUDCOVER_LEVELS.legend()), NaN/None -> -1."""
+    return CLOUDCOVER_LEVELS.codes(cloudcover)
 
 # -------------------------------
 # Phân loại điểm sương
 # -------------------------------
+DEWPOINT_LEVELS = Scale([
+    (">=", 24, "💧 Điểm sương rất cao, không khí ngột ngạt, dễ cảm thấy oi bức."),
+    (">=", 20, "💧 Điểm sương cao, không khí ẩm, dễ đổ mồ hôi."),
+    (">=", 16, "💧 Điểm sương trung bình, không khí dễ chịu."),
+    (">=", 10, "💧 Điểm sương thấp, không khí khô ráo."),
+], default="💧 Điểm sương rất thấp, không khí khô hanh.")
+
 def classify_dewpoint(dewpoint: Any) -> Optional[str]:
     """Phân loại điểm sương theo °C, phản ánh độ ẩm thực tế."""
-    d = _to_float(dewpoint)
-    if d is None:
-        return None
-    if d >= 24:
-        return "💧 Điểm sương rất cao, không khí ngột ngạt, dễ cảm thấy oi bức."
-    if d >= 20:
-        return "💧 Điểm sương cao, không khí ẩm, dễ đổ mồ hôi."
-    if d >= 16:
-        return "💧 Điểm sương trung bình, không khí dễ chịu."
-    if d >= 10:
-        return "💧 Điểm sương thấp, không khí khô ráo."
-    return "💧 Điểm sương rất thấp, không khí khô hanh."
+    return DEWPOINT_LEVELS.text(_to_float(dewpoint))
+
+def classify_dewpoint_codes(dewpoint: Any) -> np.ndarray:
+    """Mã mức điểm sương cho cả mảng °C (xem DEWPOINT_LEVELS.legend()), NaN/None -> -1."""
+    return DEWPOINT_LEVELS.codes(dewpoint)
 
 # -------------------------------
 # Hàm tổng hợp cho hiển thị
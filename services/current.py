@@ -14,6 +14,7 @@ from services.visibility import classify_visibility
 from services.humidity import classify_humidity, adjust_feels_by_humidity
 from services.pressure import classify_pressure
 from services.solar_uv import classify_solar, classify_uv, _is_night
+from services.forecast import time_axis
 
 def _to_float(val: Any) -> Optional[float]:
     try:
@@ -63,8 +64,8 @@ def build_current_block(
             try:
                 now_local = datetime.datetime.now(ZoneInfo("Asia/Ho_Chi_Minh"))
                 now_str = now_local.strftime("%Y-%m-%dT%H:00")
-                if now_str in series_time:
-                    idx = series_time.index(now_str)
+                idx = time_axis(series_time).index_of(now_str)
+                if idx is not None:
                     rain = series_precip[idx]
             except Exception:
                 pass
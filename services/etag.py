@@ -0,0 +1,26 @@
+# services/etag.py
+import hashlib
+from typing import Any, Optional
+
+# --------------------------------------
+# ETag yếu (W/) từ các thành phần định danh nội dung
+#   (version dự báo, địa danh, giờ địa phương, ...)
+#   yếu vì cùng một tag đi qua CompressionMiddleware thành body br / gzip / nguyên bản
+#   -> chỉ cam kết tương đương về nội dung, không trùng từng byte
+# --------------------------------------
+def make_etag(*parts: Any) -> str:
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return 'W/"' + hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """So khớp If-None-Match (so sánh yếu theo RFC 9110: bỏ tiền tố W/)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(t) == target for t in if_none_match.split(","))
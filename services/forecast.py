@@ -0,0 +1,356 @@
+# services/forecast.py
+import re
+import math
+import datetime
+from zoneinfo import ZoneInfo
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# --------------------------------------
+# Dự báo dạng cột (NumPy)
+#   - mỗi biến hourly/daily là một mảng float32, thiếu dữ liệu = NaN
+#   - trục thời gian datetime64 (hourly theo phút, daily theo ngày)
+#   - trung bình / cực đại / đếm tính một lần cho mọi biến (ma trận biến × giờ)
+#   - dựng một lần mỗi lần tải từ upstream, lưu thẳng trong cache dự báo
+# --------------------------------------
+def _column(values: Any, n: int) -> np.ndarray:
+    """List Open-Meteo (có thể chứa None / chuỗi lỗi) -> float64, độ dài n, NaN chỗ thiếu."""
+    out = np.full(n, np.nan, dtype=np.float64)
+    if not isinstance(values, list) or not values:
+        return out
+    try:
+        arr = np.asarray(values[:n], dtype=np.float64)
+    except (TypeError, ValueError):
+        arr = np.array([_num(v) for v in values[:n]], dtype=np.float64)
+    out[: arr.shape[0]] = arr
+    return out
+
+def _num(v: Any) -> float:
+    try:
+        return np.nan if v is None else float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _time_axis(values: Any, unit: str) -> np.ndarray:
+    if not isinstance(values, list) or not values:
+        return np.array([], dtype=f"datetime64[{unit}]")
+    try:
+        return np.asarray(values, dtype=f"datetime64[{unit}]")
+    except (TypeError, ValueError):
+        return np.array([np.datetime64(v, unit) if isinstance(v, str) else np.datetime64("NaT") for v in values])
+
+# --------------------------------------
+# Trục thời gian hourly, parse một lần cho mỗi forecast
+#   - index_of("YYYY-MM-DDTHH:MM"): vị trí đúng chuỗi đó (dict, O(1))
+#   - nearest(dt): giờ gần nhất; trục đều bước -> tính số học, O(1)
+#   - day_slice("YYYY-MM-DD"): slice các giờ có cùng tiền tố ngày, O(1)
+# --------------------------------------
+class TimeAxis:
+    __slots__ = ("times", "values", "_pos", "_days", "_start", "_step")
+
+    def __init__(self, times: Sequence[str]):
+        self.times = times
+        self.values = _time_axis(list(times), "m")
+        self._pos: Dict[str, int] = {}
+        self._days: Dict[str, Tuple[int, int]] = {}
+        for i, t in enumerate(times):
+            if not isinstance(t, str):
+                continue
+            self._pos.setdefault(t, i)
+            day = t[:10]
+            start, _ = self._days.get(day, (i, i))
+            self._days[day] = (start, i + 1)
+
+        # Bước đều (Open-Meteo luôn 60 phút) -> chỉ số = (t - t0) / bước
+        self._start: Optional[int] = None
+        self._step: Optional[int] = None
+        v = self.values
+        if v.shape[0] >= 2 and not np.isnat(v).any():
+            steps = np.diff(v.astype(np.int64))
+            if steps[0] > 0 and (steps == steps[0]).all():
+                self._start, self._step = int(v[0].astype(np.int64)), int(steps[0])
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def index_of(self, t: str) -> Optional[int]:
+        return self._pos.get(t)
+
+    def nearest(self, dt: datetime.datetime) -> Optional[int]:
+        """Chỉ số giờ gần nhất với dt (naive hoặc UTC; trục Open-Meteo tính theo UTC)."""
+        n = self.values.shape[0]
+        if n == 0:
+            return None
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        target = np.datetime64(dt, "m")
+        if self._step is not None:
+            offset = int(target.astype(np.int64)) - self._start
+            # Chia làm tròn, hòa thì lấy giờ sớm hơn (giống min() trên khoảng cách)
+            q, r = divmod(offset, self._step)
+            i = q + 1 if 2 * r > self._step else q
+            return min(max(i, 0), n - 1)
+        i = int(np.searchsorted(self.values, target))
+        if i <= 0:
+            return 0
+        if i >= n:
+            return n - 1
+        return i if (self.values[i] - target) < (target - self.values[i - 1]) else i - 1
+
+    def range_slice(self, start: datetime.datetime, end: datetime.datetime) -> slice:
+        """Các giờ trong [start, end) (datetime có tz hoặc naive UTC)."""
+        lo, hi = (
+            np.datetime64((d.astimezone(datetime.timezone.utc).replace(tzinfo=None) if d.tzinfo else d), "m")
+            for d in (start, end)
+        )
+        return slice(int(np.searchsorted(self.values, lo)), int(np.searchsorted(self.values, hi)))
+
+    def day_slice(self, day: Union[str, datetime.date]) -> slice:
+        if not isinstance(day, str):
+            day = day.isoformat()
+        start, end = self._days.get(day, (0, 0))
+        return slice(start, end)
+
+_AXES: "OrderedDict[Tuple[int, Any, Any], TimeAxis]" = OrderedDict()
+_AXES_MAX = 256
+
+def time_axis(times: Sequence[str]) -> TimeAxis:
+    """
+    TimeAxis dùng chung cho một chuỗi time (get_weather, current, overview, rain, visibility
+    cùng nhận một list từ cùng forecast -> chỉ parse lần đầu).
+    """
+    key = (len(times), times[0] if times else None, times[-1] if times else None)
+    axis = _AXES.get(key)
+    if axis is not None and (axis.times is times or list(axis.times) == list(times)):
+        _AXES.move_to_end(key)
+        return axis
+    axis = TimeAxis(times)
+    _AXES[key] = axis
+    while len(_AXES) > _AXES_MAX:
+        _AXES.popitem(last=False)
+    return axis
+
+def _tolist(arr: np.ndarray, ndigits: int) -> List[Optional[float]]:
+    """Mảng -> list float Python đã làm tròn; NaN -> None."""
+    return [None if v != v else v for v in np.round(arr.astype(np.float64), ndigits).tolist()]
+
+def _scalar(v: Any, ndigits: int = 1) -> Optional[float]:
+    """Giá trị numpy -> float Python đã làm tròn; NaN -> None."""
+    if v is None:
+        return None
+    v = float(v)
+    return None if np.isnan(v) else round(v, ndigits)
+
+# --------------------------------------
+# Kernel tổng hợp hợp nhất
+#   một lượt trên ma trận biến × giờ -> count/sum/mean/min/max cho mọi biến
+#   cols: slice (cửa sổ liên tục) hoặc mask bool trên trục giờ
+# --------------------------------------
+STAT_KEYS = ("mean", "min", "max", "sum", "count")
+
+def aggregate(m: np.ndarray, cols: Union[slice, np.ndarray] = slice(None)) -> Dict[str, np.ndarray]:
+    block = m[:, cols]
+    valid = ~np.isnan(block)
+    count = valid.sum(axis=1)
+    filled = np.where(valid, block, 0.0).astype(np.float64, copy=False)
+    # cumsum cộng tuần tự (sum() của numpy cộng theo cặp -> lệch bit cuối so với Python)
+    total = filled.cumsum(axis=1)[:, -1] if block.shape[1] else np.zeros(block.shape[0])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+    return {
+        "count": count,
+        "sum": total,
+        "mean": mean,
+        "max": np.where(count > 0, np.where(valid, block, -np.inf).max(axis=1, initial=-np.inf), np.nan),
+        "min": np.where(count > 0, np.where(valid, block, np.inf).min(axis=1, initial=np.inf), np.nan),
+    }
+
+LOCAL_TZ = ZoneInfo("Asia/Ho_Chi_Minh")
+_NEXT_HOURS = re.compile(r"^next(\d+)h$")
+WINDOW_NAMES: Tuple[str, ...] = ("all", "today", "daylight", "nextNh")
+
+def is_window(name: str) -> bool:
+    """Tên cửa sổ thống kê hợp lệ cho Forecast.window (nextNh: N là số giờ, vd. next24h)."""
+    return name in ("all", "today", "daylight") or bool(_NEXT_HOURS.match(name))
+
+class Forecast:
+    __slots__ = (
+        "raw", "axis", "hourly_time", "hourly_fields", "hourly", "hourly_matrix",
+        "daily_time", "daily_fields", "daily", "daily_matrix",
+        "_rows", "_all", "_windows", "_rendered", "_sun",
+    )
+
+    def __init__(self, om: Dict[str, Any]):
+        self.raw = om
+        hourly = om.get("hourly", {}) or {}
+        daily = om.get("daily", {}) or {}
+
+        times = hourly.get("time")
+        self.axis = time_axis(times if isinstance(times, list) else [])
+        self.hourly_time = self.axis.values
+        self.hourly_fields: List[str] = [k for k in hourly if k != "time"]
+        self._rows: Dict[str, int] = {k: i for i, k in enumerate(self.hourly_fields)}
+        n = self.hourly_time.shape[0]
+        m = np.vstack([_column(hourly[k], n) for k in self.hourly_fields]) if self.hourly_fields else np.empty((0, n))
+
+        # sunrise/sunset là chuỗi giờ -> không đưa vào ma trận số
+        self.daily_time = _time_axis(daily.get("time"), "D")
+        self.daily_fields: List[str] = [k for k in daily if k not in ("time", "sunrise", "sunset")]
+        d = self.daily_time.shape[0]
+        self.daily_matrix = (np.vstack([_column(daily[k], d) for k in self.daily_fields]) if self.daily_fields else np.empty((0, d))).astype(np.float32)
+        self.daily: Dict[str, np.ndarray] = {k: self.daily_matrix[i] for i, k in enumerate(self.daily_fields)}
+
+        # Tổng hợp toàn chuỗi, một lượt cho mọi biến hourly
+        # (tính trên float64 trước khi ép float32 để làm tròn khớp phép cộng Python)
+        self._all = aggregate(m)
+        self._windows: Dict[Tuple[str, int, int], Dict[str, np.ndarray]] = {}
+        self._rendered: Dict[Tuple[Any, ...], Dict[str, Dict[str, Any]]] = {}
+        self._sun: Optional[List[Tuple[datetime.datetime, datetime.datetime]]] = None
+        self.hourly_matrix = m.astype(np.float32)
+        self.hourly: Dict[str, np.ndarray] = {k: self.hourly_matrix[i] for i, k in enumerate(self.hourly_fields)}
+
+    @classmethod
+    def from_openmeteo(cls, om: Dict[str, Any]) -> "Forecast":
+        return cls(om)
+
+    # ---------------- Hourly ----------------
+    def _row(self, field: str) -> Optional[int]:
+        return self._rows.get(field)
+
+    def hourly_mean(self, field: str) -> Optional[float]:
+        i = self._row(field)
+        return None if i is None else _scalar(self._all["mean"][i])
+
+    def hourly_max(self, field: str) -> Optional[float]:
+        i = self._row(field)
+        return None if i is None or self._all["count"][i] == 0 else float(self._all["max"][i])
+
+    def hourly_min(self, field: str) -> Optional[float]:
+        i = self._row(field)
+        return None if i is None or self._all["count"][i] == 0 else float(self._all["min"][i])
+
+    def hourly_sum(self, field: str) -> float:
+        i = self._row(field)
+        return 0.0 if i is None else float(self._all["sum"][i])
+
+    def hourly_means(self, fields: Sequence[str]) -> Dict[str, Optional[float]]:
+        return {f: self.hourly_mean(f) for f in fields}
+
+    def hour_index(self, now_utc: datetime.datetime) -> Optional[int]:
+        """Chỉ số giờ gần nhất với now_utc (trục hourly tính theo UTC)."""
+        return self.axis.nearest(now_utc)
+
+    def at(self, field: str, idx: Optional[int]) -> Optional[float]:
+        arr = self.hourly.get(field)
+        if arr is None or idx is None or not (0 <= idx < arr.shape[0]):
+            return None
+        return _scalar(arr[idx])
+
+    def hourly_day_slice(self, day: Union[str, datetime.date]) -> slice:
+        """Các giờ có ngày (theo chuỗi time gốc) = day, dưới dạng slice liên tục."""
+        return self.axis.day_slice(day)
+
+    # ---------------- Thống kê theo cửa sổ ----------------
+    def window(self, name: str, now: Optional[datetime.datetime] = None) -> slice:
+        """
+        Cửa sổ giờ theo tên:
+          - all: toàn chuỗi
+          - next24h / nextNh: N giờ kể từ giờ hiện tại
+          - today: ngày hôm nay theo giờ Việt Nam
+          - daylight: từ lúc mặt trời mọc tới lặn hôm nay
+        """
+        if name == "all":
+            return slice(0, len(self.axis))
+        now = now or datetime.datetime.now(LOCAL_TZ)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=datetime.timezone.utc)
+        m = _NEXT_HOURS.match(name)
+        if m:
+            start = self.hour_index(now) or 0
+            return slice(start, min(start + int(m.group(1)), len(self.axis)))
+        local = now.astimezone(LOCAL_TZ)
+        day_start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = day_start + datetime.timedelta(days=1)
+        if name == "today":
+            return self.axis.range_slice(day_start, day_end)
+        if name == "daylight":
+            sr_ss = self._sun_times(day_start, day_end)
+            return self.axis.range_slice(*sr_ss) if sr_ss else slice(0, 0)
+        raise ValueError(f"Cửa sổ thống kê không hợp lệ: {name}")
+
+    def _sun_times(self, day_start: datetime.datetime, day_end: datetime.datetime) -> Optional[Tuple[datetime.datetime, datetime.datetime]]:
+        if self._sun is None:
+            daily = self.raw.get("daily", {}) or {}
+            # sunrise/sunset của Open-Meteo cùng múi giờ với trục hourly (GMT khi không truyền timezone)
+            self._sun = []
+            for sr, ss in zip(daily.get("sunrise") or [], daily.get("sunset") or []):
+                try:
+                    self._sun.append((datetime.datetime.fromisoformat(sr), datetime.datetime.fromisoformat(ss)))
+                except (TypeError, ValueError):
+                    continue
+        lo = day_start.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        hi = day_end.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        pair = next(((sr, ss) for sr, ss in self._sun if lo <= sr < hi), None)
+        if pair is None:
+            if not self._sun:
+                return None
+            # Ngày GMT lệch ngày địa phương (VN sớm hơn 7 giờ) nên cặp của hôm nay có thể
+            # không nằm trong response -> dời cặp gần nhất theo số ngày nguyên (lệch vài phút)
+            sr, ss = min(self._sun, key=lambda p: abs(p[0] - lo))
+            shift = datetime.timedelta(days=math.ceil((lo - sr) / datetime.timedelta(days=1)))
+            pair = (sr + shift, ss + shift)
+        sr, ss = pair
+        # Theo ngày GMT, mặt trời lặn có thể ghi trước lúc mọc -> lấy lần lặn kế tiếp
+        while ss <= sr:
+            ss += datetime.timedelta(days=1)
+        return sr, ss
+
+    def window_stats(self, name: str, now: Optional[datetime.datetime] = None) -> Dict[str, np.ndarray]:
+        """Mảng count/sum/mean/min/max (theo thứ tự hourly_fields) cho cửa sổ, tính một lần rồi nhớ."""
+        if name == "all":
+            return self._all
+        sl = self.window(name, now)
+        key = (name, sl.start, sl.stop)
+        out = self._windows.get(key)
+        if out is None:
+            out = aggregate(self.hourly_matrix, sl)
+            self._windows[key] = out
+        return out
+
+    def stats(
+        self,
+        window: str = "all",
+        fields: Optional[Sequence[str]] = None,
+        now: Optional[datetime.datetime] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        {biến: {mean, min, max, sum, count}} cho cửa sổ; NaN -> None.
+        Kết quả được nhớ theo (cửa sổ, danh sách biến): coi như chỉ đọc.
+        """
+        sl = self.window(window, now)
+        fields = tuple(f for f in (fields or self.hourly_fields) if f in self._rows)
+        key = (window, sl.start, sl.stop, fields)
+        out = self._rendered.get(key)
+        if out is not None:
+            return out
+        agg = self._all if window == "all" else self.window_stats(window, now)
+        rows = [self._rows[f] for f in fields]
+        cols = {
+            "mean": _tolist(agg["mean"][rows], 1),
+            "min": _tolist(agg["min"][rows], 2),
+            "max": _tolist(agg["max"][rows], 2),
+            "sum": _tolist(agg["sum"][rows], 2),
+            "count": agg["count"][rows].tolist(),
+        }
+        out = {f: {k: cols[k][j] for k in STAT_KEYS} for j, f in enumerate(fields)}
+        self._rendered[key] = out
+        return out
+
+    # ---------------- Daily ----------------
+    def daily_first(self, field: str) -> Optional[float]:
+        arr = self.daily.get(field)
+        if arr is None or arr.shape[0] == 0:
+            return None
+        return _scalar(arr[0])
@@ -0,0 +1,352 @@
+# services/gazetteer.py
+import os
+import sys
+import mmap
+import array
+import struct
+import logging
+import unicodedata
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+from configs import APP_NAME, GAZETTEER_PATH, GAZETTEER_AUTOBUILD
+
+log = logging.getLogger(APP_NAME)
+
+# --------------------------------------
+# Gazetteer dạng cột (columnar), memory-map khi khởi động
+#   - mảng tọa độ lat/lon (float64), loại, id chuỗi
+#   - bảng chuỗi intern (utf-8) dùng chung
+#   - chỉ mục alias: bảng băm FNV-1a (tên chuẩn hóa -> danh sách id bản ghi)
+# File được build bởi build_gazetteer.py; nếu thiếu/cũ thì tự build từ
+# vietnam_provinces.py + vietnam_wards.py (chỉ import các module này khi đó).
+# --------------------------------------
+MAGIC = b"WWGZ"
+VERSION = 1
+# Mảng lưu theo byte order của máy build; bit cao đánh dấu big-endian
+_NATIVE_VERSION = VERSION | (0 if sys.byteorder == "little" else 0x80000000)
+NONE_ID = 0xFFFFFFFF
+
+TYPE_CODES = {"province": 0, "ward": 1}
+TYPE_NAMES = {v: k for k, v in TYPE_CODES.items()}
+
+# (tên section, typecode của array; None = bytes thô)
+SECTIONS: List[Tuple[str, Optional[str]]] = [
+    ("lat", "d"), ("lon", "d"), ("type", "B"),
+    ("key", "I"), ("name", "I"), ("province", "I"), ("code", "I"),
+    ("str_off", "I"), ("str_blob", None),
+    ("entry_key", "I"), ("entry_start", "I"), ("rids", "I"), ("slots", "I"),
+]
+_HEADER = struct.Struct("<4sIQ" + "QQ" * len(SECTIONS))
+
+PROVINCE_PREFIXES = ("thành phố ", "tỉnh ", "tp. ", "tp ")
+
+_SOURCES = ("vietnam_provinces.py", "vietnam_wards.py")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def normalize_name(s: str) -> str:
+    """Chuẩn hóa tên: NFC, chữ thường, gộp khoảng trắng."""
+    s = unicodedata.normalize("NFC", s or "")
+    return " ".join(s.lower().split())
+
+def _province_key(s: str) -> str:
+    """Tên tỉnh rút gọn để so khớp qualifier ('Tỉnh Gia Lai' ~ 'gia lai')."""
+    key = normalize_name(s)
+    for prefix in PROVINCE_PREFIXES:
+        if key.startswith(prefix):
+            return key[len(prefix):]
+    return key
+
+def _fnv1a(data: bytes) -> int:
+    h = 0x811C9DC5
+    for b in data:
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+def _source_signature() -> int:
+    """Chữ ký (mtime + size) của file nguồn, để biết file nhị phân đã cũ chưa."""
+    sig = 0
+    for fname in _SOURCES:
+        try:
+            st = os.stat(os.path.join(_ROOT, fname))
+        except OSError:
+            continue
+        sig = (sig * 1000003 + int(st.st_mtime) * 31 + st.st_size) & 0xFFFFFFFFFFFFFFFF
+    return sig
+
+# --------------------------------------
+# Build: dict Python -> bytes dạng cột
+# --------------------------------------
+def compile_gazetteer(provinces: Dict[str, Any], wards: Dict[str, Any], source_sig: int = 0) -> bytes:
+    strings: List[str] = []
+    sid: Dict[str, int] = {}
+
+    def intern(s: Optional[str]) -> int:
+        if s is None:
+            return NONE_ID
+        i = sid.get(s)
+        if i is None:
+            i = sid[s] = len(strings)
+            strings.append(s)
+        return i
+
+    cols: Dict[str, array.array] = {name: array.array(tc) for name, tc in SECTIONS if tc}
+    names: Dict[str, List[int]] = {}
+
+    def add_name(name: str, rid: int) -> None:
+        key = normalize_name(name)
+        if not key:
+            return
+        ids = names.setdefault(key, [])
+        if rid not in ids:
+            ids.append(rid)
+
+    def add(key: str, info: Dict[str, Any], name: str, province: str) -> None:
+        rid = len(cols["lat"])
+        cols["lat"].append(float(info["lat"]))
+        cols["lon"].append(float(info["lon"]))
+        cols["type"].append(TYPE_CODES.get(info.get("type"), 1))
+        cols["key"].append(intern(key))
+        cols["name"].append(intern(name))
+        cols["province"].append(intern(province))
+        code = info.get("code")
+        cols["code"].append(intern(str(code)) if code is not None else NONE_ID)
+        add_name(key, rid)
+        add_name(name, rid)
+        for alias in info.get("aliases", []):
+            add_name(alias, rid)
+
+    # Thứ tự giữ như get_all_locations(): tỉnh/thành trước, phường/xã sau
+    for key, info in provinces.items():
+        add(key, info, name=key, province=key)
+    for key, info in wards.items():
+        # Khóa phường/xã có dạng "Tên__Tỉnh/Thành"
+        name, _, province = key.partition("__")
+        add(key, info, name=name, province=province or info.get("admin1") or "")
+
+    # Bảng băm địa chỉ mở (open addressing), hệ số tải <= 0.5
+    n_slots = 1
+    while n_slots < 2 * max(1, len(names)):
+        n_slots <<= 1
+    cols["slots"].extend([NONE_ID] * n_slots)
+    for entry, (key, ids) in enumerate(names.items()):
+        raw = key.encode("utf-8")
+        cols["entry_key"].append(intern(key))
+        cols["entry_start"].append(len(cols["rids"]))
+        cols["rids"].extend(ids)
+        slot = _fnv1a(raw) & (n_slots - 1)
+        while cols["slots"][slot] != NONE_ID:
+            slot = (slot + 1) & (n_slots - 1)
+        cols["slots"][slot] = entry
+    cols["entry_start"].append(len(cols["rids"]))
+
+    # Bảng chuỗi: offset + blob utf-8
+    blob = bytearray()
+    for s in strings:
+        cols["str_off"].append(len(blob))
+        blob.extend(s.encode("utf-8"))
+    cols["str_off"].append(len(blob))
+
+    # Ghép các section, căn lề 8 byte
+    body = bytearray()
+    table: List[int] = []
+    for name, tc in SECTIONS:
+        while (_HEADER.size + len(body)) % 8:
+            body.append(0)
+        data = bytes(blob) if tc is None else cols[name].tobytes()
+        table.extend([_HEADER.size + len(body), len(data)])
+        body.extend(data)
+
+    header = _HEADER.pack(MAGIC, _NATIVE_VERSION, source_sig, *table)
+    return header + bytes(body)
+
+def write_gazetteer(path: str = GAZETTEER_PATH) -> str:
+    """Build file nhị phân từ vietnam_provinces/vietnam_wards (ghi nguyên tử)."""
+    from vietnam_provinces import PROVINCES
+    from vietnam_wards import WARDS
+
+    data = compile_gazetteer(PROVINCES, WARDS, source_sig=_source_signature())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return path
+
+# --------------------------------------
+# Đọc: view trực tiếp trên buffer (mmap hoặc bytes)
+# --------------------------------------
+class GazetteerData:
+    def __init__(self, buf, source: str = "memory"):
+        self.buf = buf
+        self.source = source
+        mv = memoryview(buf)
+        head = _HEADER.unpack_from(buf, 0)
+        magic, version, self.source_sig = head[0], head[1], head[2]
+        if magic != MAGIC or version != _NATIVE_VERSION:
+            raise ValueError("gazetteer: sai định dạng hoặc phiên bản")
+        offsets = head[3:]
+        self.cols: Dict[str, Any] = {}
+        for i, (name, tc) in enumerate(SECTIONS):
+            off, size = offsets[2 * i], offsets[2 * i + 1]
+            view = mv[off:off + size]
+            self.cols[name] = view if tc is None else view.cast(tc)
+        self.size = len(self.cols["lat"])
+        self.lat = self.cols["lat"]
+        self.lon = self.cols["lon"]
+        self.types = self.cols["type"]
+        self._n_slots = len(self.cols["slots"])
+
+    def string(self, i: int) -> Optional[str]:
+        if i == NONE_ID:
+            return None
+        off = self.cols["str_off"]
+        return bytes(self.cols["str_blob"][off[i]:off[i + 1]]).decode("utf-8")
+
+    def lookup_ids(self, key: str) -> List[int]:
+        """key đã chuẩn hóa -> danh sách id bản ghi (O(1) trung bình)."""
+        raw = key.encode("utf-8")
+        slots, entry_key, off, blob = self.cols["slots"], self.cols["entry_key"], self.cols["str_off"], self.cols["str_blob"]
+        mask = self._n_slots - 1
+        slot = _fnv1a(raw) & mask
+        while True:
+            entry = slots[slot]
+            if entry == NONE_ID:
+                return []
+            s = entry_key[entry]
+            if blob[off[s]:off[s + 1]] == raw:
+                start, stop = self.cols["entry_start"][entry], self.cols["entry_start"][entry + 1]
+                return list(self.cols["rids"][start:stop])
+            slot = (slot + 1) & mask
+
+    def record(self, rid: int) -> Dict[str, Any]:
+        c = self.cols
+        return {
+            "id": rid,
+            "key": self.string(c["key"][rid]),
+            "name": self.string(c["name"][rid]),
+            "province": self.string(c["province"][rid]),
+            "type": TYPE_NAMES.get(c["type"][rid], "ward"),
+            "lat": c["lat"][rid],
+            "lon": c["lon"][rid],
+            "code": self.string(c["code"][rid]),
+        }
+
+    def name_count(self) -> int:
+        return len(self.cols["entry_key"])
+
+    def ambiguous_count(self) -> int:
+        starts = self.cols["entry_start"]
+        return sum(1 for i in range(len(starts) - 1) if starts[i + 1] - starts[i] > 1)
+
+def open_gazetteer(path: str) -> Optional[GazetteerData]:
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = GazetteerData(mm, source=path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if data.source_sig != _source_signature():
+        return None
+    return data
+
+# --------------------------------------
+# Nạp lười, một lần cho mỗi process
+# --------------------------------------
+_data: Optional[GazetteerData] = None
+
+def build_index() -> GazetteerData:
+    """Memory-map file gazetteer; thiếu/cũ thì build lại (hoặc build trong bộ nhớ)."""
+    global _data
+    if _data is not None:
+        return _data
+
+    data = open_gazetteer(GAZETTEER_PATH)
+    if data is None and GAZETTEER_AUTOBUILD:
+        try:
+            write_gazetteer(GAZETTEER_PATH)
+            log.info(f"🗂️ Đã build gazetteer: {GAZETTEER_PATH}")
+            data = open_gazetteer(GAZETTEER_PATH)
+        except OSError as e:
+            log.warning(f"⚠️ Không ghi được {GAZETTEER_PATH}: {e}")
+    if data is None:
+        from vietnam_provinces import PROVINCES
+        from vietnam_wards import WARDS
+        data = GazetteerData(compile_gazetteer(PROVINCES, WARDS))
+    _data = data
+    return _data
+
+def stats() -> Dict[str, Any]:
+    d = build_index()
+    n_prov = sum(1 for t in d.types if t == TYPE_CODES["province"])
+    return {
+        "records": d.size,
+        "provinces": n_prov,
+        "wards": d.size - n_prov,
+        "names": d.name_count(),
+        "ambiguous_names": d.ambiguous_count(),
+        "source": d.source,
+        "bytes": len(d.buf),
+    }
+
+# --------------------------------------
+# Tra cứu
+# --------------------------------------
+def to_location(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """Bản ghi chỉ mục -> dict địa danh cùng định dạng geocode_region trả về."""
+    return {
+        "id": rec["id"],
+        "name": rec["key"],
+        "latitude": rec["lat"],
+        "longitude": rec["lon"],
+        "country": "Việt Nam",
+        "admin1": rec["province"] or rec["key"],
+        "type": rec["type"],
+    }
+
+def get_record(rid: int) -> Dict[str, Any]:
+    return build_index().record(rid)
+
+def records() -> List[Dict[str, Any]]:
+    d = build_index()
+    return [d.record(i) for i in range(d.size)]
+
+def points(kind: str = "all") -> Iterator[Tuple[int, float, float]]:
+    """(id, lat, lon) đọc thẳng từ mảng cột, không dựng dict; kind: 'ward' | 'province' | 'all'."""
+    d = build_index()
+    code = TYPE_CODES.get(kind)
+    for i in range(d.size):
+        if code is None or d.types[i] == code:
+            yield i, d.lat[i], d.lon[i]
+
+def lookup(query: str) -> List[Dict[str, Any]]:
+    """
+    Trả về mọi bản ghi khớp tên/alias (O(1)).
+    Hỗ trợ qualifier tỉnh: "Phường An Bình, Cần Thơ" hoặc "Phường An Bình__Thành phố Cần Thơ".
+    """
+    d = build_index()
+    key = normalize_name(query)
+    if not key:
+        return []
+
+    ids = d.lookup_ids(key)
+    if ids:
+        return [d.record(i) for i in ids]
+
+    # Tách qualifier tỉnh ở phần cuối và lọc ứng viên theo tỉnh
+    for sep in ("__", ","):
+        if sep in key:
+            name, _, province = key.rpartition(sep)
+            pkey = _province_key(province)
+            cands = [d.record(i) for i in d.lookup_ids(normalize_name(name))]
+            return [r for r in cands if _province_key(r["province"]) == pkey]
+    return []
+
+def lookup_one(query: str) -> Optional[Dict[str, Any]]:
+    """Ứng viên đầu tiên (thứ tự ổn định) kèm danh sách ứng viên nếu tên bị trùng."""
+    cands = lookup(query)
+    if not cands:
+        return None
+    loc = to_location(cands[0])
+    if len(cands) > 1:
+        loc["candidates"] = [to_location(r) for r in cands]
+    return loc
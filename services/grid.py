@@ -0,0 +1,72 @@
+# services/grid.py
+import math
+from typing import Dict, Any, Tuple
+
+from configs import FORECAST_SNAP_MODE, FORECAST_GRID_RESOLUTION_DEG, FORECAST_GEOHASH_PRECISION
+
+# --------------------------------------
+# Snap tọa độ về ô lưới dự báo
+#   Lưới model Open-Meteo thô hơn tọa độ phường/xã, nên các điểm cùng ô
+#   dùng chung một key cache + một response upstream (gọi tại tâm ô).
+#   FORECAST_SNAP_MODE: "grid" (theo độ) | "geohash" | "none"
+# --------------------------------------
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+def geohash_encode(lat: float, lon: float, precision: int = FORECAST_GEOHASH_PRECISION) -> str:
+    lat_rng, lon_rng = [-90.0, 90.0], [-180.0, 180.0]
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        rng, val = (lon_rng, lon) if even else (lat_rng, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if val >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+def geohash_bounds(gh: str) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lon_min, lon_max) của ô geohash."""
+    lat_rng, lon_rng = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for c in gh:
+        v = _DECODE[c]
+        for shift in range(4, -1, -1):
+            rng = lon_rng if even else lat_rng
+            mid = (rng[0] + rng[1]) / 2
+            if (v >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_rng[0], lat_rng[1], lon_rng[0], lon_rng[1]
+
+def snap(lat: float, lon: float) -> Tuple[float, float, str]:
+    """Trả về (lat tâm ô, lon tâm ô, id ô)."""
+    lat, lon = float(lat), float(lon)
+    if FORECAST_SNAP_MODE == "geohash":
+        gh = geohash_encode(lat, lon, FORECAST_GEOHASH_PRECISION)
+        la0, la1, lo0, lo1 = geohash_bounds(gh)
+        return round((la0 + la1) / 2, 5), round((lo0 + lo1) / 2, 5), f"gh:{gh}"
+    if FORECAST_SNAP_MODE == "grid" and FORECAST_GRID_RESOLUTION_DEG > 0:
+        res = FORECAST_GRID_RESOLUTION_DEG
+        row, col = math.floor(lat / res), math.floor(lon / res)
+        return round((row + 0.5) * res, 5), round((col + 0.5) * res, 5), f"g{res}:{row}:{col}"
+    # "none": chỉ chuẩn hóa 4 chữ số (~11 m)
+    la, lo = round(lat, 4), round(lon, 4)
+    return la, lo, f"pt:{la}:{lo}"
+
+def snap_info() -> Dict[str, Any]:
+    """Độ phân giải snap hiện tại (đưa vào metadata của response)."""
+    if FORECAST_SNAP_MODE == "geohash":
+        return {"mode": "geohash", "precision": FORECAST_GEOHASH_PRECISION}
+    if FORECAST_SNAP_MODE == "grid" and FORECAST_GRID_RESOLUTION_DEG > 0:
+        return {"mode": "grid", "resolution_deg": FORECAST_GRID_RESOLUTION_DEG}
+    return {"mode": "none", "resolution_deg": 0.0001}
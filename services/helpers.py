@@ -1,6 +1,5 @@
 # services/helpers.py
 import time
-import hashlib
 import requests
 import asyncio
 from typing import Dict, Any, Optional
@@ -8,27 +7,26 @@ from typing import Dict, Any, Optional
 from configs import (
     OPEN_METEO_GEOCODE, OPEN_METEO_REVERSE,
     CACHE_TTL_SECONDS,
-    REQUEST_TIMEOUT
+    REQUEST_TIMEOUT,
+    REVERSE_MAX_RADIUS_KM
 )
 
 from services.weather_sources import get_weather
-from vietnam_provinces import PROVINCES
-from vietnam_wards import WARDS
+from services import http_client
+from services import gazetteer
+from services import spatial_index
+from services.cache import FORECAST_CACHE, hash_key
 
 # --------------------------------------
-# Cache đơn giản trong bộ nhớ
+# Cache trong bộ nhớ (dùng chung với cache dự báo: LRU, có giới hạn)
 # --------------------------------------
-CACHE: Dict[str, Dict[str, Any]] = {}
+CACHE = FORECAST_CACHE
 
 def cache_get(key: str) -> Optional[Dict[str, Any]]:
-    item = CACHE.get(key)
-    if not item or time.time() - item["ts"] > CACHE_TTL_SECONDS:
-        CACHE.pop(key, None)
-        return None
-    return item["data"]
+    return CACHE.get(key)
 
-def cache_set(key: str, data: Dict[str, Any]) -> None:
-    CACHE[key] = {"ts": time.time(), "data": data}
+def cache_set(key: str, data: Dict[str, Any], expires_at: Optional[float] = None) -> None:
+    CACHE.set(key, data, expires_at if expires_at is not None else time.time() + CACHE_TTL_SECONDS)
 
 # --------------------------------------
 # Helpers
@@ -36,67 +34,88 @@ def cache_set(key: str, data: Dict[str, Any]) -> None:
 def normalize(s: str) -> str:
     return (s or "").strip().lower()
 
-def hash_key(*parts: Any) -> str:
-    return hashlib.md5(",".join(map(str, parts)).encode("utf-8")).hexdigest()
-
-def request_json(url: str, params: Dict[str, Any], timeout: int = 12) -> Dict[str, Any]:
+def request_json(url: str, params: Dict[str, Any], timeout: int = REQUEST_TIMEOUT) -> Dict[str, Any]:
     r = requests.get(url, params=params, headers={"Accept": "application/json"}, timeout=timeout)
     r.raise_for_status()
     return r.json()
 
+async def request_json_async(url: str, params: Dict[str, Any], timeout: int = REQUEST_TIMEOUT) -> Dict[str, Any]:
+    """Phiên bản async của request_json, đi qua HTTP client dùng chung (không chặn event loop)."""
+    return await http_client.get_json(url, params=params, timeout=timeout)
+
 # --------------------------------------
 # Gom tất cả địa danh
+# (import dict gốc khi thật sự cần; đường chạy chính dùng gazetteer mmap)
 # --------------------------------------
 def get_all_locations() -> Dict[str, Any]:
+    from vietnam_provinces import PROVINCES
+    from vietnam_wards import WARDS
+
     all_locations = {}
     all_locations.update(PROVINCES)
     all_locations.update(WARDS)
     return all_locations
 
 def log_locations_summary(log):
-    all_locations = get_all_locations()
-    log.info(f"📍 Tổng số địa danh sau khi gộp: {len(all_locations)}")
-    log.info(f"📍 PROVINCES: {len(PROVINCES)}")
-    log.info(f"📍 WARDS: {len(WARDS)}")
-    sample_names = list(all_locations.keys())[:10]
+    gz = gazetteer.stats()
+    log.info(f"📍 Tổng số địa danh sau khi gộp: {gz['records']}")
+    log.info(f"📍 PROVINCES: {gz['provinces']}")
+    log.info(f"📍 WARDS: {gz['wards']}")
+    sample_names = [gazetteer.get_record(i)["key"] for i in range(min(10, gz["records"]))]
     log.debug(f"Ví dụ 10 địa danh đầu tiên: {sample_names}")
 
 # --------------------------------------
 # Geocode địa danh
 # --------------------------------------
-def geocode_region(region: str) -> Dict[str, Any]:
+def _parse_coords(region: str) -> Optional[Dict[str, Any]]:
     rgn = (region or "").strip()
+    if "," not in rgn:
+        return None
+    try:
+        la, lo = [float(x) for x in rgn.split(",")]
+    except Exception:
+        return None
+    return {
+        "name": "Tọa độ",
+        "latitude": la,
+        "longitude": lo,
+        "country": "Việt Nam",
+        "admin1": ""
+    }
+
+def _geocode_local(region: str) -> Optional[Dict[str, Any]]:
+    """Tra trong danh sách địa danh có sẵn (tọa độ hoặc tên/alias)."""
+    coords = _parse_coords(region)
+    if coords is not None:
+        return coords
 
-    if "," in rgn:
-        try:
-            la, lo = [float(x) for x in rgn.split(",")]
-            return {
-                "name": "Tọa độ",
-                "latitude": la,
-                "longitude": lo,
-                "country": "Việt Nam",
-                "admin1": ""
-            }
-        except Exception:
-            pass
-
-    key = normalize(region)
-    for name, info in get_all_locations().items():
-        if key == normalize(name) or key in [normalize(a) for a in info.get("aliases", [])]:
-            return {
-                "name": name,
-                "latitude": info["lat"],
-                "longitude": info["lon"],
-                "country": "Việt Nam",
-                "admin1": info.get("admin1") or name
-            }
-
-    j = request_json(OPEN_METEO_GEOCODE, {"name": region, "language": "vi", "count": 1})
+    # Chỉ mục gazetteer: O(1) theo tên/alias, trả kèm mọi ứng viên trùng tên
+    return gazetteer.lookup_one(region)
+
+def _geocode_params(region: str) -> Dict[str, Any]:
+    return {"name": region, "language": "vi", "count": 1}
+
+def _first_geocode_result(j: Dict[str, Any]) -> Dict[str, Any]:
     res = j.get("results") or []
     if not res:
         raise ValueError("Không tìm thấy địa danh")
     return res[0]
 
+def geocode_region(region: str) -> Dict[str, Any]:
+    loc = _geocode_local(region)
+    if loc is not None:
+        return loc
+    j = request_json(OPEN_METEO_GEOCODE, _geocode_params(region))
+    return _first_geocode_result(j)
+
+async def geocode_region_async(region: str) -> Dict[str, Any]:
+    """Như geocode_region nhưng gọi Open-Meteo Geocoding qua client async."""
+    loc = _geocode_local(region)
+    if loc is not None:
+        return loc
+    j = await request_json_async(OPEN_METEO_GEOCODE, _geocode_params(region))
+    return _first_geocode_result(j)
+
 # -------------------------------
 # Forecast hợp nhất (đồng bộ với weather_sources)
 # -------------------------------
@@ -222,25 +241,38 @@ async def fetch_forecast_combined(lat: float, lon: float) -> dict:
 # --------------------------------------
 # Reverse Geocode
 # --------------------------------------
+def _reverse_local(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    """Phường/xã gần nhất (haversine) trong bán kính REVERSE_MAX_RADIUS_KM."""
+    return spatial_index.nearest_place(lat, lon, max_km=REVERSE_MAX_RADIUS_KM)
+
+def _reverse_params(lat: float, lon: float) -> Dict[str, Any]:
+    return {"latitude": lat, "longitude": lon, "language": "vi", "count": 1}
+
+def _first_reverse_result(j: Dict[str, Any]) -> Dict[str, Any]:
+    res = j.get("results") or []
+    if not res:
+        raise ValueError("Không tìm thấy địa danh cho tọa độ đã cho")
+    return res[0]
+
 def reverse_geocode(lat: float, lon: float) -> Dict[str, Any]:
-    for name, info in get_all_locations().items():
-        if abs(info["lat"] - lat) < 0.001 and abs(info["lon"] - lon) < 0.001:
-            return {
-                "name": name,
-                "latitude": info["lat"],
-                "longitude": info["lon"],
-                "country": "Việt Nam",
-                "admin1": info.get("admin1") or name
-            }
+    loc = _reverse_local(lat, lon)
+    if loc is not None:
+        return loc
+
+    try:
+        j = request_json(OPEN_METEO_REVERSE, _reverse_params(lat, lon))
+        return _first_reverse_result(j)
+    except Exception as e:
+        return {"error": str(e)}
+
+async def reverse_geocode_async(lat: float, lon: float) -> Dict[str, Any]:
+    """Như reverse_geocode nhưng gọi Open-Meteo Reverse qua client async."""
+    loc = _reverse_local(lat, lon)
+    if loc is not None:
+        return loc
 
     try:
-        j = request_json(
-            OPEN_METEO_REVERSE,
-            {"latitude": lat, "longitude": lon, "language": "vi", "count": 1}
-        )
-        res = j.get("results") or []
-        if not res:
-            raise ValueError("Không tìm thấy địa danh cho tọa độ đã cho")
-        return res[0]
+        j = await request_json_async(OPEN_METEO_REVERSE, _reverse_params(lat, lon))
+        return _first_reverse_result(j)
     except Exception as e:
         return {"error": str(e)}
\ No newline at end of file
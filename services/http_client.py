@@ -0,0 +1,141 @@
+# services/http_client.py
+import time
+import logging
+from typing import Dict, Any, Optional
+
+import httpx
+
+from services import jsonio
+from configs import (
+    APP_NAME,
+    REQUEST_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP2_ENABLED,
+)
+
+log = logging.getLogger(APP_NAME)
+
+# --------------------------------------
+# Client dùng chung cho toàn bộ ứng dụng
+# (tạo trong lifespan, dùng lại kết nối keep-alive)
+# --------------------------------------
+_client: Optional[httpx.AsyncClient] = None
+
+_stats: Dict[str, Any] = {
+    "requests": 0,
+    "errors": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "total_time_ms": 0.0,
+    "clients_created": 0,
+}
+
+def _http2_available() -> bool:
+    """HTTP/2 cần gói h2 (httpx[http2]); thiếu thì quay về HTTP/1.1."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _create_client() -> httpx.AsyncClient:
+    http2 = HTTP2_ENABLED and _http2_available()
+    if HTTP2_ENABLED and not http2:
+        log.warning("⚠️ HTTP2_ENABLED=true nhưng thiếu gói h2, dùng HTTP/1.1")
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    _stats["clients_created"] += 1
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(REQUEST_TIMEOUT),
+        limits=limits,
+        http2=http2,
+        headers={"Accept": "application/json"},
+    )
+
+async def startup() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+        log.info(
+            f"✅ HTTP client: max_connections={HTTP_MAX_CONNECTIONS}, "
+            f"keepalive={HTTP_MAX_KEEPALIVE_CONNECTIONS}, http2={HTTP2_ENABLED and _http2_available()}"
+        )
+    return _client
+
+async def shutdown() -> None:
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+def get_client() -> httpx.AsyncClient:
+    """Trả về client dùng chung; tạo lười nếu chạy ngoài lifespan (script, test)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+# --------------------------------------
+# Gọi upstream qua client dùng chung
+# --------------------------------------
+async def get(url: str, params: Dict[str, Any] = None, timeout: float = None) -> httpx.Response:
+    client = get_client()
+    _stats["requests"] += 1
+    _stats["in_flight"] += 1
+    _stats["max_in_flight"] = max(_stats["max_in_flight"], _stats["in_flight"])
+    started = time.perf_counter()
+    try:
+        kwargs: Dict[str, Any] = {"params": params}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        resp = await client.get(url, **kwargs)
+        resp.raise_for_status()
+        return resp
+    except Exception:
+        _stats["errors"] += 1
+        raise
+    finally:
+        _stats["in_flight"] -= 1
+        _stats["total_time_ms"] += (time.perf_counter() - started) * 1000.0
+
+async def get_json(url: str, params: Dict[str, Any] = None, timeout: float = None) -> Any:
+    resp = await get(url, params=params, timeout=timeout)
+    return jsonio.loads(resp.content)
+
+# --------------------------------------
+# Thống kê pool (hiển thị ở /v1/stats)
+# --------------------------------------
+def pool_stats() -> Dict[str, Any]:
+    out: Dict[str, Any] = dict(_stats)
+    out["avg_time_ms"] = round(_stats["total_time_ms"] / _stats["requests"], 1) if _stats["requests"] else None
+    out["total_time_ms"] = round(_stats["total_time_ms"], 1)
+    out["limits"] = {
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "keepalive_expiry": HTTP_KEEPALIVE_EXPIRY,
+        "http2": HTTP2_ENABLED and _http2_available(),
+    }
+
+    # Trạng thái kết nối trong pool (httpcore), bỏ qua nếu API nội bộ thay đổi
+    connections = active = idle = None
+    try:
+        pool = _client._transport._pool if _client is not None else None
+        if pool is not None:
+            conns = list(pool.connections)
+            connections = len(conns)
+            idle = sum(1 for c in conns if c.is_idle())
+            active = connections - idle
+    except Exception:
+        pass
+    out["pool"] = {
+        "open": _client is not None and not _client.is_closed,
+        "connections": connections,
+        "active": active,
+        "idle": idle,
+    }
+    return out
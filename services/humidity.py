@@ -1,6 +1,10 @@
 # services/humidity.py
 from typing import Dict, Any, List, Tuple, Optional
 
+import numpy as np
+
+from services.rules import Scale
+
 # -------------------------------
 # Chuẩn hóa dữ liệu
 # -------------------------------
@@ -18,18 +22,19 @@ def _round1(val: Optional[float]) -> Optional[float]:
 # -------------------------------
 # Phân loại mức độ độ ẩm
 # -------------------------------
+HUMIDITY_LEVELS = Scale([
+    (">=", 90, "💧 Độ ẩm rất cao (≥90%), dễ nồm ẩm, không khí bí, đồ đạc ẩm mốc."),
+    (">=", 70, "💧 Độ ẩm cao (≥70%), cảm giác ẩm ướt, khó thoát mồ hôi."),
+    ("<=", 30, "🔥 Độ ẩm thấp (≤30%), dễ khô da, tăng nguy cơ kích ứng."),
+], default="🙂 Độ ẩm ở mức trung bình, tương đối dễ chịu.")
+
 def classify_humidity(rh: Any) -> Optional[str]:
     """Phân loại độ ẩm theo ngưỡng %."""
-    r = _to_float(rh)
-    if r is None:
-        return None
-    if r >= 90:
-        return "💧 Độ ẩm rất cao (≥90%), dễ nồm ẩm, không khí bí, đồ đạc ẩm mốc."
-    if r >= 70:
-        return "💧 Độ ẩm cao (≥70%), cảm giác ẩm ướt, khó thoát mồ hôi."
-    if r <= 30:
-        return "🔥 Độ ẩm thấp (≤30%), dễ khô da, tăng nguy cơ kích ứng."
-    return "🙂 Độ ẩm ở mức trung bình, tương đối dễ chịu."
+    return HUMIDITY_LEVELS.text(_to_float(rh))
+
+def classify_humidity_codes(rh: Any) -> np.ndarray:
+    """Mã mức độ ẩm cho cả mảng % (xem HUMIDITY_LEVELS.legend()), NaN/None -> -1."""
+    return HUMIDITY_LEVELS.codes(rh)
 
 # -------------------------------
 # Điều chỉnh cảm giác theo độ ẩm và vùng miền
@@ -0,0 +1,106 @@
+# services/jsonio.py
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+from configs import APP_NAME, JSON_BACKEND
+
+log = logging.getLogger(APP_NAME)
+
+try:
+    import numpy as np
+except ImportError:  # numpy là tùy chọn với module này
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# --------------------------------------
+# Chuyển kiểu không chuẩn JSON (NumPy, set, ...)
+# --------------------------------------
+def _default(obj: Any) -> Any:
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.floating):
+            v = float(obj)
+            return None if v != v else v
+        if isinstance(obj, np.integer):
+            return int(obj)
+        if isinstance(obj, np.bool_):
+            return bool(obj)
+        if isinstance(obj, np.datetime64):
+            return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Không serialize được kiểu {type(obj).__name__}")
+
+# --------------------------------------
+# Backend: orjson > msgspec > json (chọn qua JSON_BACKEND, mặc định auto)
+#   loads(bytes | str) -> object,  dumps(object) -> bytes
+# --------------------------------------
+def _orjson_backend() -> Dict[str, Callable[..., Any]]:
+    opts = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    return {
+        "loads": orjson.loads,
+        "dumps": lambda obj: orjson.dumps(obj, default=_default, option=opts),
+    }
+
+def _msgspec_backend() -> Dict[str, Callable[..., Any]]:
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    decoder = msgspec.json.Decoder()
+    return {"loads": decoder.decode, "dumps": encoder.encode}
+
+def _json_backend() -> Dict[str, Callable[..., Any]]:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return {"loads": json.loads, "dumps": dumps}
+
+_BACKENDS = {
+    "orjson": (lambda: orjson is not None, _orjson_backend),
+    "msgspec": (lambda: msgspec is not None, _msgspec_backend),
+    "json": (lambda: True, _json_backend),
+}
+
+def _select(name: str) -> str:
+    if name != "auto":
+        available, _ = _BACKENDS.get(name, (lambda: False, None))
+        if available():
+            return name
+        log.warning(f"⚠️ JSON_BACKEND={name} không dùng được, tự chọn backend khác")
+    return next(n for n, (available, _) in _BACKENDS.items() if available())
+
+BACKEND: str = _select(JSON_BACKEND)
+_impl = _BACKENDS[BACKEND][1]()
+
+loads: Callable[[Any], Any] = _impl["loads"]
+dumps: Callable[[Any], bytes] = _impl["dumps"]
+
+def use(name: str) -> str:
+    """Đổi backend lúc chạy (benchmark / thử nghiệm); trả về backend thực dùng."""
+    global BACKEND, _impl, loads, dumps
+    BACKEND = _select(name)
+    _impl = _BACKENDS[BACKEND][1]()
+    loads, dumps = _impl["loads"], _impl["dumps"]
+    return BACKEND
+
+def available() -> Dict[str, bool]:
+    return {n: bool(available()) for n, (available, _) in _BACKENDS.items()}
+
+# --------------------------------------
+# Response class cho FastAPI: encode bằng backend nhanh, hỗ trợ NumPy
+# --------------------------------------
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,67 @@
+# services/matcher.py
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# --------------------------------------
+# Khớp nhiều từ khóa một lượt (Aho-Corasick)
+#   entries: [(các từ khóa, giá trị), ...] theo thứ tự ưu tiên; entry i <-> bit i
+#   Dựng một lần: trie + liên kết fail, rồi "làm phẳng" thành DFA
+#     (mỗi trạng thái chỉ giữ các cạnh không về gốc -> ký tự lạ = về gốc)
+#   Quét: một lượt trên text.lower(), OR mặt nạ đầu ra của từng trạng thái
+#   -> biết mọi entry có từ khóa xuất hiện (kể cả từ khóa chồng lên nhau)
+# --------------------------------------
+class KeywordMatcher:
+    def __init__(self, entries: Sequence[Tuple[Iterable[str], Any]]):
+        self.values: List[Any] = [value for _, value in entries]
+        goto: List[Dict[str, int]] = [{}]
+        out: List[int] = [0]
+        for i, (keywords, _) in enumerate(entries):
+            for kw in keywords:
+                kw = kw.lower()
+                if not kw:
+                    continue
+                s = 0
+                for ch in kw:
+                    nxt = goto[s].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[s][ch] = nxt
+                        goto.append({})
+                        out.append(0)
+                    s = nxt
+                out[s] |= 1 << i
+
+        # BFS: fail[s] = trạng thái ứng với hậu tố dài nhất của s cũng là tiền tố trong trie
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            out[s] |= out[fail[s]]
+            delta[s] = {**delta[fail[s]], **goto[s]}
+            for ch, nxt in goto[s].items():
+                fail[nxt] = delta[fail[s]].get(ch, 0)
+                queue.append(nxt)
+        self._delta = delta
+        self._out = out
+
+    def mask(self, text: Optional[str]) -> int:
+        """Mặt nạ bit các entry khớp (không phân biệt hoa thường)."""
+        if not text:
+            return 0
+        delta, out = self._delta, self._out
+        s = m = 0
+        for ch in text.lower():
+            s = delta[s].get(ch, 0)
+            m |= out[s]
+        return m
+
+    def all(self, text: Optional[str]) -> List[Any]:
+        """Giá trị mọi entry khớp, theo thứ tự entries."""
+        m = self.mask(text)
+        return [v for i, v in enumerate(self.values) if m >> i & 1]
+
+    def first(self, text: Optional[str], default: Any = None) -> Any:
+        """Giá trị entry khớp có ưu tiên cao nhất (như một chuỗi if/elif)."""
+        m = self.mask(text)
+        return self.values[(m & -m).bit_length() - 1] if m else default
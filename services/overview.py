@@ -19,6 +19,7 @@ from services.solar_uv import (
     _format_uv_avg,
     _format_uv_max,
 )
+from services.forecast import time_axis
 
 def _to_float(val: Any) -> Optional[float]:
     try:
@@ -71,11 +72,7 @@ def build_overview_block(
             times = hourly.get("series", {}).get("time", [])
             precips = hourly.get("series", {}).get("precipitation", [])
             today_str = datetime.datetime.now(ZoneInfo("Asia/Ho_Chi_Minh")).date().isoformat()
-            today_precips = [
-                _to_float(v) or 0.0
-                for i, v in enumerate(precips)
-                if i < len(times) and isinstance(times[i], str) and times[i].startswith(today_str)
-            ]
+            today_precips = [_to_float(v) or 0.0 for v in precips[time_axis(times).day_slice(today_str)]]
             rain_sum = sum(today_precips) if today_precips else None
         except Exception:
             rain_sum = None
@@ -91,8 +88,8 @@ def build_overview_block(
     if hours_count == 0:
         times = hourly.get("series", {}).get("time", [])
         today_str = datetime.datetime.now(ZoneInfo("Asia/Ho_Chi_Minh")).date().isoformat()
-        def day_of(t): return t[:10] if isinstance(t, str) and len(t) >= 10 else None
-        hours_count = sum(1 for t in times if day_of(t) == today_str)
+        day = time_axis(times).day_slice(today_str)
+        hours_count = day.stop - day.start
 
     avg_precipitation_day = None
     if rain_sum is not None and hours_count > 0:
@@ -107,11 +104,7 @@ def build_overview_block(
             times = hourly.get("series", {}).get("time", [])
             probs = hourly.get("series", {}).get("precipitation_probability", [])
             today_str = datetime.datetime.now(ZoneInfo("Asia/Ho_Chi_Minh")).date().isoformat()
-            today_probs = [
-                _to_float(v) or 0.0
-                for i, v in enumerate(probs)
-                if i < len(times) and isinstance(times[i], str) and times[i].startswith(today_str)
-            ]
+            today_probs = [_to_float(v) or 0.0 for v in probs[time_axis(times).day_slice(today_str)]]
             if today_probs:
                 precip_prob_day = sum(today_probs) / len(today_probs)
         except Exception:
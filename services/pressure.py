@@ -1,6 +1,10 @@
 # services/pressure.py
 from typing import Dict, Any, List, Tuple, Optional
 
+import numpy as np
+
+from services.rules import Scale
+
 # -------------------------------
 # Chuẩn hóa dữ liệu
 # -------------------------------
@@ -18,23 +22,29 @@ def _round1(val: Optional[float]) -> Optional[float]:
 # -------------------------------
 # Phân loại mức độ áp suất
 # -------------------------------
+# Mã 0 = áp cao, 1 = áp thấp, 2 = trung bình (câu khác nhau theo vùng, mã trùng nghĩa)
+PRESSURE_LEVELS: Dict[str, Scale] = {
+    "north": Scale([
+        (">=", 1025, "⚖️ Áp suất cao (≥1025 hPa), thời tiết thường ổn định, trời quang."),
+        ("<=", 1000, "⚠️ Áp suất thấp (≤1000 hPa), dễ xuất hiện mưa, dông hoặc thời tiết bất ổn."),
+    ], default="🙂 Áp suất ở mức trung bình, thời tiết tương đối ổn định."),
+    # central_south: ngưỡng cao thấp hơn, ngưỡng thấp cao hơn một chút
+    "central_south": Scale([
+        (">=", 1020, "⚖️ Áp suất cao (≥1020 hPa), thời tiết thường ổn định."),
+        ("<=", 1005, "⚠️ Áp suất thấp (≤1005 hPa), dễ xuất hiện mưa, dông."),
+    ], default="🙂 Áp suất ở mức trung bình, thời tiết tương đối ổn định."),
+}
+
+def _pressure_levels(region: str) -> Scale:
+    return PRESSURE_LEVELS["north" if region == "north" else "central_south"]
+
 def classify_pressure(pmsl: Any, region: str = "north") -> Optional[str]:
     """Phân loại áp suất khí quyển theo ngưỡng hPa, có xét vùng miền."""
-    p = _to_float(pmsl)
-    if p is None:
-        return None
+    return _pressure_levels(region).text(_to_float(pmsl))
 
-    if region == "north":
-        if p >= 1025:
-            return "⚖️ Áp suất cao (≥1025 hPa), thời tiết thường ổn định, trời quang."
-        if p <= 1000:
-            return "⚠️ Áp suất thấp (≤1000 hPa), dễ xuất hiện mưa, dông hoặc thời tiết bất ổn."
-    else:  # central_south
-        if p >= 1020:  # ngưỡng thấp hơn một chút
-            return "⚖️ Áp suất cao (≥1020 hPa), thời tiết thường ổn định."
-        if p <= 1005:  # ngưỡng cao hơn một chút
-            return "⚠️ Áp suất thấp (≤1005 hPa), dễ xuất hiện mưa, dông."
-    return "🙂 Áp suất ở mức trung bình, thời tiết tương đối ổn định."
+def classify_pressure_codes(pmsl: Any, region: str = "north") -> np.ndarray:
+    """Mã mức áp suất cho cả mảng hPa (xem PRESSURE_LEVELS[...].legend()), NaN/None -> -1."""
+    return _pressure_levels(region).codes(pmsl)
 
 # -------------------------------
 # Hàm tổng hợp cho bulletin 
@@ -0,0 +1,152 @@
+# services/prewarm.py
+import time
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from configs import (
+    APP_NAME,
+    PREWARM_ENABLED,
+    PREWARM_TOP_WARDS,
+    PREWARM_CONCURRENCY,
+    PREWARM_RATE_PER_SECOND,
+    PREWARM_DELAY_SECONDS,
+    PREWARM_RENDER_PROFILES,
+    FORECAST_BATCH_ENABLED,
+    FORECAST_BATCH_MAX_POINTS,
+)
+from services import gazetteer
+from services import weather_sources
+from services.bulletin import parse_sections, render_bulletin
+from services.cache import next_model_update
+
+log = logging.getLogger(APP_NAME)
+
+# --------------------------------------
+# Độ "nóng" của phường/xã theo số lần được hỏi
+#   - đếm theo id gazetteer, giảm một nửa sau mỗi vòng prewarm
+#     để thứ hạng bám theo lưu lượng gần đây
+# --------------------------------------
+_hits: "Counter[int]" = Counter()
+
+def note_request(loc: Dict[str, Any]) -> None:
+    """Ghi nhận một lượt hỏi cho địa danh lấy từ gazetteer (bỏ qua kết quả API ngoài)."""
+    if loc.get("type") == "ward" and isinstance(loc.get("id"), int):
+        _hits[loc["id"]] += 1
+
+def _decay() -> None:
+    for rid, n in list(_hits.items()):
+        if n <= 1:
+            del _hits[rid]
+        else:
+            _hits[rid] = n // 2
+
+def hot_wards(n: int = PREWARM_TOP_WARDS) -> List[int]:
+    return [rid for rid, _ in _hits.most_common(n)]
+
+def targets() -> List[Dict[str, Any]]:
+    """Mọi tỉnh/thành + top-N phường/xã nóng nhất (bỏ bản ghi thiếu tọa độ)."""
+    ids = [rid for rid, _, _ in gazetteer.points("province")] + hot_wards()
+    out = []
+    for rid in ids:
+        loc = gazetteer.to_location(gazetteer.get_record(rid))
+        if loc["latitude"] or loc["longitude"]:
+            out.append(loc)
+    return out
+
+# --------------------------------------
+# Một vòng prewarm
+#   - địa danh chia thành nhóm cỡ một batch upstream (xem services/batcher.py)
+#   - tối đa PREWARM_CONCURRENCY nhóm song song
+#   - tối đa PREWARM_RATE_PER_SECOND nhóm (≈ request upstream) khởi chạy mỗi giây
+#   - nạp xong dự báo thì dựng sẵn bản tin (PREWARM_RENDER_PROFILES) vào cache bản tin
+# --------------------------------------
+_stats: Dict[str, Any] = {"runs": 0, "warmed": 0, "rendered": 0, "errors": 0, "last_run_at": None, "last_duration_s": None, "next_run_at": None}
+
+_profiles: List[Tuple[str, ...]] = list(dict.fromkeys(parse_sections(p) for p in PREWARM_RENDER_PROFILES))
+
+async def warm_one(loc: Dict[str, Any]) -> int:
+    """Nạp dự báo cho một địa danh rồi dựng bản tin; trả về số bản tin đã dựng."""
+    lat, lon = float(loc["latitude"]), float(loc["longitude"])
+    await weather_sources.refresh_forecast(lat, lon)
+    for sections in _profiles:
+        await render_bulletin(lat, lon, loc, sections=sections)
+    return len(_profiles)
+
+async def run_once() -> Dict[str, int]:
+    locs = targets()
+    size = FORECAST_BATCH_MAX_POINTS if FORECAST_BATCH_ENABLED else 1
+    chunks = [locs[i:i + size] for i in range(0, len(locs), size)]
+    sem = asyncio.Semaphore(max(1, PREWARM_CONCURRENCY))
+    interval = 1.0 / PREWARM_RATE_PER_SECOND if PREWARM_RATE_PER_SECOND > 0 else 0.0
+    result = {"targets": len(locs), "warmed": 0, "rendered": 0, "errors": 0}
+
+    async def _job(chunk: List[Dict[str, Any]]) -> None:
+        try:
+            outcomes = await asyncio.gather(*(warm_one(loc) for loc in chunk), return_exceptions=True)
+            failed = [(loc, res) for loc, res in zip(chunk, outcomes) if isinstance(res, Exception)]
+            result["errors"] += len(failed)
+            result["warmed"] += len(chunk) - len(failed)
+            result["rendered"] += sum(res for res in outcomes if isinstance(res, int))
+            if failed:
+                # Cả nhóm thường lỗi cùng lúc (một request upstream): gom thành một dòng log
+                names = ", ".join(str(loc.get("name")) for loc, _ in failed[:5])
+                more = f" (+{len(failed) - 5})" if len(failed) > 5 else ""
+                log.warning(f"Prewarm lỗi {len(failed)}/{len(chunk)} địa danh: {names}{more} — {failed[0][1]}")
+        finally:
+            sem.release()
+
+    started = time.time()
+    jobs = []
+    for chunk in chunks:
+        await sem.acquire()
+        jobs.append(asyncio.ensure_future(_job(chunk)))
+        if interval:
+            await asyncio.sleep(interval)
+    await asyncio.gather(*jobs)
+
+    _decay()
+    _stats["runs"] += 1
+    _stats["warmed"] += result["warmed"]
+    _stats["rendered"] += result["rendered"]
+    _stats["errors"] += result["errors"]
+    _stats["last_run_at"] = int(started)
+    _stats["last_duration_s"] = round(time.time() - started, 2)
+    log.info(f"🔥 Prewarm: {result['warmed']}/{result['targets']} địa danh, {result['rendered']} bản tin, {result['errors']} lỗi, {_stats['last_duration_s']}s")
+    return result
+
+# --------------------------------------
+# Lịch chạy: ngay khi khởi động, sau đó bám theo mốc cập nhật model
+# --------------------------------------
+_task: Optional["asyncio.Task[None]"] = None
+
+async def _loop() -> None:
+    while True:
+        try:
+            await run_once()
+        except Exception as e:
+            log.error(f"Lỗi vòng prewarm: {e}")
+        next_at = next_model_update() + PREWARM_DELAY_SECONDS
+        _stats["next_run_at"] = int(next_at)
+        await asyncio.sleep(max(1.0, next_at - time.time()))
+
+def start() -> None:
+    global _task
+    if not PREWARM_ENABLED:
+        return
+    if _task is None or _task.done():
+        _task = asyncio.ensure_future(_loop())
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
+
+def stats() -> Dict[str, Any]:
+    return dict(_stats, enabled=PREWARM_ENABLED, tracked_wards=len(_hits), top_wards=PREWARM_TOP_WARDS, render_profiles=PREWARM_RENDER_PROFILES)
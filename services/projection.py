@@ -0,0 +1,119 @@
+# services/projection.py
+from typing import Dict, Any, FrozenSet, Iterable, Optional
+
+from configs import (
+    OPEN_METEO_FIELDS_CURRENT,
+    OPEN_METEO_FIELDS_HOURLY,
+    OPEN_METEO_FIELDS_DAILY,
+)
+
+def _fields(value: Optional[str]) -> FrozenSet[str]:
+    return frozenset(f.strip() for f in (value or "").split(",") if f.strip())
+
+# --------------------------------------
+# Projection: những gì một consumer cần từ Open-Meteo
+#   - biến current / hourly / daily
+#   - tầm dự báo: forecast_days, past_hours (None = mặc định của Open-Meteo)
+#   - signature() ổn định -> dùng trong key cache / single-flight / batch
+# --------------------------------------
+class Projection:
+    __slots__ = ("current", "hourly", "daily", "current_weather", "forecast_days", "past_hours")
+
+    def __init__(
+        self,
+        hourly: Iterable[str] = (),
+        daily: Iterable[str] = (),
+        current: Iterable[str] = (),
+        current_weather: bool = False,
+        forecast_days: Optional[int] = None,
+        past_hours: Optional[int] = None,
+    ):
+        self.hourly = frozenset(hourly)
+        self.daily = frozenset(daily)
+        self.current = frozenset(current)
+        self.current_weather = current_weather
+        self.forecast_days = forecast_days
+        self.past_hours = past_hours
+
+    def merge(self, other: "Projection") -> "Projection":
+        """Hợp hai yêu cầu: hợp các biến, lấy tầm dự báo dài hơn."""
+        def _max(a: Optional[int], b: Optional[int]) -> Optional[int]:
+            # None = mặc định upstream (7 ngày) -> luôn phủ được yêu cầu còn lại
+            if a is None or b is None:
+                return None
+            return max(a, b)
+        return Projection(
+            hourly=self.hourly | other.hourly,
+            daily=self.daily | other.daily,
+            current=self.current | other.current,
+            current_weather=self.current_weather or other.current_weather,
+            forecast_days=_max(self.forecast_days, other.forecast_days),
+            past_hours=max(self.past_hours or 0, other.past_hours or 0) or None,
+        )
+
+    def params(self) -> Dict[str, Any]:
+        """Tham số query Open-Meteo (không gồm latitude/longitude)."""
+        out: Dict[str, Any] = {}
+        if self.current_weather:
+            out["current_weather"] = "true"
+        if self.current:
+            out["current"] = ",".join(sorted(self.current))
+        if self.hourly:
+            out["hourly"] = ",".join(sorted(self.hourly))
+        if self.daily:
+            out["daily"] = ",".join(sorted(self.daily))
+        if self.forecast_days is not None:
+            out["forecast_days"] = self.forecast_days
+        if self.past_hours:
+            out["past_hours"] = self.past_hours
+        return out
+
+    def signature(self) -> str:
+        return "&".join(f"{k}={v}" for k, v in sorted(self.params().items()))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Projection) and self.signature() == other.signature()
+
+    def __hash__(self) -> int:
+        return hash(self.signature())
+
+    def __repr__(self) -> str:
+        return f"Projection({self.signature()})"
+
+# Các trường khai báo trong env (OPEN_METEO_FIELDS_*): lấy thêm cho consumer chọn dùng (with_env)
+ENV_EXTRA = Projection(
+    hourly=_fields(OPEN_METEO_FIELDS_HOURLY),
+    daily=_fields(OPEN_METEO_FIELDS_DAILY),
+    current=_fields(OPEN_METEO_FIELDS_CURRENT),
+    forecast_days=1,
+)
+
+# --------------------------------------
+# Đăng ký consumer
+# --------------------------------------
+_CONSUMERS: Dict[str, Projection] = {}
+_WITH_ENV: Dict[str, bool] = {}
+_RESOLVED: Dict[str, Projection] = {}
+
+def register(name: str, projection: Projection, with_env: bool = False) -> Projection:
+    """Khai báo (hoặc mở rộng) yêu cầu của một consumer; trả về projection sẽ dùng khi fetch."""
+    prev = _CONSUMERS.get(name)
+    _CONSUMERS[name] = projection if prev is None else prev.merge(projection)
+    _WITH_ENV[name] = _WITH_ENV.get(name, False) or with_env
+    _RESOLVED.pop(name, None)
+    return resolve(name)
+
+def resolve(name: str) -> Projection:
+    """Projection thực gửi lên upstream cho consumer (kèm trường env nếu with_env)."""
+    proj = _RESOLVED.get(name)
+    if proj is None:
+        if name not in _CONSUMERS:
+            raise KeyError(f"Consumer chưa khai báo projection: {name}")
+        proj = _CONSUMERS[name]
+        if _WITH_ENV[name]:
+            proj = proj.merge(ENV_EXTRA)
+        _RESOLVED[name] = proj
+    return proj
+
+def consumers() -> Dict[str, str]:
+    return {name: resolve(name).signature() for name in _CONSUMERS}
@@ -2,6 +2,11 @@
 import datetime
 from typing import Dict, Any, List, Optional
 
+import numpy as np
+
+from services.forecast import time_axis
+from services.rules import Scale
+
 # -------------------------------
 # Helpers
 # -------------------------------
@@ -26,31 +31,32 @@ def compute_rain_intensity(rain: Any, avg_rain_hour: Any) -> Optional[float]:
         return None
     return _round1(r / ah)
 
+# Mã 0 = mưa rất lớn ... 4 = không mưa
+RAIN_LEVELS = Scale([
+    (">=", 50.0, "🌧️ Mưa rất lớn, nguy cơ ngập úng và lũ diện rộng."),
+    (">=", 20.0, "🌧️ Mưa lớn, cần cảnh giác ngập úng."),
+    (">=", 5.0, "🌦️ Mưa vừa, ảnh hưởng sinh hoạt ngoài trời."),
+    (">", 0.0, "☔ Mưa nhẹ, ít ảnh hưởng."),
+], default="🙂 Không mưa.")
+
+RAIN_PROBABILITY_LEVELS = Scale([
+    (">=", 70, "⚠️ Xác suất mưa cao, nên chuẩn bị áo mưa/ô."),
+    (">=", 40, "ℹ️ Khả năng có mưa, cần theo dõi."),
+], default="✅ Khả năng mưa thấp.")
+
 def classify_rain_level(rain: Any) -> Optional[str]:
     """Phân loại mức mưa theo ngưỡng mm/h (dùng giá trị gốc, không làm tròn)."""
-    r = _to_float(rain)
-    if r is None:
-        return None
-    if r >= 50.0:
-        return "🌧️ Mưa rất lớn, nguy cơ ngập úng và lũ diện rộng."
-    elif r >= 20.0:
-        return "🌧️ Mưa lớn, cần cảnh giác ngập úng."
-    elif r >= 5.0:
-        return "🌦️ Mưa vừa, ảnh hưởng sinh hoạt ngoài trời."
-    elif r > 0.0:
-        return "☔ Mưa nhẹ, ít ảnh hưởng."
-    else:
-        return "🙂 Không mưa."
+    return RAIN_LEVELS.text(_to_float(rain))
+
+def classify_rain_level_codes(rain: Any) -> np.ndarray:
+    """Mã mức mưa cho cả mảng mm/h (xem RAIN_LEVELS.legend()), NaN/None -> -1."""
+    return RAIN_LEVELS.codes(rain)
 
 def interpret_rain_probability(prob: Any) -> Optional[str]:
-    p = _to_float(prob)
-    if p is None:
-        return None
-    if p >= 70:
-        return "⚠️ Xác suất mưa cao, nên chuẩn bị áo mưa/ô."
-    if p >= 40:
-        return "ℹ️ Khả năng có mưa, cần theo dõi."
-    return "✅ Khả năng mưa thấp."
+    return RAIN_PROBABILITY_LEVELS.text(_to_float(prob))
+
+def interpret_rain_probability_codes(prob: Any) -> np.ndarray:
+    return RAIN_PROBABILITY_LEVELS.codes(prob)
 
 # -------------------------------
 # Rain summary (extended with daily probability)
@@ -69,11 +75,7 @@ def build_rain_summary(unified: Dict[str, Any], mode: str = "both") -> Dict[str,
             times = unified.get("hourly", {}).get("series", {}).get("time", [])
             precips = unified.get("hourly", {}).get("series", {}).get("precipitation", [])
             today_str = datetime.date.today().isoformat()
-            today_precips = [
-                _to_float(v) or 0.0
-                for i, v in enumerate(precips)
-                if i < len(times) and times[i].startswith(today_str)
-            ]
+            today_precips = [_to_float(v) or 0.0 for v in precips[time_axis(times).day_slice(today_str)]]
             rain_sum = sum(today_precips) if today_precips else None
         except Exception:
             pass
@@ -81,10 +83,9 @@ def build_rain_summary(unified: Dict[str, Any], mode: str = "both") -> Dict[str,
     # --- Fallback cho trung bình ngày ---
     if avg_rain_day is None and rain_sum is not None:
         try:
-            hours_count = len([
-                t for t in unified.get("hourly", {}).get("series", {}).get("time", [])
-                if t.startswith(datetime.date.today().isoformat())
-            ])
+            times = unified.get("hourly", {}).get("series", {}).get("time", [])
+            day = time_axis(times).day_slice(datetime.date.today())
+            hours_count = day.stop - day.start
             avg_rain_day = rain_sum / hours_count if hours_count > 0 else None
         except Exception:
             pass
@@ -95,11 +96,7 @@ def build_rain_summary(unified: Dict[str, Any], mode: str = "both") -> Dict[str,
             times = unified.get("hourly", {}).get("series", {}).get("time", [])
             probs = unified.get("hourly", {}).get("series", {}).get("precipitation_probability", [])
             today_str = datetime.date.today().isoformat()
-            today_probs = [
-                _to_float(v) or 0.0
-                for i, v in enumerate(probs)
-                if i < len(times) and times[i].startswith(today_str)
-            ]
+            today_probs = [_to_float(v) or 0.0 for v in probs[time_axis(times).day_slice(today_str)]]
             if today_probs:
                 rain_prob_day = sum(today_probs) / len(today_probs)
         except Exception:
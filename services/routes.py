@@ -1,32 +1,111 @@
 # services/routes.py
 import logging
-from fastapi import APIRouter, Query
-from typing import Dict, Any
+import datetime
+from email.utils import formatdate
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional, Tuple, Union
 
-from services.helpers import geocode_region, reverse_geocode
-from services.bulletin import build_bulletin_unified
+from services.helpers import geocode_region_async, reverse_geocode_async
+from services.bulletin import BULLETIN_CACHE, render_bulletin, parse_sections
+from services import http_client
+from services import weather_sources
+from services import prewarm
+from services import chat_batch
+from services import snapshot
+from services import jsonio
+from services.jsonio import FastJSONResponse
+from services.etag import make_etag, matches
+from services.forecast import LOCAL_TZ
+from services.spatial_index import nearest_places
+from configs import REVERSE_MAX_RADIUS_KM, NEARBY_MAX_RADIUS_KM, CHAT_BATCH_MAX_REGIONS
 
 router = APIRouter()
 log = logging.getLogger("WeatherWindy")
 
 # --------------------------------------
 # Route /v1/chat
+#   include= / fields=: chọn phần bản tin (preset lean = text, icon, stale)
+#   ETag (yếu) = version dự báo theo nội dung + địa danh + giờ địa phương + các phần chọn
+#   (bản tin chỉ đổi khi có dự báo mới hoặc sang giờ mới)
+#   -> If-None-Match khớp: trả 304, không dựng / serialize bản tin
 # --------------------------------------
+_CHAT_CACHE_CONTROL = "no-cache"
+
+def _chat_etag(loc: Dict[str, Any], sections: Tuple[str, ...], version: str, stale: bool) -> str:
+    hour = datetime.datetime.now(LOCAL_TZ).strftime("%Y%m%d%H")
+    return make_etag("chat", version, int(stale), hour, ",".join(sections), jsonio.dumps(loc).decode("utf-8"))
+
 @router.get("/chat")
-async def chat(region: str = Query(..., description="Tên địa danh tiếng Việt hoặc lat,lon")) -> Dict[str, Any]:
+async def chat(
+    request: Request,
+    region: str = Query(..., description="Tên địa danh tiếng Việt hoặc lat,lon"),
+    include: Optional[str] = Query(None, description="Phần bản tin cần trả: lean | full | text,icon,alerts,..."),
+    fields: Optional[str] = Query(None, description="Bí danh của include")
+) -> Dict[str, Any]:
     """
     Trả về bản tin thời tiết hợp nhất (unified) cho địa danh.
-    Luôn dùng build_bulletin_unified để hiển thị bản tin gọn gàng.
+    Dựng bằng build_bulletin_unified (qua cache bản tin đã dựng, xem render_bulletin).
     """
     try:
-        loc = geocode_region(region)
+        sections = parse_sections(include or fields)
+        loc = await geocode_region_async(region)
         lat, lon = float(loc["latitude"]), float(loc["longitude"])
-        bulletin = await build_bulletin_unified(lat, lon, loc)   # ✅ await
-        return {"status": "ok", "data": {"bulletin": bulletin, "loc": loc}}
+        prewarm.note_request(loc)
+
+        cached = weather_sources.cached_version(lat, lon)
+        if cached is not None:
+            etag = _chat_etag(loc, sections, *cached)
+            if matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": _CHAT_CACHE_CONTROL})
+
+        bulletin = await render_bulletin(lat, lon, loc, sections=sections)   # ✅ await
+        # Version của bản dự báo vừa dùng (None khi phải dùng bản cũ do upstream lỗi -> không gắn ETag)
+        cached = weather_sources.cached_version(lat, lon)
+        headers = {"Cache-Control": _CHAT_CACHE_CONTROL}
+        if cached is not None:
+            headers["ETag"] = _chat_etag(loc, sections, *cached)
+        # Trả Response trực tiếp: bỏ qua jsonable_encoder, encode một lượt bằng jsonio
+        return FastJSONResponse({"status": "ok", "data": {"bulletin": bulletin, "loc": loc}}, headers=headers)
     except Exception as e:
         log.error(f"Lỗi khi xử lý /chat: {e}")
         return {"status": "error", "message": str(e)}
 
+# --------------------------------------
+# Route /v1/chat/batch
+#   body: {"regions": ["Hà Nội", "10.77,106.70", [16.05, 108.2]], "include": "lean"}
+#   stream=true hoặc Accept: application/x-ndjson -> mỗi dòng một kết quả, gửi ngay khi xong
+# --------------------------------------
+class ChatBatchRequest(BaseModel):
+    regions: List[Union[str, Tuple[float, float]]] = Field(..., min_length=1, max_length=CHAT_BATCH_MAX_REGIONS)
+    include: Optional[str] = None
+
+@router.post("/chat/batch")
+async def chat_batch_route(
+    body: ChatBatchRequest,
+    request: Request,
+    stream: bool = Query(False, description="Trả NDJSON, mỗi địa danh một dòng theo thứ tự hoàn thành")
+) -> Dict[str, Any]:
+    """
+    Bản tin cho nhiều địa danh/tọa độ trong một request: geocode và tải dự báo dùng chung
+    (gộp batch upstream), dựng bản tin song song có giới hạn; lỗi trả riêng từng phần tử.
+    """
+    try:
+        sections = parse_sections(body.include)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        async def _lines():
+            async for item in chat_batch.iter_bulletins(body.regions, sections):
+                yield jsonio.dumps(item) + b"\n"
+        return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+    results = await chat_batch.run_batch(body.regions, sections)
+    errors = sum(1 for it in results if it["status"] != "ok")
+    return FastJSONResponse({"status": "ok", "data": {"count": len(results), "errors": errors, "results": results}})
+
 # --------------------------------------
 # Route /v1/reverse
 # --------------------------------------
@@ -36,13 +115,89 @@ async def reverse(
     lon: float = Query(..., description="Kinh độ")
 ) -> Dict[str, Any]:
     """
-    Tra ngược từ tọa độ (lat, lon) sang địa danh bằng Open-Meteo Reverse Geocoding API.
+    Tra ngược từ tọa độ (lat, lon) sang địa danh: phường/xã gần nhất trong chỉ mục cục bộ,
+    ngoài bán kính thì dùng Open-Meteo Reverse Geocoding API.
     """
     try:
-        loc = reverse_geocode(lat, lon)
+        loc = await reverse_geocode_async(lat, lon)
         if "error" in loc:
             raise ValueError(loc["error"])
         return {"status": "ok", "data": {"loc": loc}}
     except Exception as e:
         log.error(f"Lỗi khi xử lý /reverse: {e}")
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+# --------------------------------------
+# Route /v1/nearby
+# --------------------------------------
+@router.get("/nearby")
+async def nearby(
+    lat: float = Query(..., description="Vĩ độ"),
+    lon: float = Query(..., description="Kinh độ"),
+    k: int = Query(5, ge=1, le=50, description="Số địa danh gần nhất"),
+    radius_km: float = Query(REVERSE_MAX_RADIUS_KM, gt=0, le=NEARBY_MAX_RADIUS_KM, description="Bán kính tối đa (km)")
+) -> Dict[str, Any]:
+    """
+    k phường/xã gần nhất quanh tọa độ, tra hoàn toàn cục bộ qua chỉ mục không gian.
+    """
+    places = nearest_places(lat, lon, k=k, max_km=radius_km)
+    return {"status": "ok", "data": {"places": places}}
+
+# --------------------------------------
+# Route /v1/snapshot
+#   bảng toàn quốc dựng sẵn (xem services/snapshot.py), body serialize sẵn cho mỗi định dạng
+#   format= json | ndjson | arrow, hoặc theo Accept (application/x-ndjson, application/vnd.apache.arrow.stream)
+#   ETag = băm nội dung bảng + định dạng -> If-None-Match khớp: 304
+#   thời điểm dựng ở header Last-Modified (không nằm trong body -> cùng ETag, cùng body)
+# --------------------------------------
+def _snapshot_format(fmt: Optional[str], accept: str) -> str:
+    if fmt:
+        return fmt.strip().lower()
+    if snapshot.FORMATS["arrow"] in accept:
+        return "arrow"
+    if snapshot.FORMATS["ndjson"] in accept:
+        return "ndjson"
+    return "json"
+
+@router.get("/snapshot")
+async def snapshot_route(
+    request: Request,
+    format: Optional[str] = Query(None, description="json | ndjson | arrow")
+) -> Dict[str, Any]:
+    """
+    Nhiệt độ, mưa, gió, mức cảnh báo và icon hiện tại của mọi tỉnh/thành, phường/xã.
+    JSON trả dạng cột (columns + legend); NDJSON mỗi địa danh một dòng; Arrow IPC stream cần pyarrow.
+    Thời điểm dựng bảng: header Last-Modified.
+    """
+    try:
+        fmt = _snapshot_format(format, request.headers.get("accept", ""))
+        if fmt not in snapshot.FORMATS:
+            raise ValueError(f"format không hợp lệ: {fmt} (json | ndjson | arrow)")
+        snap = await snapshot.get()
+        etag = make_etag("snapshot", snap.digest, fmt)
+        headers = {"ETag": etag, "Cache-Control": _CHAT_CACHE_CONTROL, "Last-Modified": formatdate(snap.generated_at, usegmt=True)}
+        if matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(snap.encode(fmt), media_type=snapshot.FORMATS[fmt], headers=headers)
+    except Exception as e:
+        log.error(f"Lỗi khi xử lý /snapshot: {e}")
+        return {"status": "error", "message": str(e)}
+
+# --------------------------------------
+# Route /v1/stats
+# --------------------------------------
+@router.get("/stats")
+async def stats() -> Dict[str, Any]:
+    """
+    Thống kê nội bộ: connection pool HTTP tới upstream, gộp request dự báo, cache bản tin, prewarm, snapshot.
+    """
+    return {
+        "status": "ok",
+        "data": {
+            "http": http_client.pool_stats(),
+            "forecast": weather_sources.stats(),
+            "bulletin_cache": BULLETIN_CACHE.stats(),
+            "prewarm": prewarm.stats(),
+            "snapshot": snapshot.stats(),
+        },
+    }
\ No newline at end of file
@@ -0,0 +1,460 @@
+# services/rules.py
+import math
+from bisect import bisect_right
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # không có numpy: chỉ dùng đường vô hướng
+    np = None
+
+# --------------------------------------
+# Bộ máy luật theo ngưỡng
+#   Scale  : chuỗi if/elif "x op ngưỡng -> nhãn" của một biến, biên dịch lúc import thành
+#            mảng breakpoint tăng dần (mọi miền đóng bên trái) + mã nhãn mỗi miền
+#            -> tra bằng bisect (vô hướng) hoặc np.searchsorted (nhiều điểm một lúc)
+#   Rule   : biến đầu vào (hoặc đại lượng suy ra: hiệu, tỉ số, ...) + Scale
+#   RuleSet: danh sách Rule theo thứ tự xuất câu
+#   Pass   : nhiều RuleSet, mỗi bộ kèm ánh xạ tham số <- key bản ghi (vd. unified)
+#   Giá trị None / NaN = thiếu dữ liệu: luật bị bỏ qua
+# --------------------------------------
+Text = Union[str, Callable[[float], str]]
+Case = Tuple[str, float, Optional[Text]]
+
+def _holds(op: str, x: float, t: float) -> bool:
+    if op == ">=":
+        return x >= t
+    if op == ">":
+        return x > t
+    if op == "<=":
+        return x <= t
+    if op == "<":
+        return x < t
+    raise ValueError(f"Toán tử không hỗ trợ: {op}")
+
+def _breakpoint(op: str, t: float) -> float:
+    """Điểm mà 'x op t' đổi giá trị, quy về miền đóng bên trái [b, ...)."""
+    return t if op in (">=", "<") else math.nextafter(t, math.inf)
+
+class Label:
+    """Nhãn tĩnh (trả nguyên chuỗi), mẫu '{v:.1f}' hoặc hàm v -> chuỗi."""
+    __slots__ = ("text", "static", "fn")
+
+    def __init__(self, text: Text):
+        self.text = text
+        self.static = isinstance(text, str) and "{" not in text
+        # v -> chuỗi; mẫu '{v:...}' đổi sang đối số vị trí để gọi thẳng str.format
+        if self.static:
+            self.fn: Callable[[float], str] = lambda v, _t=text: _t
+        elif isinstance(text, str):
+            self.fn = text.replace("{v", "{0").format
+        else:
+            self.fn = text
+
+    def render(self, v: float) -> str:
+        return self.fn(v)
+
+def _rounded_breakpoint(b: float, ndigits: int) -> float:
+    """Số thực nhỏ nhất x có round(x, ndigits) >= b (round đơn điệu -> chỉ cần dời breakpoint)."""
+    step = 10.0 ** -ndigits
+    lo, hi = b - 2 * step, b + 2 * step     # round(lo) < b <= round(hi)
+    while math.nextafter(lo, math.inf) < hi:
+        mid = (lo + hi) / 2
+        if mid <= lo or mid >= hi:
+            mid = math.nextafter(lo, math.inf)
+        if round(mid, ndigits) >= b:
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+class Scale:
+    """
+    ndigits: chuỗi gốc so sánh trên giá trị đã làm tròn (round(x, ndigits));
+    breakpoint được dời sẵn để tra thẳng bằng giá trị thô cho cùng kết quả.
+    """
+    def __init__(self, cases: Sequence[Case] = (), default: Optional[Text] = None, ndigits: Optional[int] = None):
+        self.cases: Tuple[Case, ...] = tuple(cases)
+        self.default = default
+        self.ndigits = ndigits
+        for op, _, _ in self.cases:
+            _holds(op, 0.0, 0.0)   # kiểm tra toán tử ngay lúc biên dịch
+
+        # Mã nhãn theo thứ tự khai báo (nhánh đầu = mã 0), -1 = không có câu
+        self.labels: List[Label] = []
+        index: Dict[Any, int] = {}
+        for text in [c[2] for c in self.cases] + [default]:
+            if text is not None and text not in index:
+                index[text] = len(self.labels)
+                self.labels.append(Label(text))
+
+        # Mỗi miền giữa hai breakpoint liên tiếp: chạy chuỗi if/elif gốc tại một điểm đại diện
+        points = sorted({_breakpoint(op, t) for op, t, _ in self.cases})
+        reps = [math.nextafter(points[0], -math.inf) if points else 0.0] + points
+        codes = [-1 if (text := self._chain(r)) is None else index[text] for r in reps]
+
+        # Gộp các miền liền kề cùng nhãn
+        self.bounds: List[float] = []
+        self.band_codes: List[int] = [codes[0]]
+        for p, c in zip(points, codes[1:]):
+            if c != self.band_codes[-1]:
+                self.bounds.append(p)
+                self.band_codes.append(c)
+        if ndigits is not None:
+            self.bounds = [_rounded_breakpoint(b, ndigits) for b in self.bounds]
+        if np is not None:
+            self._bounds_arr = np.asarray(self.bounds, dtype=np.float64)
+            self._codes_arr = np.asarray(self.band_codes, dtype=np.int16)
+
+    def _chain(self, x: float) -> Optional[Text]:
+        for op, t, text in self.cases:
+            if _holds(op, x, t):
+                return text
+        return self.default
+
+    def code(self, x: Optional[float]) -> int:
+        if x is None or x != x:
+            return -1
+        return self.band_codes[bisect_right(self.bounds, x)]
+
+    def text(self, x: Optional[float]) -> Optional[str]:
+        c = self.code(x)
+        return None if c < 0 else self.labels[c].render(x)
+
+    def threshold(self) -> Optional[Tuple[bool, float, str]]:
+        """(phía trên?, breakpoint, câu) nếu thang chỉ là một ngưỡng với nhãn tĩnh."""
+        if len(self.bounds) != 1 or not all(lb.static for lb in self.labels):
+            return None
+        below, above = self.band_codes
+        if (below < 0) == (above < 0):
+            return None
+        return above >= 0, self.bounds[0], self.labels[max(below, above)].text
+
+    def lookup(self) -> Callable[[float], Optional[str]]:
+        """Hàm x -> câu (x khác None), nhãn tĩnh trả thẳng chuỗi dựng sẵn."""
+        single = self.threshold()
+        if single is not None:
+            # NaN so sánh luôn sai -> không có câu, khỏi kiểm tra riêng
+            above, b, t = single
+            if above:
+                return lambda x: t if x >= b else None
+            return lambda x: t if x < b else None
+
+        bounds, band_codes, labels = self.bounds, self.band_codes, self.labels
+        texts = [lb.text if lb.static else None for lb in labels]
+        fns = [lb.fn for lb in labels]
+
+        def _lookup(x: float) -> Optional[str]:
+            if x != x:
+                return None
+            c = band_codes[bisect_right(bounds, x)]
+            if c < 0:
+                return None
+            t = texts[c]
+            return t if t is not None else fns[c](x)
+        return _lookup
+
+    def legend(self) -> List[str]:
+        """Câu của từng mã nhãn (chỉ số = mã), cho client dùng mã từ codes()."""
+        return [lb.render(0.0) for lb in self.labels]
+
+    def codes(self, values: "np.ndarray") -> "np.ndarray":
+        """Mã nhãn cho cả mảng (NaN -> -1)."""
+        arr = np.asarray(values, dtype=np.float64)
+        out = self._codes_arr[np.searchsorted(self._bounds_arr, arr, side="right")]
+        out[np.isnan(arr)] = -1
+        return out
+
+class Rule:
+    __slots__ = ("name", "inputs", "scale", "derive", "optional")
+
+    def __init__(
+        self,
+        name: str,
+        inputs: Sequence[str],
+        scale: Scale,
+        derive: Optional[Callable[..., Any]] = None,
+        optional: Sequence[str] = (),
+    ):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.scale = scale
+        self.derive = derive          # phải chạy được cả với số lẫn mảng NumPy (xem các hàm bên dưới)
+        self.optional = frozenset(optional)
+
+    def value(self, values: Mapping[str, Any]) -> Optional[float]:
+        args = [values.get(k) for k in self.inputs]
+        for k, a in zip(self.inputs, args):
+            if a is None and k not in self.optional:
+                return None
+        return args[0] if self.derive is None else self.derive(*args)
+
+    def bind(self, binding: Optional[Mapping[str, "Source"]] = None) -> Callable[[Mapping[str, Any]], Optional[str]]:
+        """Biên dịch thành hàm bản ghi -> câu | None (tham số lấy từ bản ghi theo binding)."""
+        # Không có binding: đọc thẳng theo tên tham số; có binding: tham số không gắn = thiếu
+        sources = list(self.inputs) if binding is None else [binding.get(k) for k in self.inputs]
+        lookup = self.scale.lookup()
+        derive = self.derive
+
+        if derive is None and len(sources) == 1 and isinstance(sources[0], str):
+            key = sources[0]
+            single = self.scale.threshold()
+            if single is not None:
+                above, b, t = single
+                if above:
+                    return lambda record: t if (x := record.get(key)) is not None and x >= b else None
+                return lambda record: t if (x := record.get(key)) is not None and x < b else None
+
+            bounds, band_codes = self.scale.bounds, self.scale.band_codes
+            texts = [lb.text if lb.static else None for lb in self.scale.labels]
+            fns = [lb.fn for lb in self.scale.labels]
+
+            def _simple(record: Mapping[str, Any]) -> Optional[str]:
+                x = record.get(key)
+                if x is None or x != x:
+                    return None
+                c = band_codes[bisect_right(bounds, x)]
+                if c < 0:
+                    return None
+                t = texts[c]
+                return t if t is not None else fns[c](x)
+            return _simple
+
+        getters = [(_getter(src), k in self.optional) for k, src in zip(self.inputs, sources)]
+
+        def _general(record: Mapping[str, Any]) -> Optional[str]:
+            args = []
+            for get, optional in getters:
+                a = get(record)
+                if a is None and not optional:
+                    return None
+                args.append(a)
+            v = args[0] if derive is None else derive(*args)
+            return None if v is None else lookup(v)
+        return _general
+
+    def column(self, columns: Mapping[str, Any], n: int) -> "np.ndarray":
+        args = [_as_column(columns.get(k), n) for k in self.inputs]
+        out = args[0] if self.derive is None else self.derive(*args)
+        out = np.full(n, np.nan) if out is None else np.array(out, dtype=np.float64)
+        if out.ndim == 0:
+            out = np.full(n, float(out))
+        for k, a in zip(self.inputs, args):
+            if k not in self.optional:
+                out[_missing(a)] = np.nan
+        return out
+
+class RuleSet:
+    def __init__(self, name: str, rules: Sequence[Rule]):
+        self.name = name
+        self.rules: Tuple[Rule, ...] = tuple(rules)
+        self._compiled = [rule.bind() for rule in self.rules]
+
+    def evaluate(self, values: Mapping[str, Any]) -> List[str]:
+        return [t for ev in self._compiled if (t := ev(values)) is not None]
+
+    def matches(self, values: Mapping[str, Any]) -> List[Tuple[Rule, int, Any]]:
+        """(luật, mã nhãn, giá trị) cho các luật ra câu, theo thứ tự luật."""
+        out: List[Tuple[Rule, int, Any]] = []
+        for rule in self.rules:
+            v = rule.value(values)
+            c = rule.scale.code(v)
+            if c >= 0:
+                out.append((rule, c, v))
+        return out
+
+    def codes(self, values: Mapping[str, Any]) -> Dict[str, int]:
+        return {rule.name: rule.scale.code(rule.value(values)) for rule in self.rules}
+
+    def code_matrix(self, columns: Mapping[str, Any], n: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        """(mã nhãn, giá trị) dạng (số luật × n điểm)."""
+        vals = np.empty((len(self.rules), n), dtype=np.float64)
+        codes = np.empty((len(self.rules), n), dtype=np.int16)
+        for i, rule in enumerate(self.rules):
+            vals[i] = rule.column(columns, n)
+            codes[i] = rule.scale.codes(vals[i])
+        return codes, vals
+
+    def evaluate_many(self, columns: Mapping[str, Any], n: Optional[int] = None) -> List[List[str]]:
+        """Như evaluate cho n điểm cùng lúc; columns: tên tham số -> mảng/list dài n."""
+        n = _length(columns) if n is None else n
+        out: List[List[str]] = [[] for _ in range(n)]
+        _render_into(out, self.rules, *self.code_matrix(columns, n))
+        return out
+
+def _render_into(out: List[List[str]], rules: Sequence[Rule], codes: "np.ndarray", vals: "np.ndarray") -> None:
+    for i, rule in enumerate(rules):
+        labels = rule.scale.labels
+        idx = np.flatnonzero(codes[i] >= 0)
+        texts = [lb.text if lb.static else None for lb in labels]
+        if None not in texts:
+            for j, c in zip(idx.tolist(), codes[i, idx].tolist()):
+                out[j].append(texts[c])
+        else:
+            fns = [lb.fn for lb in labels]
+            for j, c, v in zip(idx.tolist(), codes[i, idx].tolist(), vals[i, idx].tolist()):
+                t = texts[c]
+                out[j].append(t if t is not None else fns[c](v))
+
+# --------------------------------------
+# Pass: chạy nhiều RuleSet trên một bản ghi (dict) hoặc nhiều bản ghi dạng cột
+#   nguồn của mỗi tham số: key, hoặc tuple key -> lấy như 'a or b or c'
+# --------------------------------------
+Source = Union[str, Tuple[str, ...]]
+
+def _pick(record: Mapping[str, Any], source: Source) -> Any:
+    if isinstance(source, str):
+        return record.get(source)
+    v = None
+    for key in source:
+        v = record.get(key)
+        if v:
+            return v
+    return v
+
+def _getter(source: Optional[Source]) -> Callable[[Mapping[str, Any]], Any]:
+    if source is None:
+        return lambda record: None
+    if isinstance(source, str):
+        return lambda record: record.get(source)
+    return lambda record: _pick(record, source)
+
+class Pass:
+    def __init__(self, steps: Sequence[Tuple[RuleSet, Mapping[str, Source]]]):
+        self.steps = tuple((rs, dict(binding)) for rs, binding in steps)
+        # Bộ chỉ đọc key đơn: luật gắn thẳng vào bản ghi;
+        # có nguồn 'a or b' thì chọn giá trị một lần cho cả bộ rồi chạy luật đã biên dịch
+        self._plan: List[Tuple[Optional[List[Tuple[str, Callable]]], List[Callable]]] = []
+        for rs, binding in self.steps:
+            if all(isinstance(src, str) for src in binding.values()):
+                evs = [rule.bind(binding) for rule in rs.rules]
+                if self._plan and self._plan[-1][0] is None:
+                    self._plan[-1][1].extend(evs)
+                else:
+                    self._plan.append((None, evs))
+            else:
+                self._plan.append(([(p, _getter(src)) for p, src in binding.items()], rs._compiled))
+
+    def evaluate(self, record: Mapping[str, Any]) -> List[str]:
+        out: List[str] = []
+        for getters, evs in self._plan:
+            values = record if getters is None else {p: get(record) for p, get in getters}
+            out += [t for ev in evs if (t := ev(values)) is not None]
+        return out
+
+    def matches(self, record: Mapping[str, Any]) -> List[Tuple[RuleSet, Rule, int, Any, Dict[str, Any]]]:
+        """Như evaluate nhưng trả (bộ, luật, mã nhãn, giá trị, tham số của bộ) thay cho câu."""
+        out: List[Tuple[RuleSet, Rule, int, Any, Dict[str, Any]]] = []
+        for rs, binding in self.steps:
+            values = {p: _pick(record, src) for p, src in binding.items()}
+            out.extend((rs, rule, c, v, values) for rule, c, v in rs.matches(values))
+        return out
+
+    def code_matrices(self, columns: Mapping[str, Any], n: Optional[int] = None) -> Iterator[Tuple[RuleSet, "np.ndarray", "np.ndarray"]]:
+        """(bộ, mã nhãn, giá trị) cho từng bộ luật; mã/giá trị dạng (số luật × n điểm)."""
+        n = _length(columns) if n is None else n
+        # Mỗi cột nguồn chỉ chuyển sang ndarray một lần cho cả lượt
+        arrays = _ColumnCache(columns, n)
+        for rs, binding in self.steps:
+            cols = {p: _pick_column(arrays, src, n) for p, src in binding.items()}
+            yield (rs, *rs.code_matrix(cols, n))
+
+    def evaluate_many(self, columns: Mapping[str, Any], n: Optional[int] = None) -> List[List[str]]:
+        n = _length(columns) if n is None else n
+        out: List[List[str]] = [[] for _ in range(n)]
+        for rs, codes, vals in self.code_matrices(columns, n):
+            _render_into(out, rs.rules, codes, vals)
+        return out
+
+# --------------------------------------
+# Cột dữ liệu: số -> float64 (None -> NaN), còn lại (vd. terrain) -> object
+# --------------------------------------
+def _as_column(values: Any, n: int) -> "np.ndarray":
+    if values is None:
+        return np.full(n, np.nan)
+    if isinstance(values, np.ndarray) and values.dtype.kind != "O":
+        return values.astype(np.float64, copy=False) if values.dtype.kind in "biuf" else values
+    try:
+        return np.array(values, dtype=np.float64)   # None -> NaN
+    except (TypeError, ValueError):
+        return np.array(values, dtype=object)
+
+class _ColumnCache(dict):
+    def __init__(self, columns: Mapping[str, Any], n: int):
+        super().__init__()
+        self.columns, self.n = columns, n
+
+    def __missing__(self, key: str) -> Optional["np.ndarray"]:
+        values = self.columns.get(key)
+        self[key] = arr = None if values is None else _as_column(values, self.n)
+        return arr
+
+    def get(self, key: str, default: Any = None) -> Any:
+        arr = self[key]
+        return default if arr is None else arr
+
+def _missing(arr: "np.ndarray") -> "np.ndarray":
+    if arr.dtype.kind == "f":
+        return np.isnan(arr)
+    return np.array([v is None for v in arr], dtype=bool)
+
+def _truthy(arr: "np.ndarray") -> "np.ndarray":
+    if arr.dtype.kind == "f":
+        return ~np.isnan(arr) & (arr != 0)
+    return np.array([bool(v) for v in arr], dtype=bool)
+
+def _pick_column(columns: Mapping[str, Any], source: Source, n: int) -> "np.ndarray":
+    if isinstance(source, str):
+        return _as_column(columns.get(source), n)
+    cols = [_as_column(columns.get(k), n) for k in source]
+    out = cols[-1]
+    for col in reversed(cols[:-1]):
+        out = np.where(_truthy(col), col, out)
+    return out
+
+def _length(columns: Mapping[str, Any]) -> int:
+    for v in columns.values():
+        if v is not None and np.ndim(v):
+            return len(v)
+    return 1
+
+# --------------------------------------
+# Đại lượng suy ra dùng chung (số hoặc mảng NumPy; None / NaN = bỏ qua)
+# --------------------------------------
+def is_array(*xs: Any) -> bool:
+    return np is not None and any(isinstance(x, np.ndarray) for x in xs)
+
+def spread(lo: float, hi: float) -> float:
+    """hi - lo (vd. biên độ tmax - tmin)."""
+    return hi - lo
+
+def delta(base: float, x: float) -> float:
+    """x - base (vd. cảm nhận - nhiệt độ đo)."""
+    return x - base
+
+def abs_delta(a: float, b: float) -> float:
+    return abs(a - b)
+
+def ratio(x: float, base: float) -> Optional[float]:
+    """x / base khi base > 0."""
+    if is_array(x, base):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(base > 0, x / np.where(base > 0, base, 1.0), np.nan)
+    return x / base if base > 0 else None
+
+def when(flag: Callable[..., Any], derive: Callable[..., Any]) -> Callable[..., Any]:
+    """derive(*args) chỉ khi flag(*args) đúng (phép 'and' giữa các điều kiện)."""
+    def _fn(*args: Any) -> Any:
+        if is_array(*args):
+            return np.where(flag(*args), derive(*args), np.nan)
+        return derive(*args) if flag(*args) else None
+    return _fn
+
+def first(*args: Any) -> Any:
+    return args[0]
+
+def member(x: Any, options: Sequence[Any]) -> Any:
+    """x thuộc options (vd. terrain)."""
+    if is_array(x):
+        return np.isin(x, list(options))
+    return x in options
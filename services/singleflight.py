@@ -0,0 +1,55 @@
+# services/singleflight.py
+import asyncio
+from typing import Dict, Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# --------------------------------------
+# Single-flight: gộp các lời gọi đồng thời cùng key
+#   - lời gọi đầu tiên tạo task chạy thật
+#   - các lời gọi đến sau (khi task chưa xong) chờ chung kết quả đó
+#   - task chạy độc lập: request đầu bị hủy thì những request còn lại vẫn có kết quả
+# --------------------------------------
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._stats: Dict[str, int] = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "max_waiters": 0,
+        }
+        self._waiters: Dict[Hashable, int] = {}
+
+    def _done(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["errors"] += 1
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        self._stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self._stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda t, k=key: self._done(k, t))
+        else:
+            self._stats["coalesced"] += 1
+            self._waiters[key] += 1
+            self._stats["max_waiters"] = max(self._stats["max_waiters"], self._waiters[key])
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = dict(self._stats)
+        out["in_flight"] = len(self._inflight)
+        out["coalesced_ratio"] = round(self._stats["coalesced"] / self._stats["calls"], 3) if self._stats["calls"] else 0.0
+        return out
@@ -0,0 +1,319 @@
+# services/snapshot.py
+import time
+import asyncio
+import hashlib
+import logging
+import datetime
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # không có pyarrow: chỉ phục vụ json / ndjson
+    pa = None
+
+from configs import (
+    APP_NAME,
+    SNAPSHOT_ENABLED,
+    SNAPSHOT_CONCURRENCY,
+    SNAPSHOT_DELAY_SECONDS,
+)
+from services import gazetteer
+from services import jsonio
+from services.weather_sources import get_weather
+from services.bulletin import map_to_unified, severity_icon, _code_to_text
+from services.alerts import alert_severity_many, SEVERITY_KEYWORDS, SEVERITY_NONE
+from services.temperature import TEMP_LEVELS, classify_temp_level_codes
+from services.rain import RAIN_LEVELS, classify_rain_level_codes
+from services.wind import classify_wind_beaufort_codes
+from services.cache import last_model_update, next_model_update
+from services.forecast import LOCAL_TZ
+
+log = logging.getLogger(APP_NAME)
+
+# --------------------------------------
+# Bảng toàn quốc (GET /v1/snapshot)
+#   mỗi tỉnh/thành, phường/xã một dòng: số liệu hiện tại + mã mức + mức cảnh báo + icon
+#   dựng lại định kỳ từ cache dự báo (get_weather -> micro-batch upstream),
+#   giữ dạng cột NumPy; mỗi định dạng chỉ serialize một lần cho mỗi bản dựng
+#   body chỉ phụ thuộc số liệu (thời điểm dựng trả qua header Last-Modified, xem routes)
+# --------------------------------------
+FORMATS: Dict[str, str] = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+TYPES: List[str] = ["province", "ward"]
+ICONS: List[str] = [
+    "danger_red.ico", "warning_orange.ico", "info_green.ico",
+    "sun.ico", "cloud.ico", "rain.ico", "snow.ico", "storm.ico", "default.ico",
+]
+
+# Cột số liệu (float32, NaN = thiếu) <- key unified; cột mã (int8/int16): -1 = thiếu, xuất ra null
+_VALUES = [
+    ("temperature", "temperature_now"),
+    ("apparent_temperature", "apparent_temperature_now"),
+    ("precipitation", "precipitation_now"),
+    ("precipitation_probability", "precipitation_probability_now"),
+    ("wind_speed", "wind_speed_now"),
+    ("gust", "gust_now"),
+]
+_CODES = ("weather_code", "temp_level", "rain_level", "beaufort", "severity")
+
+def legend() -> Dict[str, Any]:
+    """Nhãn của các cột mã (mã = chỉ số trong list; beaufort = cấp gió)."""
+    severity = dict([SEVERITY_NONE] + [sev for _, sev in SEVERITY_KEYWORDS])
+    return {
+        "temp_level": TEMP_LEVELS["north"].legend(),
+        "rain_level": RAIN_LEVELS.legend(),
+        "severity": [severity[i] for i in sorted(severity)],
+    }
+
+def _floats(arr: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in np.round(arr.astype(np.float64), 1).tolist()]
+
+def _ints(arr: np.ndarray) -> List[Optional[int]]:
+    return [None if v < 0 else v for v in arr.tolist()]
+
+def _labels(codes: np.ndarray, names: List[str]) -> List[Optional[str]]:
+    return [None if c < 0 else names[c] for c in codes.tolist()]
+
+class Snapshot:
+    __slots__ = ("columns", "generated_at", "digest", "_encoded")
+
+    def __init__(self, columns: Dict[str, Any], generated_at: float):
+        self.columns = columns
+        self.generated_at = generated_at
+        # Băm nội dung (không gồm thời điểm dựng): bản dựng lại không đổi số liệu giữ nguyên ETag
+        h = hashlib.blake2b(digest_size=12)
+        for name, col in columns.items():
+            h.update(name.encode("utf-8"))
+            h.update(col.tobytes() if isinstance(col, np.ndarray) else jsonio.dumps(col))
+        self.digest = h.hexdigest()
+        self._encoded: Dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def generated_iso(self) -> str:
+        return datetime.datetime.fromtimestamp(self.generated_at, LOCAL_TZ).isoformat(timespec="seconds")
+
+    def _plain(self) -> Dict[str, List[Any]]:
+        c = self.columns
+        out: Dict[str, List[Any]] = {
+            "id": c["id"].tolist(),
+            "type": _labels(c["type"], TYPES),
+            "name": c["name"],
+            "province": c["province"],
+            "latitude": [round(v, 5) for v in c["latitude"].tolist()],
+            "longitude": [round(v, 5) for v in c["longitude"].tolist()],
+        }
+        out.update((name, _floats(c[name])) for name, _ in _VALUES)
+        out.update((name, _ints(c[name])) for name in _CODES)
+        out["icon"] = _labels(c["icon"], ICONS)
+        return out
+
+    def _arrow(self) -> bytes:
+        c = self.columns
+        arrays = {
+            "id": pa.array(c["id"]),
+            "type": pa.DictionaryArray.from_arrays(pa.array(c["type"]), pa.array(TYPES)),
+            "name": pa.array(c["name"], type=pa.string()),
+            "province": pa.array(c["province"], type=pa.string()),
+            "latitude": pa.array(c["latitude"]),
+            "longitude": pa.array(c["longitude"]),
+        }
+        arrays.update((name, pa.array(c[name], from_pandas=True)) for name, _ in _VALUES)   # NaN -> null
+        arrays.update((name, pa.array(c[name], mask=c[name] < 0)) for name in _CODES)
+        arrays["icon"] = pa.DictionaryArray.from_arrays(pa.array(c["icon"], mask=c["icon"] < 0), pa.array(ICONS))
+        table = pa.Table.from_arrays(list(arrays.values()), names=list(arrays))
+        table = table.replace_schema_metadata({"legend": jsonio.dumps(legend())})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def encode(self, fmt: str) -> bytes:
+        """Body đã serialize cho json | ndjson | arrow (tính một lần rồi giữ lại)."""
+        body = self._encoded.get(fmt)
+        if body is not None:
+            return body
+        if fmt == "arrow":
+            if pa is None:
+                raise ValueError("Định dạng arrow cần cài pyarrow; dùng format=json hoặc ndjson.")
+            body = self._arrow()
+        elif fmt == "ndjson":
+            cols = self._plain()
+            names = list(cols)
+            body = b"".join(jsonio.dumps(dict(zip(names, row))) + b"\n" for row in zip(*cols.values()))
+        elif fmt == "json":
+            body = jsonio.dumps({"status": "ok", "data": {
+                "count": len(self),
+                "columns": self._plain(),
+                "legend": legend(),
+            }})
+        else:
+            raise ValueError(f"format không hợp lệ: {fmt} (json | ndjson | arrow)")
+        self._encoded[fmt] = body
+        return body
+
+    def sizes(self) -> Dict[str, int]:
+        return {fmt: len(body) for fmt, body in self._encoded.items()}
+
+# --------------------------------------
+# Dựng bảng
+#   - tải dự báo cho mọi địa danh có tọa độ, tối đa SNAPSHOT_CONCURRENCY địa danh cùng lúc
+#     (get_weather gom các điểm thành batch upstream và đọc cache do prewarm nạp)
+#   - phân loại mức & mức cảnh báo tính trên cột cho cả nước một lượt
+#   - địa danh lỗi: số liệu NaN, mã -1
+# --------------------------------------
+async def _fetch(lat: float, lon: float, sem: asyncio.Semaphore) -> Optional[Dict[str, Any]]:
+    async with sem:
+        try:
+            om = await get_weather(lat, lon)
+        except Exception:
+            return None
+    return map_to_unified(om.get("current", {}) or {}, om.get("hourly", {}) or {}, om.get("daily", {}) or {})
+
+async def build() -> Snapshot:
+    started = time.time()
+    ids = [rid for rid, lat, lon in gazetteer.points() if lat or lon]
+    locs = [gazetteer.to_location(gazetteer.get_record(rid)) for rid in ids]
+    sem = asyncio.Semaphore(max(1, SNAPSHOT_CONCURRENCY))
+    unified = await asyncio.gather(*(_fetch(float(loc["latitude"]), float(loc["longitude"]), sem) for loc in locs))
+
+    n = len(locs)
+    ok = np.array([u is not None for u in unified], dtype=bool)
+    sample = next((u for u in unified if u), {})
+    unified_cols = {k: [(u or {}).get(k) for u in unified] for k in sample}
+
+    def _num(key: str) -> np.ndarray:
+        return np.array([np.nan if v is None else v for v in unified_cols.get(key) or [None] * n], dtype=np.float32)
+
+    columns: Dict[str, Any] = {
+        "id": np.array(ids, dtype=np.uint32),
+        "type": np.array([TYPES.index(loc["type"]) for loc in locs], dtype=np.int8),
+        "name": [loc["name"] for loc in locs],
+        "province": [loc["admin1"] for loc in locs],
+        "latitude": np.array([loc["latitude"] for loc in locs], dtype=np.float32),
+        "longitude": np.array([loc["longitude"] for loc in locs], dtype=np.float32),
+    }
+    columns.update((name, _num(key)) for name, key in _VALUES)
+
+    status = unified_cols.get("status_code_now") or [None] * n
+    columns["weather_code"] = np.array([-1 if s is None else s for s in status], dtype=np.int16)
+    columns["temp_level"] = classify_temp_level_codes(columns["temperature"]).astype(np.int8)
+    columns["rain_level"] = classify_rain_level_codes(columns["precipitation"]).astype(np.int8)
+    columns["beaufort"] = classify_wind_beaufort_codes(columns["wind_speed"]).astype(np.int8)
+
+    # Cùng mức và icon như bản tin: điểm cảnh báo cao nhất, không có thì theo trạng thái thời tiết;
+    # trạng thái không khớp từ khóa (sương mù, thiếu mã) -> default.ico thay vì ngẫu nhiên, để digest ổn định
+    score = alert_severity_many(unified_cols) if unified_cols else np.zeros(n, dtype=np.int8)
+    columns["severity"] = np.where(ok, score, -1).astype(np.int8)
+    icon_index = {name: i for i, name in enumerate(ICONS)}
+    columns["icon"] = np.array([
+        icon_index[severity_icon(sc, _code_to_text(s), fallback="default.ico")[0]] if good else -1
+        for sc, s, good in zip(columns["severity"].tolist(), status, ok.tolist())
+    ], dtype=np.int8)
+
+    return Snapshot(columns, started)
+
+# --------------------------------------
+# Bản hiện hành + dựng một lần cho mọi người chờ (single-flight)
+# --------------------------------------
+_current: Optional[Snapshot] = None
+_building: Optional["asyncio.Future[Snapshot]"] = None
+
+_stats: Dict[str, Any] = {"runs": 0, "rows": 0, "last_errors": 0, "last_run_at": None, "last_duration_s": None, "next_run_at": None}
+
+def current() -> Optional[Snapshot]:
+    return _current
+
+def _start_refresh() -> "asyncio.Future[Snapshot]":
+    global _building
+    if _building is None or _building.done():
+        _building = asyncio.ensure_future(_refresh())
+    return _building
+
+async def refresh() -> Snapshot:
+    """Dựng lại bảng; nếu đang có một lượt dựng thì chờ chung lượt đó."""
+    return await asyncio.shield(_start_refresh())
+
+async def _refresh() -> Snapshot:
+    global _current
+    started = time.time()
+    snap = await build()
+    if _current is not None and _current.digest == snap.digest:
+        snap._encoded = _current._encoded   # số liệu không đổi: giữ body đã serialize
+    _current = snap
+    _stats["runs"] += 1
+    _stats["rows"] = len(snap)
+    _stats["last_errors"] = int((snap.columns["severity"] < 0).sum())
+    _stats["last_run_at"] = int(started)
+    _stats["last_duration_s"] = round(time.time() - started, 2)
+    log.info(f"🗺️ Snapshot: {len(snap)} địa danh, {_stats['last_errors']} lỗi, {_stats['last_duration_s']}s")
+    return snap
+
+def _due(now: float) -> float:
+    """Mốc dựng lại gần nhất đã tới: mốc cập nhật model + SNAPSHOT_DELAY_SECONDS."""
+    return last_model_update(now - SNAPSHOT_DELAY_SECONDS) + SNAPSHOT_DELAY_SECONDS
+
+def _log_failure(fut: "asyncio.Future[Snapshot]") -> None:
+    if not fut.cancelled() and fut.exception() is not None:
+        log.error(f"Lỗi dựng snapshot: {fut.exception()}")
+
+async def get() -> Snapshot:
+    """
+    Bản hiện hành; chưa có thì dựng (hoặc chờ lượt đang dựng).
+    Bản cũ hơn mốc dựng lại gần nhất (vd. SNAPSHOT_ENABLED=false, không có vòng nền):
+    vẫn trả ngay, đồng thời dựng lại nền (một lượt cho mọi request).
+    """
+    if _current is None:
+        return await refresh()
+    if _current.generated_at < _due(time.time()) and (_building is None or _building.done()):
+        _start_refresh().add_done_callback(_log_failure)
+    return _current
+
+# --------------------------------------
+# Lịch chạy: như prewarm, ngay khi khởi động rồi sau mỗi mốc cập nhật model
+# --------------------------------------
+_task: Optional["asyncio.Task[None]"] = None
+
+async def _loop() -> None:
+    while True:
+        try:
+            await refresh()
+        except Exception as e:
+            log.error(f"Lỗi dựng snapshot: {e}")
+        next_at = next_model_update() + SNAPSHOT_DELAY_SECONDS
+        _stats["next_run_at"] = int(next_at)
+        await asyncio.sleep(max(1.0, next_at - time.time()))
+
+def start() -> None:
+    global _task
+    if not SNAPSHOT_ENABLED:
+        return
+    if _task is None or _task.done():
+        _task = asyncio.ensure_future(_loop())
+
+async def stop() -> None:
+    global _task, _building
+    for t in (_task, _building):
+        if t is not None:
+            t.cancel()
+            try:
+                await t
+            except asyncio.CancelledError:
+                pass
+    _task = _building = None
+
+def stats() -> Dict[str, Any]:
+    return dict(
+        _stats,
+        enabled=SNAPSHOT_ENABLED,
+        arrow=pa is not None,
+        generated_at=_current.generated_iso() if _current is not None else None,
+        encoded_bytes=_current.sizes() if _current is not None else {},
+    )
@@ -2,6 +2,10 @@
 from typing import Dict, Any, List, Optional
 import datetime
 
+import numpy as np
+
+from services.rules import Scale
+
 # -------------------------------
 # Chuẩn hóa dữ liệu
 # -------------------------------
@@ -27,41 +31,76 @@ def _is_night(now: Optional[datetime.datetime] = None) -> bool:
 
 # -------------------------------
 # Phân loại mức độ bức xạ mặt trời
+#   mã cho mảng: 0..2 = mức theo vùng (0 = mạnh nhất), 3..4 = bị mây che (≥90%, ≥70%), 5 = ban đêm
 # -------------------------------
+SOLAR_NIGHT = "🌙 Ban đêm, không có bức xạ mặt trời."
+
+SOLAR_LEVELS: Dict[str, Scale] = {
+    "north": Scale([
+        ("<", 0, None),
+        (">=", 800, "🔆 Bức xạ mặt trời rất mạnh (≥800 W/m²), trời nắng gắt."),
+        (">=", 400, "🔆 Bức xạ mặt trời trung bình (400–800 W/m²)."),
+    ], default="🔆 Bức xạ mặt trời yếu (<400 W/m²)."),
+    "central_south": Scale([
+        ("<", 0, None),
+        (">=", 700, "🔆 Bức xạ mặt trời mạnh (≥700 W/m²)."),
+        (">=", 350, "🔆 Bức xạ mặt trời trung bình (350–700 W/m²)."),
+    ], default="🔆 Bức xạ mặt trời yếu (<350 W/m²)."),
+}
+
+# Mây dày: thay cho mức theo vùng
+SOLAR_CLOUD_LEVELS = Scale([
+    (">=", 90, "🔆 Bức xạ mặt trời rất thấp do mây dày đặc."),
+    (">=", 70, "🔆 Bức xạ mặt trời thấp do mây che phủ nhiều."),
+])
+
+def _solar_levels(region: str) -> Scale:
+    return SOLAR_LEVELS["north" if region == "north" else "central_south"]
+
+def solar_legend(region: str = "north") -> List[str]:
+    """Câu ứng với từng mã của classify_solar_codes."""
+    return _solar_levels(region).legend() + SOLAR_CLOUD_LEVELS.legend() + [SOLAR_NIGHT]
+
 def classify_solar(solar: Any, region: str = "north", cloudcover: Any = None, now: Optional[datetime.datetime] = None) -> Optional[str]:
     if _is_night(now):
-        return "🌙 Ban đêm, không có bức xạ mặt trời."
+        return SOLAR_NIGHT
 
     s = _to_float(solar)
     if s is None or s < 0:
         return None
+    return SOLAR_CLOUD_LEVELS.text(_to_float(cloudcover)) or _solar_levels(region).text(s)
 
-    cc = _to_float(cloudcover)
-    if cc is not None:
-        if cc >= 90:
-            return "🔆 Bức xạ mặt trời rất thấp do mây dày đặc."
-        elif cc >= 70:
-            return "🔆 Bức xạ mặt trời thấp do mây che phủ nhiều."
-
-    if region == "north":
-        if s >= 800:
-            return "🔆 Bức xạ mặt trời rất mạnh (≥800 W/m²), trời nắng gắt."
-        if s >= 400:
-            return "🔆 Bức xạ mặt trời trung bình (400–800 W/m²)."
-        return "🔆 Bức xạ mặt trời yếu (<400 W/m²)."
-    else:
-        if s >= 700:
-            return "🔆 Bức xạ mặt trời mạnh (≥700 W/m²)."
-        if s >= 350:
-            return "🔆 Bức xạ mặt trời trung bình (350–700 W/m²)."
-        return "🔆 Bức xạ mặt trời yếu (<350 W/m²)."
+def classify_solar_codes(solar: Any, region: str = "north", cloudcover: Any = None, now: Optional[datetime.datetime] = None) -> np.ndarray:
+    """Như classify_solar cho cả mảng W/m² (xem solar_legend); thiếu hoặc âm -> -1."""
+    levels = _solar_levels(region)
+    codes = levels.codes(solar)
+    if _is_night(now):
+        return np.full_like(codes, len(levels.labels) + len(SOLAR_CLOUD_LEVELS.labels))
+    if cloudcover is not None:
+        cloud = SOLAR_CLOUD_LEVELS.codes(cloudcover)
+        codes = np.where((codes >= 0) & (cloud >= 0), len(levels.labels) + cloud, codes).astype(np.int16)
+    return codes
 
 # -------------------------------
-# Phân loại mức độ UV
+# Phân loại mức độ UV (chuẩn WHO/EPA)
+#   mã cho mảng: 0..4 = cực đoan ... thấp, 5 = ban đêm
 # -------------------------------
+UV_NIGHT = "🌙 Ban đêm, chỉ số UV bằng 0."
+
+UV_LEVELS = Scale([
+    (">=", 11, "☀️ UV cực đoan (≥11), tránh nắng hoàn toàn."),
+    (">=", 8, "☀️ UV rất cao (8–10), cần bảo vệ da và mắt."),
+    (">=", 6, "☀️ UV cao (6–7), nên dùng kem chống nắng."),
+    (">=", 3, "ℹ️ UV trung bình (3–5), cần lưu ý khi ra ngoài lâu."),
+], default="🙂 UV thấp (0–2), an toàn khi ra ngoài.")
+
+def uv_legend() -> List[str]:
+    """Câu ứng với từng mã của classify_uv_codes."""
+    return UV_LEVELS.legend() + [UV_NIGHT]
+
 def classify_uv(uv: Any, precipitation: Any = None, cloudcover: Any = None, now: Optional[datetime.datetime] = None) -> Optional[str]:
     if _is_night(now):
-        return "🌙 Ban đêm, chỉ số UV bằng 0."
+        return UV_NIGHT
 
     u = _to_float(uv)
     if u is None or u < 0:
@@ -70,27 +109,30 @@ def classify_uv(uv: Any, precipitation: Any = None, cloudcover: Any = None, now:
     # Giảm UV do mưa và mây (cộng dồn)
     reduction = 0
     rain = _to_float(precipitation)
-    cc = _to_float(cloudcover)
     if rain is not None and rain > 0:
         reduction += 2
+    cc = _to_float(cloudcover)
     if cc is not None:
         if cc >= 90:
             reduction += 2
         elif cc >= 70:
             reduction += 1
-    u = max(0, u - reduction)
-
-    # Chuẩn WHO/EPA
-    if u >= 11:
-        return "☀️ UV cực đoan (≥11), tránh nắng hoàn toàn."
-    elif u >= 8:
-        return "☀️ UV rất cao (8–10), cần bảo vệ da và mắt."
-    elif u >= 6:
-        return "☀️ UV cao (6–7), nên dùng kem chống nắng."
-    elif u >= 3:
-        return "ℹ️ UV trung bình (3–5), cần lưu ý khi ra ngoài lâu."
-    else:
-        return "🙂 UV thấp (0–2), an toàn khi ra ngoài."
+    return UV_LEVELS.text(max(0, u - reduction))
+
+def classify_uv_codes(uv: Any, precipitation: Any = None, cloudcover: Any = None, now: Optional[datetime.datetime] = None) -> np.ndarray:
+    """Như classify_uv cho cả mảng (xem uv_legend); thiếu hoặc âm -> -1."""
+    u = np.asarray(uv, dtype=np.float64)
+    if _is_night(now):
+        return np.full(u.shape, len(UV_LEVELS.labels), dtype=np.int16)
+    reduction = np.zeros_like(u)
+    if precipitation is not None:
+        reduction += np.where(np.asarray(precipitation, dtype=np.float64) > 0, 2, 0)
+    if cloudcover is not None:
+        cc = np.asarray(cloudcover, dtype=np.float64)
+        reduction += np.select([cc >= 90, cc >= 70], [2, 1], 0)
+    codes = UV_LEVELS.codes(np.maximum(0, u - reduction))
+    codes[np.isnan(u) | (u < 0)] = -1
+    return codes
 
 # -------------------------------
 # Hàm phụ định dạng bức xạ và UV
@@ -0,0 +1,133 @@
+# services/spatial_index.py
+import math
+import heapq
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from configs import SPATIAL_CELL_DEG
+from services import gazetteer
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+# --------------------------------------
+# Chỉ mục lưới (grid buckets) trên lat/lon
+#   - mỗi ô cell_deg × cell_deg chứa id các điểm nằm trong ô
+#   - truy vấn mở rộng dần theo vòng ô quanh điểm cần tìm
+# --------------------------------------
+class GridIndex:
+    def __init__(self, points: Iterable[Tuple[int, float, float]], cell_deg: float = SPATIAL_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = {}
+        self.size = 0
+        for pid, lat, lon in points:
+            self.cells.setdefault(self._cell(lat, lon), []).append((pid, lat, lon))
+            self.size += 1
+        if self.cells:
+            rows = [c[0] for c in self.cells]
+            cols = [c[1] for c in self.cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+        else:
+            self._bounds = (0, 0, 0, 0)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def _ring(self, r0: int, c0: int, ring: int) -> Iterable[Tuple[int, float, float]]:
+        if ring == 0:
+            yield from self.cells.get((r0, c0), ())
+            return
+        # Chỉ duyệt phần vòng nằm trong khung chỉ mục (ngoài khung chắc chắn rỗng)
+        rmin, rmax, cmin, cmax = self._bounds
+        for r in range(max(r0 - ring, rmin), min(r0 + ring, rmax) + 1):
+            if abs(r - r0) == ring:
+                cols = range(max(c0 - ring, cmin), min(c0 + ring, cmax) + 1)
+            else:
+                cols = [c for c in (c0 - ring, c0 + ring) if cmin <= c <= cmax]
+            for c in cols:
+                yield from self.cells.get((r, c), ())
+
+    def _ring_min_km(self, lat: float, ring: int) -> float:
+        """Khoảng cách tối thiểu (km) từ điểm truy vấn tới một ô ở vòng `ring`."""
+        if ring <= 0:
+            return 0.0
+        deg = (ring - 1) * self.cell_deg
+        # Kinh độ co lại theo cos(lat); lấy cận dưới an toàn
+        lat_edge = min(89.0, abs(lat) + ring * self.cell_deg)
+        return math.radians(deg) * EARTH_RADIUS_KM * math.cos(math.radians(lat_edge))
+
+    def _max_ring(self, r0: int, c0: int) -> int:
+        rmin, rmax, cmin, cmax = self._bounds
+        return max(r0 - rmin, rmax - r0, c0 - cmin, cmax - c0, 0)
+
+    def _min_ring(self, r0: int, c0: int) -> int:
+        """Vòng đầu tiên chạm khung chỉ mục (điểm truy vấn nằm ngoài khung -> bỏ qua các vòng rỗng)."""
+        rmin, rmax, cmin, cmax = self._bounds
+        return max(rmin - r0, r0 - rmax, cmin - c0, c0 - cmax, 0)
+
+    def k_nearest(self, lat: float, lon: float, k: int = 1, max_km: Optional[float] = None) -> List[Tuple[float, int]]:
+        """Trả về tối đa k cặp (khoảng cách km, id) gần nhất, tăng dần theo khoảng cách."""
+        if k <= 0 or not self.cells:
+            return []
+        r0, c0 = self._cell(lat, lon)
+        heap: List[Tuple[float, int]] = []  # max-heap theo khoảng cách (lưu -dist)
+        for ring in range(self._min_ring(r0, c0), self._max_ring(r0, c0) + 1):
+            bound = self._ring_min_km(lat, ring)
+            if max_km is not None and bound > max_km:
+                break
+            if len(heap) >= k and bound > -heap[0][0]:
+                break
+            for pid, plat, plon in self._ring(r0, c0, ring):
+                d = haversine_km(lat, lon, plat, plon)
+                if max_km is not None and d > max_km:
+                    continue
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d, pid))
+                elif d < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d, pid))
+        return sorted((-nd, pid) for nd, pid in heap)
+
+    def nearest(self, lat: float, lon: float, max_km: Optional[float] = None) -> Optional[Tuple[float, int]]:
+        res = self.k_nearest(lat, lon, k=1, max_km=max_km)
+        return res[0] if res else None
+
+# --------------------------------------
+# Chỉ mục dùng chung cho gazetteer (xây lười, một lần)
+# --------------------------------------
+_indexes: Dict[str, GridIndex] = {}
+
+def get_index(kind: str = "ward") -> GridIndex:
+    """kind: 'ward' | 'province' | 'all'."""
+    idx = _indexes.get(kind)
+    if idx is None:
+        # Bỏ qua bản ghi thiếu tọa độ (dữ liệu gốc ghi 0,0)
+        pts = [(rid, lat, lon) for rid, lat, lon in gazetteer.points(kind) if lat or lon]
+        idx = GridIndex(pts)
+        _indexes[kind] = idx
+    return idx
+
+def build_indexes() -> None:
+    for kind in ("ward", "province"):
+        get_index(kind)
+
+def nearest_place(lat: float, lon: float, max_km: Optional[float] = None, kind: str = "ward") -> Optional[Dict[str, Any]]:
+    hit = get_index(kind).nearest(lat, lon, max_km=max_km)
+    if hit is None:
+        return None
+    dist, rid = hit
+    loc = gazetteer.to_location(gazetteer.get_record(rid))
+    loc["distance_km"] = round(dist, 3)
+    return loc
+
+def nearest_places(lat: float, lon: float, k: int = 5, max_km: Optional[float] = None, kind: str = "ward") -> List[Dict[str, Any]]:
+    out = []
+    for dist, rid in get_index(kind).k_nearest(lat, lon, k=k, max_km=max_km):
+        loc = gazetteer.to_location(gazetteer.get_record(rid))
+        loc["distance_km"] = round(dist, 3)
+        out.append(loc)
+    return out
@@ -1,6 +1,10 @@
 # services/temperature.py
 from typing import Dict, Any, List, Optional, Tuple
 
+import numpy as np
+
+from services.rules import Scale
+
 def _to_float(val: Any) -> Optional[float]:
     try:
         if val is None:
@@ -57,43 +61,44 @@ def compute_hourly_anomaly(temp: Any, avg_temp_hour: Any) -> Optional[float]:
         return None
     return _round1(t / ah)
 
+# Bảng mức nhiệt theo vùng: cùng số mức, mã nhãn (0 = nóng nhất) trùng nghĩa giữa hai vùng
+TEMP_LEVELS: Dict[str, Scale] = {
+    # Miền Bắc: 18–24°C coi là mát mẻ, ≤17°C mới là lạnh
+    "north": Scale([
+        (">=", 40, "🔥 Cực kỳ nóng (≥40°C)"),
+        (">=", 35, "🌡️ Rất nóng (≥35°C)"),
+        (">=", 30, "☀️ Nóng (30–34°C)"),
+        (">=", 25, "🙂 Ấm áp (25–29°C)"),
+        (">=", 18, "🌤️ Mát mẻ (18–24°C)"),
+        (">=", 10, "🥶 Lạnh (10–17°C)"),
+        (">", 0, "❄️ Rất lạnh (1–9°C)"),
+    ], default="🧊 Cực lạnh (≤0°C)"),
+    # Miền Trung/Nam: 20–24°C coi là mát mẻ, ≤19°C đã là lạnh
+    "central_south": Scale([
+        (">=", 40, "🔥 Cực kỳ nóng (≥40°C)"),
+        (">=", 35, "🌡️ Rất nóng (≥35°C)"),
+        (">=", 30, "☀️ Nóng (30–34°C)"),
+        (">=", 25, "🙂 Ấm áp (25–29°C)"),
+        (">=", 20, "🌤️ Mát mẻ (20–24°C)"),
+        (">=", 15, "🥶 Lạnh (15–19°C)"),
+        (">", 0, "❄️ Rất lạnh (1–14°C)"),
+    ], default="🧊 Cực lạnh (≤0°C)"),
+}
+
+def _temp_levels(region: str) -> Scale:
+    return TEMP_LEVELS["north" if region == "north" else "central_south"]
+
 def classify_temp_level(temp: Any, region: str = "north") -> Optional[str]:
     """
     Phân loại mức độ nhiệt độ theo vùng miền:
       - region="north": Miền Bắc (quen chịu lạnh, 18°C vẫn coi là mát mẻ)
       - region="central_south": Miền Trung/Nam (18°C đã coi là lạnh)
     """
-    t = _to_float(temp)
-    if t is None:
-        return None
+    return _temp_levels(region).text(_to_float(temp))
 
-    if t >= 40:
-        return "🔥 Cực kỳ nóng (≥40°C)"
-    if t >= 35:
-        return "🌡️ Rất nóng (≥35°C)"
-    if t >= 30:
-        return "☀️ Nóng (30–34°C)"
-    if t >= 25:
-        return "🙂 Ấm áp (25–29°C)"
-
-    if region == "north":
-        # Miền Bắc: 18–24°C coi là mát mẻ, ≤17°C mới là lạnh
-        if t >= 18:
-            return "🌤️ Mát mẻ (18–24°C)"
-        if t >= 10:
-            return "🥶 Lạnh (10–17°C)"
-        if t > 0:
-            return "❄️ Rất lạnh (1–9°C)"
-        return "🧊 Cực lạnh (≤0°C)"
-    else:
-        # Miền Trung/Nam: 20–24°C coi là mát mẻ, ≤19°C đã là lạnh
-        if t >= 20:
-            return "🌤️ Mát mẻ (20–24°C)"
-        if t >= 15:
-            return "🥶 Lạnh (15–19°C)"
-        if t > 0:
-            return "❄️ Rất lạnh (1–14°C)"
-        return "🧊 Cực lạnh (≤0°C)"
+def classify_temp_level_codes(temps: Any, region: str = "north") -> np.ndarray:
+    """Như classify_temp_level cho cả mảng: mã mức (xem TEMP_LEVELS[...].legend()), NaN/None -> -1."""
+    return _temp_levels(region).codes(temps)
 
 def build_temperature_summary(unified: Dict[str, Any], region: str = "north") -> Dict[str, Any]:
     # Naming khớp tuyệt đối với unified từ helpers
@@ -2,6 +2,11 @@
 from typing import Optional, Dict, Any
 import datetime
 
+import numpy as np
+
+from services.forecast import time_axis
+from services.rules import Scale
+
 def _to_float(val: Any) -> Optional[float]:
     """Chuyển đổi giá trị sang float an toàn."""
     try:
@@ -18,26 +23,24 @@ def _round1(val: Optional[float]) -> Optional[float]:
 # -------------------------------
 # Phân loại tầm nhìn (visibility)
 # -------------------------------
+# So sánh trên giá trị km đã làm tròn 1 chữ số; mã 0 = tầm nhìn xa ... 4 = rất kém
+VISIBILITY_LEVELS = Scale([
+    (">=", 10, "👀 Tầm nhìn xa, điều kiện lý tưởng."),
+    (">=", 5, "👀 Tầm nhìn tốt, ít ảnh hưởng giao thông."),
+    (">=", 2, "⚠️ Tầm nhìn hạn chế, cần thận trọng khi lái xe."),
+    (">=", 1, "⚠️ Tầm nhìn kém, nguy hiểm cho giao thông."),
+], default="🚨 Tầm nhìn rất kém (<1 km), nguy cơ cao tai nạn.", ndigits=1)
+
 def classify_visibility(vis_km: Optional[float]) -> str:
     """
     Phân loại mức độ tầm nhìn theo km.
     - vis_km: tầm nhìn (km)
     """
-    if vis_km is None:
-        return "—"
-
-    vis_km = _round1(vis_km)  # chuẩn hóa trước khi phân loại
+    return VISIBILITY_LEVELS.text(_to_float(vis_km)) or "—"
 
-    if vis_km >= 10:
-        return "👀 Tầm nhìn xa, điều kiện lý tưởng."
-    elif 5 <= vis_km < 10:
-        return "👀 Tầm nhìn tốt, ít ảnh hưởng giao thông."
-    elif 2 <= vis_km < 5:
-        return "⚠️ Tầm nhìn hạn chế, cần thận trọng khi lái xe."
-    elif 1 <= vis_km < 2:
-        return "⚠️ Tầm nhìn kém, nguy hiểm cho giao thông."
-    else:  # < 1 km
-        return "🚨 Tầm nhìn rất kém (<1 km), nguy cơ cao tai nạn."
+def classify_visibility_codes(vis_km: Any) -> np.ndarray:
+    """Mã mức tầm nhìn cho cả mảng km (xem VISIBILITY_LEVELS.legend()), NaN/None -> -1."""
+    return VISIBILITY_LEVELS.codes(vis_km)
 
 # -------------------------------
 # Hàm phân tích tổng quan tầm nhìn
@@ -66,11 +69,8 @@ def analyze_visibility(daily: Dict[str, Any], hourly: Dict[str, Any]) -> Dict[st
         today_str = datetime.date.today().isoformat()
 
         today_vals = [
-            _to_float(v) / 1000.0 for i, v in enumerate(vis_series)
-            if i < len(times)
-            and isinstance(times[i], str)
-            and times[i].startswith(today_str)
-            and _to_float(v) is not None
+            _to_float(v) / 1000.0 for v in vis_series[time_axis(times).day_slice(today_str)]
+            if _to_float(v) is not None
         ]
         if today_vals:
             vis_avg_day = _round1(sum(today_vals) / len(today_vals))
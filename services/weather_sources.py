@@ -1,10 +1,34 @@
 # services/weather_sources.py
-import httpx
+import time
+import asyncio
+import hashlib
+import logging
 import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
 from zoneinfo import ZoneInfo
 
-OPEN_METEO_FORECAST = "https://api.open-meteo.com/v1/forecast"
+from configs import (
+    APP_NAME,
+    OPEN_METEO_FORECAST,
+    STALE_WHILE_REVALIDATE_SECONDS,
+    STALE_IF_ERROR_SECONDS,
+    FORECAST_BATCH_ENABLED,
+    FORECAST_BATCH_WINDOW_MS,
+    FORECAST_BATCH_MAX_POINTS,
+    FORECAST_STATS_WINDOWS,
+    BULLETIN_FORECAST_DAYS,
+)
+from services import http_client
+from services import jsonio
+from services.singleflight import SingleFlight
+from services.batcher import MicroBatcher, split_pairs
+from services.cache import FORECAST_CACHE, CacheEntry, hash_key, next_model_update
+from services.forecast import Forecast, WINDOW_NAMES, is_window
+from services import grid
+from services import projection
+from services.projection import Projection
+
+log = logging.getLogger(APP_NAME)
 
 def _first(v):
     if isinstance(v, list) and v:
@@ -17,94 +41,306 @@ def _round1(val):
     except Exception:
         return None
 
-async def fetch_openmeteo(lat: float, lon: float) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.get(
-            OPEN_METEO_FORECAST,
-            params={
-                "latitude": lat,
-                "longitude": lon,
-                "current_weather": "true",
-                "hourly": (
-                    "temperature_2m,apparent_temperature,precipitation,"
-                    "precipitation_probability,wind_speed_10m,wind_gusts_10m,"
-                    "winddirection_10m,relative_humidity_2m,pressure_msl,"
-                    "shortwave_radiation,uv_index,cloudcover,dewpoint_2m,visibility"
-                ),
-                "daily": (
-                    "temperature_2m_max,temperature_2m_min,temperature_2m_mean,"
-                    "precipitation_sum,precipitation_probability_mean,"
-                    "relative_humidity_2m_mean,pressure_msl_mean,"
-                    "shortwave_radiation_sum,uv_index_max,"
-                    "sunrise,sunset,cloudcover_mean,dewpoint_2m_mean"
-                )
-            }
+HOURLY_FIELDS = (
+    "temperature_2m,apparent_temperature,precipitation,"
+    "precipitation_probability,wind_speed_10m,wind_gusts_10m,"
+    "winddirection_10m,relative_humidity_2m,pressure_msl,"
+    "shortwave_radiation,uv_index,cloudcover,dewpoint_2m,visibility"
+)
+DAILY_FIELDS = (
+    "temperature_2m_max,temperature_2m_min,temperature_2m_mean,"
+    "precipitation_sum,precipitation_probability_mean,"
+    "relative_humidity_2m_mean,pressure_msl_mean,"
+    "shortwave_radiation_sum,uv_index_max,"
+    "sunrise,sunset,cloudcover_mean,dewpoint_2m_mean"
+)
+# Biến hourly có trung bình/thống kê trong get_weather
+STATS_FIELDS = (
+    "temperature_2m", "apparent_temperature", "wind_speed_10m", "wind_gusts_10m",
+    "precipitation", "precipitation_probability", "relative_humidity_2m", "pressure_msl",
+    "shortwave_radiation", "uv_index", "cloudcover", "dewpoint_2m", "visibility",
+)
+
+# Cửa sổ cho avg_* (trung bình trong bản tin, luật so sánh với trung bình) và max_* (cực đại ngày)
+AVG_WINDOW = "next24h"
+MAX_WINDOW = "today"
+
+# Kiểm tra FORECAST_STATS_WINDOWS ngay lúc khởi động: một tên sai làm mọi get_weather lỗi
+_bad_windows = [w for w in FORECAST_STATS_WINDOWS if not is_window(w)]
+if _bad_windows:
+    raise ValueError(f"FORECAST_STATS_WINDOWS không hợp lệ: {', '.join(_bad_windows)} (hỗ trợ: {' | '.join(WINDOW_NAMES)})")
+
+# --------------------------------------
+# Projection theo consumer (xem services/projection.py)
+#   - bulletin: các biến ở trên + OPEN_METEO_FIELDS_*, tầm BULLETIN_FORECAST_DAYS ngày
+#   - weather : route /weather (3 biến hourly, tầm mặc định)
+# --------------------------------------
+BULLETIN = projection.register("bulletin", Projection(
+    hourly=HOURLY_FIELDS.split(","),
+    daily=DAILY_FIELDS.split(","),
+    current_weather=True,
+    forecast_days=BULLETIN_FORECAST_DAYS,
+), with_env=True)
+WEATHER = projection.register("weather", Projection(
+    hourly=("temperature_2m", "precipitation", "wind_speed_10m"),
+))
+
+async def fetch_openmeteo(lat: float, lon: float, proj: Projection = BULLETIN) -> Dict[str, Any]:
+    return await http_client.get_json(
+        OPEN_METEO_FORECAST,
+        params=dict(proj.params(), latitude=lat, longitude=lon),
+    )
+
+async def fetch_openmeteo_many(points: List[Tuple[float, float]], proj: Projection = BULLETIN) -> List[Dict[str, Any]]:
+    """
+    Một request cho nhiều điểm (latitude/longitude phân tách bằng dấu phẩy).
+    Open-Meteo trả object khi chỉ có 1 điểm, list theo đúng thứ tự khi nhiều điểm.
+    """
+    lats, lons = split_pairs(points)
+    data = await http_client.get_json(
+        OPEN_METEO_FORECAST,
+        params=dict(proj.params(), latitude=lats, longitude=lons),
+    )
+    return data if isinstance(data, list) else [data]
+
+# --------------------------------------
+# Gom nhiều điểm vào một request upstream
+#   cửa sổ FORECAST_BATCH_WINDOW_MS hoặc tối đa FORECAST_BATCH_MAX_POINTS điểm
+#   mỗi projection một batcher (một request chỉ mang một bộ tham số)
+# --------------------------------------
+_batchers: Dict[str, "MicroBatcher[Tuple[float, float], Dict[str, Any]]"] = {}
+
+def _batcher(proj: Projection) -> "MicroBatcher[Tuple[float, float], Dict[str, Any]]":
+    sig = proj.signature()
+    b = _batchers.get(sig)
+    if b is None:
+        b = MicroBatcher(
+            "openmeteo_forecast",
+            lambda points: fetch_openmeteo_many(points, proj),
+            window=FORECAST_BATCH_WINDOW_MS / 1000.0,
+            max_items=FORECAST_BATCH_MAX_POINTS,
         )
-        resp.raise_for_status()
-        return resp.json()
+        _batchers[sig] = b
+    return b
+
+async def fetch_point(lat: float, lon: float, proj: Projection = BULLETIN) -> Dict[str, Any]:
+    if FORECAST_BATCH_ENABLED:
+        return await _batcher(proj).submit((lat, lon))
+    return await fetch_openmeteo(lat, lon, proj)
+
+async def drain() -> None:
+    for b in list(_batchers.values()):
+        await b.drain()
+
+# --------------------------------------
+# Single-flight trước fetch_openmeteo
+#   key = ô lưới đã snap (xem services/grid.py) + signature của projection
+#   upstream được gọi tại tâm ô nên mọi điểm cùng ô dùng chung response
+# --------------------------------------
+_forecast_flight = SingleFlight("openmeteo_forecast")
+
+def forecast_key(lat: float, lon: float, proj: Projection = BULLETIN) -> tuple:
+    slat, slon, cell = grid.snap(lat, lon)
+    return (slat, slon, cell, proj.signature())
+
+def forecast_meta(lat: float, lon: float) -> Dict[str, Any]:
+    slat, slon, cell = grid.snap(lat, lon)
+    return {"grid": dict(grid.snap_info(), cell=cell, latitude=slat, longitude=slon)}
+
+def content_version(om: Dict[str, Any], *parts: Any) -> str:
+    """
+    Version của dự báo theo nội dung: băm payload upstream (bỏ generationtime_ms) + ô lưới/projection.
+    Cùng dự báo -> cùng version ở mọi worker và sau restart (dùng cho ETag, key cache bản tin).
+    """
+    h = hashlib.blake2b("|".join(str(p) for p in parts).encode("utf-8"), digest_size=12)
+    h.update(jsonio.dumps({k: v for k, v in om.items() if k != "generationtime_ms"}))
+    return h.hexdigest()
+
+async def _fetch_and_store(key: tuple, cache_key: str, proj: Projection) -> CacheEntry:
+    om = await fetch_point(key[0], key[1], proj)
+    fc = Forecast.from_openmeteo(om)   # parse sang mảng một lần, dùng chung tới khi hết hạn
+    expires_at = next_model_update()
+    keep_until = expires_at + max(STALE_WHILE_REVALIDATE_SECONDS, STALE_IF_ERROR_SECONDS)
+    return FORECAST_CACHE.set(cache_key, fc, expires_at=expires_at, keep_until=keep_until, version=content_version(om, *key[2:]))
+
+# --------------------------------------
+# Stale-while-revalidate / stale-if-error
+#   - quá hạn ≤ STALE_WHILE_REVALIDATE_SECONDS: trả bản cũ ngay, làm mới nền (một lần/key)
+#   - upstream lỗi, quá hạn ≤ STALE_IF_ERROR_SECONDS: trả bản tốt gần nhất kèm cờ stale
+# --------------------------------------
+_revalidations: Set["asyncio.Task[Any]"] = set()
+_revalidating: Set[tuple] = set()   # key đã lên lịch làm mới nhưng task có thể chưa chạy
+_swr_stats: Dict[str, int] = {"revalidations": 0, "revalidation_errors": 0, "served_stale_on_error": 0}
+
+def _revalidate(key: tuple, cache_key: str, proj: Projection) -> None:
+    if key in _revalidating or _forecast_flight.in_flight(key):
+        return
+    _swr_stats["revalidations"] += 1
+    _revalidating.add(key)
+
+    async def _run() -> None:
+        try:
+            await _forecast_flight.do(key, lambda: _fetch_and_store(key, cache_key, proj))
+        except Exception as e:
+            _swr_stats["revalidation_errors"] += 1
+            log.warning(f"Làm mới nền dự báo {key[2]} thất bại: {e}")
+        finally:
+            _revalidating.discard(key)
+
+    task = asyncio.ensure_future(_run())
+    _revalidations.add(task)
+    task.add_done_callback(_revalidations.discard)
+
+def _cache_status(entry: CacheEntry, now: float, stale_reason: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "version": entry.version,
+        "fetched_at": int(entry.stored_at),
+        "expires_at": int(entry.expires_at),
+        "age_seconds": int(entry.age(now)),
+        "stale": stale_reason is not None,
+        "stale_reason": stale_reason,
+    }
+
+async def fetch_forecast_entry(lat: float, lon: float, consumer: str = "bulletin") -> Tuple[Forecast, Dict[str, Any]]:
+    """
+    Dự báo (Forecast dạng mảng) cho một điểm, kèm trạng thái cache (version, stale, ...):
+      - cache LRU, hết hạn ở mốc cập nhật model kế tiếp
+      - cache miss: các request đồng thời cùng key chỉ gọi upstream một lần
+      - bản quá hạn vẫn được dùng theo stale-while-revalidate / stale-if-error
+      - chỉ lấy biến/tầm dự báo mà consumer đã khai báo
+    """
+    proj = projection.resolve(consumer)
+    key = forecast_key(lat, lon, proj)
+    cache_key = hash_key(*key[2:])
+    entry = FORECAST_CACHE.lookup(cache_key)
+    now = time.time()
+    if entry is not None:
+        if entry.is_fresh(now):
+            return entry.value, _cache_status(entry, now)
+        if entry.stale_for(now) <= STALE_WHILE_REVALIDATE_SECONDS:
+            _revalidate(key, cache_key, proj)
+            return entry.value, _cache_status(entry, now, "revalidating")
+    try:
+        fresh = await _forecast_flight.do(key, lambda: _fetch_and_store(key, cache_key, proj))
+    except Exception as e:
+        if entry is not None and entry.stale_for(now) <= STALE_IF_ERROR_SECONDS:
+            _swr_stats["served_stale_on_error"] += 1
+            log.warning(f"Upstream lỗi, dùng dự báo cũ cho {key[2]}: {e}")
+            return entry.value, _cache_status(entry, now, "upstream_error")
+        raise
+    return fresh.value, _cache_status(fresh, time.time())
+
+def cached_version(lat: float, lon: float, consumer: str = "bulletin") -> Optional[Tuple[str, bool]]:
+    """
+    (version, stale) của dự báo mà fetch_forecast_entry sẽ trả ngay từ cache, không gọi upstream;
+    None nếu request kế tiếp phải tải mới. Bản quá hạn trong cửa sổ SWR vẫn được làm mới nền.
+    """
+    proj = projection.resolve(consumer)
+    key = forecast_key(lat, lon, proj)
+    cache_key = hash_key(*key[2:])
+    entry = FORECAST_CACHE.peek(cache_key)
+    if entry is None:
+        return None
+    now = time.time()
+    if entry.is_fresh(now):
+        return entry.version, False
+    if entry.stale_for(now) <= STALE_WHILE_REVALIDATE_SECONDS:
+        _revalidate(key, cache_key, proj)
+        return entry.version, True
+    return None
+
+async def fetch_forecast(lat: float, lon: float, consumer: str = "bulletin") -> Dict[str, Any]:
+    fc, _ = await fetch_forecast_entry(lat, lon, consumer)
+    return fc.raw
+
+async def refresh_forecast(lat: float, lon: float, consumer: str = "bulletin") -> CacheEntry:
+    """Nạp lại dự báo nếu entry chưa có hoặc đã quá hạn (dùng cho prewarm, không tính vào hit/miss)."""
+    proj = projection.resolve(consumer)
+    key = forecast_key(lat, lon, proj)
+    cache_key = hash_key(*key[2:])
+    entry = FORECAST_CACHE.peek(cache_key)
+    if entry is not None and entry.is_fresh():
+        return entry
+    return await _forecast_flight.do(key, lambda: _fetch_and_store(key, cache_key, proj))
+
+def stats() -> Dict[str, Any]:
+    return {
+        "singleflight": _forecast_flight.stats(),
+        "cache": FORECAST_CACHE.stats(),
+        "batcher": {
+            "enabled": FORECAST_BATCH_ENABLED,
+            **{name: _batchers[sig].stats() for name, sig in projection.consumers().items() if sig in _batchers},
+        },
+        "projections": projection.consumers(),
+        "swr": dict(_swr_stats, pending=len(_revalidations)),
+    }
 
 async def get_weather(lat: float, lon: float) -> Dict[str, Any]:
-    om = await fetch_openmeteo(lat, lon)
+    fc, cache_status = await fetch_forecast_entry(lat, lon)
+    om = fc.raw
 
     # Align VN local time to UTC hourly index
     now_local = datetime.datetime.now(ZoneInfo("Asia/Ho_Chi_Minh")).replace(minute=0, second=0, microsecond=0)
     now = now_local.astimezone(datetime.timezone.utc)
-    times = om.get("hourly", {}).get("time", [])
-    idx = None
-    if times:
-        try:
-            idx = times.index(now.isoformat(timespec="minutes"))
-        except ValueError:
-            now_naive = now.replace(tzinfo=None)
-            idx = min(range(len(times)), key=lambda i: abs(datetime.datetime.fromisoformat(times[i]) - now_naive))
+    idx = fc.hour_index(now)
 
     cw = om.get("current_weather", {}) or {}
+    cur = om.get("current", {}) or {}
     hourly = om.get("hourly", {}) or {}
     daily = om.get("daily", {}) or {}
 
+    def _now(field: str, current_field: Optional[str] = None) -> Optional[float]:
+        # Ưu tiên khối current (khi có OPEN_METEO_FIELDS_CURRENT), nếu không lấy theo giờ hiện tại
+        v = cur.get(current_field or field)
+        return _round1(v) if v is not None else fc.at(field, idx)
+
     # Current (instant)
     om_current = {
         "temperature": _round1(cw.get("temperature")),
-        "apparent_temperature": _round1(hourly.get("apparent_temperature", [None])[idx]) if idx is not None else None,
+        "apparent_temperature": _now("apparent_temperature"),
         "wind_speed": _round1(cw.get("windspeed")),
         "gust": _round1(cw.get("windgusts")) if cw.get("windgusts") is not None else _round1(cw.get("windspeed")),
         "wind_direction": _round1(cw.get("winddirection")) if cw.get("winddirection") is not None else None,
-        "precipitation": _round1(hourly.get("precipitation", [None])[idx]) if idx is not None else None,
-        "precipitation_probability": _round1(hourly.get("precipitation_probability", [None])[idx]) if idx is not None else None,
-        "humidity": _round1(hourly.get("relative_humidity_2m", [None])[idx]) if idx is not None else None,
-        "pressure": _round1(hourly.get("pressure_msl", [None])[idx]) if idx is not None else None,
-        "solar_radiation": _round1(hourly.get("shortwave_radiation", [None])[idx]) if idx is not None else None,
-        "uv_index": _round1(hourly.get("uv_index", [None])[idx]) if idx is not None else None,
-        "cloudcover": _round1(hourly.get("cloudcover", [None])[idx]) if idx is not None else None,
-        "dewpoint": _round1(hourly.get("dewpoint_2m", [None])[idx]) if idx is not None else None,
-        "visibility": _round1(hourly.get("visibility", [None])[idx]) if idx is not None else None,
+        "precipitation": _now("precipitation"),
+        "precipitation_probability": _now("precipitation_probability"),
+        "humidity": _now("relative_humidity_2m"),
+        "pressure": _now("pressure_msl"),
+        "solar_radiation": _now("shortwave_radiation"),
+        "uv_index": _now("uv_index"),
+        "cloudcover": _now("cloudcover", "cloud_cover"),
+        "dewpoint": _now("dewpoint_2m", "dew_point_2m"),
+        "visibility": _now("visibility"),
         "status_code": cw.get("weathercode"),
     }
 
-    # Hourly (24h averages)
-    def _safe_avg(values: list) -> Any:
-        try:
-            vals = [float(x) for x in values if x is not None]
-            if not vals:
-                return None
-            return round(sum(vals) / len(vals), 1)
-        except Exception:
-            return None
+    # Hourly (24h averages) – cửa sổ cố định AVG_WINDOW, không phụ thuộc tầm dự báo của projection;
+    # cực đại gió theo MAX_WINDOW (cực đại ngày của bản tin)
+    avg = fc.stats(AVG_WINDOW, fields=STATS_FIELDS, now=now)
+    peak = fc.stats(MAX_WINDOW, fields=("wind_speed_10m", "wind_gusts_10m"), now=now)
+
+    def _mean(field: str) -> Optional[float]:
+        return (avg.get(field) or {}).get("mean")
+
+    def _max(field: str) -> Optional[float]:
+        return (peak.get(field) or {}).get("max")
 
     om_hourly = {
-        "avg_temperature": _safe_avg(hourly.get("temperature_2m", [])),
-        "avg_apparent_temperature": _safe_avg(hourly.get("apparent_temperature", [])),
-        "avg_wind_speed": _safe_avg(hourly.get("wind_speed_10m", [])),
-        "avg_gust": _safe_avg(hourly.get("wind_gusts_10m", [])),
-        "avg_precipitation": _safe_avg(hourly.get("precipitation", [])),
-        "avg_precipitation_probability": _safe_avg(hourly.get("precipitation_probability", [])),
-        "avg_humidity": _safe_avg(hourly.get("relative_humidity_2m", [])),
-        "avg_pressure": _safe_avg(hourly.get("pressure_msl", [])),
-        "avg_solar_radiation": _safe_avg(hourly.get("shortwave_radiation", [])),
-        "avg_uv_index": _safe_avg(hourly.get("uv_index", [])),
-        "avg_cloudcover": _safe_avg(hourly.get("cloudcover", [])),
-        "avg_dewpoint": _safe_avg(hourly.get("dewpoint_2m", [])),
-        "avg_visibility": _safe_avg(hourly.get("visibility", [])),
+        "avg_temperature": _mean("temperature_2m"),
+        "avg_apparent_temperature": _mean("apparent_temperature"),
+        "avg_wind_speed": _mean("wind_speed_10m"),
+        "avg_gust": _mean("wind_gusts_10m"),
+        "avg_precipitation": _mean("precipitation"),
+        "avg_precipitation_probability": _mean("precipitation_probability"),
+        "avg_humidity": _mean("relative_humidity_2m"),
+        "avg_pressure": _mean("pressure_msl"),
+        "avg_solar_radiation": _mean("shortwave_radiation"),
+        "avg_uv_index": _mean("uv_index"),
+        "avg_cloudcover": _mean("cloudcover"),
+        "avg_dewpoint": _mean("dewpoint_2m"),
+        "avg_visibility": _mean("visibility"),
+        "max_wind_speed": _max("wind_speed_10m"),
+        "max_gust": _max("wind_gusts_10m"),
+        "windows": {w: fc.stats(w, fields=STATS_FIELDS) for w in FORECAST_STATS_WINDOWS},
         "series": {
             "time": hourly.get("time", []),
             "temperature_2m": hourly.get("temperature_2m", []),
@@ -127,31 +363,26 @@ async def get_weather(lat: float, lon: float) -> Dict[str, Any]:
     # Daily
     # Nếu daily có precipitation_sum hợp lệ thì dùng,
     # nếu không (None) thì fallback cộng dồn từ hourly series
-    daily_precip = _first(daily.get("precipitation_sum"))
+    daily_precip = fc.daily_first("precipitation_sum")
     if daily_precip is None:  # ✅ chỉ fallback khi None, không khi bằng 0
-        try:
-            daily_precip = sum(
-                float(v) for v in hourly.get("precipitation", []) if v is not None
-            )
-        except Exception:
-            daily_precip = None
+        daily_precip = fc.hourly_sum("precipitation")
 
     om_daily = {
-        "temperature_min": _round1(_first(daily.get("temperature_2m_min"))),
-        "temperature_max": _round1(_first(daily.get("temperature_2m_max"))),
-        "avg_temperature": _round1(_first(daily.get("temperature_2m_mean"))) if daily.get("temperature_2m_mean") else None,
+        "temperature_min": fc.daily_first("temperature_2m_min"),
+        "temperature_max": fc.daily_first("temperature_2m_max"),
+        "avg_temperature": fc.daily_first("temperature_2m_mean"),
         "precipitation_sum": _round1(daily_precip),
-        "precipitation_probability": _round1(_first(daily.get("precipitation_probability_mean"))) if daily.get("precipitation_probability_mean") else None,
-        "precipitation_probability_day": _round1(_first(daily.get("precipitation_probability_mean"))) if daily.get("precipitation_probability_mean") else None,  # ✅ alias thêm vào
-        "avg_humidity": _round1(_first(daily.get("relative_humidity_2m_mean"))) if daily.get("relative_humidity_2m_mean") else None,
-        "avg_pressure": _round1(_first(daily.get("pressure_msl_mean"))) if daily.get("pressure_msl_mean") else None,
-        "solar_radiation_sum": _round1(_first(daily.get("shortwave_radiation_sum"))) if daily.get("shortwave_radiation_sum") else None,
-        "uv_index_max": _round1(_first(daily.get("uv_index_max"))),
+        "precipitation_probability": fc.daily_first("precipitation_probability_mean"),
+        "precipitation_probability_day": fc.daily_first("precipitation_probability_mean"),  # ✅ alias thêm vào
+        "avg_humidity": fc.daily_first("relative_humidity_2m_mean"),
+        "avg_pressure": fc.daily_first("pressure_msl_mean"),
+        "solar_radiation_sum": fc.daily_first("shortwave_radiation_sum"),
+        "uv_index_max": fc.daily_first("uv_index_max"),
         "sunrise": _first(daily.get("sunrise")),
         "sunset": _first(daily.get("sunset")),
-        "cloudcover_mean": _round1(_first(daily.get("cloudcover_mean"))) if daily.get("cloudcover_mean") else None,
-        "dewpoint_2m_mean": _round1(_first(daily.get("dewpoint_2m_mean"))) if daily.get("dewpoint_2m_mean") else None,
-        "visibility_day": _round1(_first(daily.get("visibility"))) if daily.get("visibility") else None,
+        "cloudcover_mean": fc.daily_first("cloudcover_mean"),
+        "dewpoint_2m_mean": fc.daily_first("dewpoint_2m_mean"),
+        "visibility_day": fc.daily_first("visibility"),
 
         "series": {
             "time": daily.get("time", []),
@@ -172,4 +403,9 @@ async def get_weather(lat: float, lon: float) -> Dict[str, Any]:
         }
     }
 
-    return {"current": om_current, "hourly": om_hourly, "daily": om_daily}
\ No newline at end of file
+    return {
+        "current": om_current,
+        "hourly": om_hourly,
+        "daily": om_daily,
+        "meta": dict(forecast_meta(lat, lon), cache=cache_status),
+    }
\ No newline at end of file
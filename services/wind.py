@@ -1,5 +1,9 @@
 # services/wind.py
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from services.rules import Scale
 
 def _to_float(val: Any) -> Optional[float]:
     try:
@@ -41,60 +45,90 @@ def compute_effective_wind(wspd: Any, gust: Any) -> Optional[float]:
     eff = 0.7 * w + 0.3 * g_eff
     return _round1(eff)
 
+def _effective_wind_array(wspd: Any, gust: Any) -> np.ndarray:
+    """compute_effective_wind cho cả mảng (chưa làm tròn; NaN = thiếu)."""
+    w = np.asarray(wspd, dtype=np.float64)
+    g = np.asarray(gust, dtype=np.float64) if gust is not None else np.full_like(w, np.nan)
+    g_eff = np.where(np.isnan(g), w, np.minimum(g, w * 1.5))
+    return 0.7 * w + 0.3 * g_eff
+
+# Mức gió theo gió hiệu dụng (đã làm tròn 1 chữ số), mã 0 = rất mạnh ... 4 = lặng gió
+WIND_LEVELS: Dict[str, Scale] = {
+    # Miền Bắc: quen gió mùa, ngưỡng cảm nhận cao hơn
+    "north": Scale([
+        (">=", 20, "💨 Gió rất mạnh, nguy hiểm khi di chuyển ngoài trời."),
+        (">=", 12, "💨 Gió mạnh, có thể gây khó khăn khi đi lại."),
+        (">=", 6, "🍃 Gió vừa, cảm nhận rõ rệt."),
+        (">", 0, "🍃 Gió nhẹ, thoáng mát."),
+    ], default="🙂 Lặng gió.", ndigits=1),
+    # Miền Trung/Nam: ít gió mùa, ngưỡng cảm nhận thấp hơn
+    "central_south": Scale([
+        (">=", 15, "💨 Gió rất mạnh, nguy hiểm khi di chuyển ngoài trời."),
+        (">=", 8, "💨 Gió mạnh, có thể gây khó khăn khi đi lại."),
+        (">=", 4, "🍃 Gió vừa, cảm nhận rõ rệt."),
+        (">", 0, "🍃 Gió nhẹ, thoáng mát."),
+    ], default="🙂 Lặng gió.", ndigits=1),
+}
+
+def _wind_levels(region: str) -> Scale:
+    return WIND_LEVELS["north" if region == "north" else "central_south"]
+
 def classify_wind_level(wspd: Any, gust: Any = None, region: str = "north") -> Optional[str]:
-    eff = compute_effective_wind(wspd, gust)
-    if eff is None:
-        return None
-    if region == "north":
-        # Miền Bắc: quen gió mùa, ngưỡng cảm nhận cao hơn
-        if eff >= 20: return "💨 Gió rất mạnh, nguy hiểm khi di chuyển ngoài trời."
-        if eff >= 12: return "💨 Gió mạnh, có thể gây khó khăn khi đi lại."
-        if eff >= 6:  return "🍃 Gió vừa, cảm nhận rõ rệt."
-        if eff > 0:   return "🍃 Gió nhẹ, thoáng mát."
-        return "🙂 Lặng gió."
-    else:
-        # Miền Trung/Nam: ít gió mùa, ngưỡng cảm nhận thấp hơn
-        if eff >= 15: return "💨 Gió rất mạnh, nguy hiểm khi di chuyển ngoài trời."
-        if eff >= 8:  return "💨 Gió mạnh, có thể gây khó khăn khi đi lại."
-        if eff >= 4:  return "🍃 Gió vừa, cảm nhận rõ rệt."
-        if eff > 0:   return "🍃 Gió nhẹ, thoáng mát."
-        return "🙂 Lặng gió."
+    return _wind_levels(region).text(compute_effective_wind(wspd, gust))
+
+def classify_wind_level_codes(wspd: Any, gust: Any = None, region: str = "north") -> np.ndarray:
+    """Mã mức gió cho cả mảng (xem WIND_LEVELS[...].legend()), thiếu gió -> -1."""
+    return _wind_levels(region).codes(_effective_wind_array(wspd, gust))
+
+# Cấp Beaufort theo gió duy trì (m/s): mã nhãn = số cấp
+WIND_BEAUFORT = Scale([
+    ("<", 0.3, "0"), ("<", 1.6, "1"), ("<", 3.4, "2"), ("<", 5.5, "3"),
+    ("<", 8.0, "4"), ("<", 10.8, "5"), ("<", 13.9, "6"), ("<", 17.2, "7"),
+    ("<", 20.8, "8"), ("<", 24.5, "9"), ("<", 28.5, "10"), ("<", 32.7, "11"),
+], default="12")
 
 def classify_wind_beaufort(wspd: Any, avg_wspd: Any = None, gust: Any = None) -> Optional[int]:
     sustained = _to_float(avg_wspd) if _to_float(avg_wspd) is not None else _to_float(wspd)
-    if sustained is None:
-        return None
-    w = sustained
-    if w < 0.3: return 0
-    if w < 1.6: return 1
-    if w < 3.4: return 2
-    if w < 5.5: return 3
-    if w < 8.0: return 4
-    if w < 10.8: return 5
-    if w < 13.9: return 6
-    if w < 17.2: return 7
-    if w < 20.8: return 8
-    if w < 24.5: return 9
-    if w < 28.5: return 10
-    if w < 32.7: return 11
-    return 12
+    level = WIND_BEAUFORT.code(sustained)
+    return None if level < 0 else level
+
+def classify_wind_beaufort_codes(wspd: Any, avg_wspd: Any = None) -> np.ndarray:
+    """Cấp Beaufort cho cả mảng (gió trung bình nếu có, không thì gió hiện tại); thiếu -> -1."""
+    w = np.asarray(wspd, dtype=np.float64)
+    if avg_wspd is not None:
+        avg = np.asarray(avg_wspd, dtype=np.float64)
+        w = np.where(np.isnan(avg), w, avg)
+    return WIND_BEAUFORT.codes(w)
+
+# Gió giật so với gió trung bình: (ngưỡng tối thiểu, hệ số "mạnh hơn nhiều", hệ số "có gió giật")
+GUST_LABELS = (
+    "⚠️ Gió giật mạnh hơn nhiều so với gió trung bình.",
+    "ℹ️ Có gió giật, cần chú ý.",
+    "🙂 Gió giật không đáng kể.",
+)
+_GUST_FACTORS: Dict[str, Tuple[float, float, float]] = {
+    "north": (6.0, 1.6, 1.3),
+    "central_south": (5.0, 1.4, 1.2),
+}
 
 def interpret_gust(gust: Any, wspd: Any, region: str = "north") -> Optional[str]:
     g, w = _to_float(gust), _to_float(wspd)
     if g is None or w is None:
         return None
-    if region == "north":
-        if g >= max(6.0, w * 1.6):
-            return "⚠️ Gió giật mạnh hơn nhiều so với gió trung bình."
-        if g >= w * 1.3:
-            return "ℹ️ Có gió giật, cần chú ý."
-        return "🙂 Gió giật không đáng kể."
-    else:
-        if g >= max(5.0, w * 1.4):
-            return "⚠️ Gió giật mạnh hơn nhiều so với gió trung bình."
-        if g >= w * 1.2:
-            return "ℹ️ Có gió giật, cần chú ý."
-        return "🙂 Gió giật không đáng kể."
+    floor, strong, some = _GUST_FACTORS["north" if region == "north" else "central_south"]
+    if g >= max(floor, w * strong):
+        return GUST_LABELS[0]
+    if g >= w * some:
+        return GUST_LABELS[1]
+    return GUST_LABELS[2]
+
+def interpret_gust_codes(gust: Any, wspd: Any, region: str = "north") -> np.ndarray:
+    """Chỉ số trong GUST_LABELS cho cả mảng; thiếu gió giật hoặc gió -> -1."""
+    g, w = np.asarray(gust, dtype=np.float64), np.asarray(wspd, dtype=np.float64)
+    floor, strong, some = _GUST_FACTORS["north" if region == "north" else "central_south"]
+    codes = np.select([g >= np.maximum(floor, w * strong), g >= w * some], [0, 1], 2).astype(np.int16)
+    codes[np.isnan(g) | np.isnan(w)] = -1
+    return codes
 
 def adjust_feels_by_wind(temp: Any, feels: Any, wspd: Any, gust: Any = None, region: str = "north") -> Optional[float]:
     t = _to_float(temp)
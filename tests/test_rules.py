@@ -0,0 +1,106 @@
+"""
+Kiểm tra bộ luật ngưỡng (services/rules.py) giữ nguyên hành vi chuỗi if/elif cũ.
+
+tests/data/rules_golden.json được chụp từ generate_all_alerts / generate_all_insights
+bản viết tay trước fb16a18 (git show fb16a18^:services/alerts.py, ...insights.py):
+bản ghi sát từng ngưỡng (t ± 0.001, ± 0.05, ± 1) cộng bản ghi ngẫu nhiên nhiều chỉ số.
+"""
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services import (
+    alerts, cloud_dew, humidity, insights, pressure, rain, solar_uv, temperature, visibility, wind,
+)
+from services.rules import Scale
+
+GOLDEN = json.loads((Path(__file__).parent / "data" / "rules_golden.json").read_text(encoding="utf-8"))
+TEXTS = GOLDEN["texts"]
+CASES = GOLDEN["cases"]
+
+# --------------------------------------
+# Đầu ra cũ trên bản ghi sát ngưỡng
+# --------------------------------------
+@pytest.mark.parametrize("i", range(len(CASES)))
+def test_alerts_match_golden(i):
+    record, alert_idx, _ = CASES[i]
+    assert alerts.generate_all_alerts(record) == [TEXTS[k] for k in alert_idx]
+
+@pytest.mark.parametrize("i", range(len(CASES)))
+def test_insights_match_golden(i):
+    record, _, insight_idx = CASES[i]
+    assert insights.generate_all_insights(record) == [TEXTS[k] for k in insight_idx]
+
+def _columns(records):
+    keys = sorted({k for r in records for k in r})
+    return {k: [r.get(k) for r in records] for k in keys}
+
+def test_many_match_golden():
+    records = [c[0] for c in CASES]
+    cols = _columns(records)
+    assert alerts.generate_all_alerts_many(cols) == [[TEXTS[k] for k in c[1]] for c in CASES]
+    assert insights.generate_all_insights_many(cols) == [[TEXTS[k] for k in c[2]] for c in CASES]
+
+# --------------------------------------
+# Scale: code / text / codes khớp chuỗi if/elif gốc (_chain)
+# --------------------------------------
+def _scales():
+    out = {}
+    for name, p in (("alerts", alerts.ALL_ALERTS), ("insights", insights.ALL_INSIGHTS)):
+        for rs, _ in p.steps:
+            for rule in rs.rules:
+                out[f"{name}.{rule.name}#{id(rule.scale)}"] = rule.scale
+    for mod in (cloud_dew, humidity, pressure, rain, solar_uv, temperature, visibility, wind):
+        for attr, v in vars(mod).items():
+            items = v.items() if isinstance(v, dict) else [("", v)]
+            for key, s in items:
+                if isinstance(s, Scale):
+                    out[f"{mod.__name__}.{attr}[{key}]"] = s
+    return out
+
+SCALES = _scales()
+
+def _edge_values(scale):
+    xs = {-1e9, 1e9, 0.0}
+    for _, t, _ in scale.cases:
+        for off in (-1, -0.051, -0.05, -0.049, -0.001, 0, 0.001, 0.049, 0.05, 0.051, 1):
+            xs.add(t + off)
+        xs.add(math.nextafter(t, -math.inf))
+        xs.add(math.nextafter(t, math.inf))
+    for b in scale.bounds:
+        xs.add(b)
+        xs.add(math.nextafter(b, -math.inf))
+    return sorted(xs)
+
+def _expected_code(scale, x):
+    text = scale._chain(x if scale.ndigits is None else round(x, scale.ndigits))
+    if text is None:
+        return -1
+    return [lb.text for lb in scale.labels].index(text)
+
+@pytest.mark.parametrize("name", sorted(SCALES))
+def test_scale_code_matches_chain(name):
+    scale = SCALES[name]
+    for x in _edge_values(scale):
+        assert scale.code(x) == _expected_code(scale, x), x
+
+@pytest.mark.parametrize("name", sorted(SCALES))
+def test_scale_text_and_lookup(name):
+    scale = SCALES[name]
+    lookup = scale.lookup()
+    for x in _edge_values(scale):
+        c = _expected_code(scale, x)
+        expected = None if c < 0 else scale.labels[c].render(x)
+        assert scale.text(x) == expected, x
+        assert lookup(x) == expected, x
+    assert scale.code(None) == -1 and scale.text(float("nan")) is None
+
+@pytest.mark.parametrize("name", sorted(SCALES))
+def test_scale_codes_vectorized(name):
+    scale = SCALES[name]
+    xs = _edge_values(scale)
+    got = scale.codes(np.array(xs + [np.nan]))
+    assert got.tolist() == [scale.code(x) for x in xs] + [-1]
@@ -0,0 +1,35 @@
+"""Bảng snapshot phải dựng lại giống hệt (cùng digest) khi dự báo không đổi."""
+import asyncio
+
+import pytest
+
+from benchmarks.bench_aggregate import make_forecast
+from services import gazetteer, snapshot
+from services import weather_sources as ws
+from services.forecast import Forecast
+
+@pytest.fixture
+def fixed_forecasts(monkeypatch, request):
+    # Mỗi điểm một dự báo cố định; weathercode không khớp từ khóa icon nào (sương mù / thiếu mã)
+    forecasts = {}
+
+    async def _fetch(lat, lon, consumer="bulletin"):
+        key = (round(lat, 4), round(lon, 4))
+        if key not in forecasts:
+            om = make_forecast(48, seed=hash(key) & 0xFFFF)
+            om["current_weather"] = {"temperature": 24.0, "windspeed": 2.0, "weathercode": request.param}
+            forecasts[key] = Forecast(om)
+        return forecasts[key], {"status": "hit"}
+
+    points = list(gazetteer.points())[:300]
+    monkeypatch.setattr(gazetteer, "points", lambda: points)
+    monkeypatch.setattr(ws, "fetch_forecast_entry", _fetch)
+    return request.param
+
+@pytest.mark.parametrize("fixed_forecasts", [45, 48, None], indirect=True)
+def test_build_digest_is_deterministic(fixed_forecasts):
+    first = asyncio.run(snapshot.build())
+    second = asyncio.run(snapshot.build())
+    assert len(first) > 0
+    assert first.digest == second.digest
+    assert first.encode("json") == second.encode("json")